@@ -1,13 +1,67 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from backend.utils.logger import get_logger
 from backend.utils.config import settings
+from backend.database import ensure_indexes
 from backend.routes import alerts, playbooks, intel, incidents, stats, auth
 from backend.routes import cases, logs, integrations, monitor, wazuh
+from backend.services.http_client import get_http_client, close_http_client
+from backend.services.jobs import job_manager
+from backend.services.wazuh import wazuh_service
+from backend.services.wazuh_sync import wazuh_sync
+from backend.services.wazuh_tail import wazuh_tailer
+from backend.services.write_buffer import alert_buffer, buffers
+from backend.services.dedup import alert_dedup
+from backend.services.rollups import rollups
+from backend.services.time_buckets import time_buckets
+from backend.services.spool import ingest_spool
+from backend.services.syslog_listener import syslog_listener
 
 log = get_logger(__name__)
 
-app = FastAPI(title="SentinalX", version="0.3.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    get_http_client()
+    # Don't hold up startup (or ingest into the spool) on index builds
+    index_task = asyncio.create_task(ensure_indexes())
+    if ingest_spool is not None:
+        ingest_spool.start()
+    alert_buffer.add_listener(rollups.record_alerts)
+    for buffer in buffers:
+        buffer.start()
+    alert_dedup.start()
+    rollups.start()
+    time_buckets.start()
+    await job_manager.start()
+    if settings.SYSLOG_ENABLED:
+        await syslog_listener.start()
+    if wazuh_service.api_password:
+        wazuh_service.start_metadata_refresh()
+    if settings.WAZUH_SYNC_ENABLED:
+        wazuh_sync.start()
+    if settings.WAZUH_TAIL_ENABLED:
+        wazuh_tailer.start()
+    yield
+    index_task.cancel()
+    await syslog_listener.stop()
+    await time_buckets.stop()
+    await rollups.stop()
+    await wazuh_tailer.stop()
+    await wazuh_sync.stop()
+    await job_manager.stop()
+    await wazuh_service.close()
+    for buffer in buffers:
+        await buffer.stop()
+    await alert_dedup.stop()
+    if ingest_spool is not None:
+        await ingest_spool.stop()
+    await close_http_client()
+
+
+app = FastAPI(title="SentinalX", version="0.3.0", lifespan=lifespan)
 
 # CORS - adjust origins as needed
 app.add_middleware(
@@ -1,4 +1,5 @@
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING
 from backend.utils.config import settings
 from backend.utils.logger import get_logger
 from typing import Optional
@@ -13,7 +14,10 @@ def get_client() -> AsyncIOMotorClient:
     global _client
     if _client is None:
         log.info("Connecting to MongoDB...")
-        _client = AsyncIOMotorClient(settings.MONGO_URI)
+        _client = AsyncIOMotorClient(
+            settings.MONGO_URI,
+            serverSelectionTimeoutMS=settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        )
     return _client
 
 
@@ -22,3 +26,33 @@ def get_db() -> AsyncIOMotorDatabase:
     if _db is None:
         _db = get_client()[settings.MONGO_DB_NAME]
     return _db
+
+
+# (collection, keys[, options]) for indexes the API relies on; created idempotently at startup.
+# The trailing _id on each sort key backs keyset pagination (backend/utils/pagination.py).
+INDEXES = [
+    # Wazuh sync/tail upsert on externalId; uniqueness stops concurrent syncs inserting twice
+    ("alerts", [("externalId", ASCENDING)],
+     {"unique": True, "partialFilterExpression": {"externalId": {"$exists": True}}}),
+    ("alerts", [("createdAt", DESCENDING), ("_id", DESCENDING)]),
+    ("alerts", [("severity", ASCENDING), ("createdAt", DESCENDING), ("_id", DESCENDING)]),
+    ("incidents", [("createdAt", DESCENDING), ("_id", DESCENDING)]),
+    ("cases", [("createdAt", DESCENDING), ("_id", DESCENDING)]),
+    ("logs", [("ts", DESCENDING), ("_id", DESCENDING)]),
+    ("logs", [("ip", ASCENDING), ("ts", DESCENDING), ("_id", DESCENDING)]),
+    ("logs", [("type", ASCENDING), ("ts", DESCENDING), ("_id", DESCENDING)]),
+    ("rollups", [("metric", ASCENDING), ("dim", ASCENDING), ("count", DESCENDING)]),
+    ("rollups", [("metric", ASCENDING), ("dim", ASCENDING), ("value", ASCENDING)]),
+    ("alert_buckets", [("unit", ASCENDING), ("ts", ASCENDING)]),
+    # Multikey search index over message tokens (backend/utils/search.py)
+    ("logs", [("tokens", ASCENDING), ("ts", DESCENDING), ("_id", DESCENDING)]),
+]
+
+
+async def ensure_indexes():
+    db = get_db()
+    for collection, keys, *options in INDEXES:
+        try:
+            await db[collection].create_index(keys, **(options[0] if options else {}))
+        except Exception as e:
+            log.warning(f"Could not create index {keys} on {collection}: {e}")
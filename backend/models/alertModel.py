@@ -1,5 +1,6 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional, Dict, Any, Literal
+from backend.utils.timeutil import to_iso
 
 
 class AlertIn(BaseModel):
@@ -14,3 +15,8 @@ class AlertIn(BaseModel):
 class AlertOut(AlertIn):
     id: str
     createdAt: Optional[str] = None
+    count: Optional[int] = None
+    lastSeen: Optional[str] = None
+
+    # Native dates and legacy ISO strings both come out as ISO-8601 "...Z"
+    _iso_times = field_validator("createdAt", "lastSeen", mode="before")(to_iso)
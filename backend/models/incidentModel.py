@@ -1,5 +1,6 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional, List, Dict, Any
+from backend.utils.timeutil import to_iso
 
 
 class Incident(BaseModel):
@@ -13,3 +14,5 @@ class Incident(BaseModel):
 class IncidentOut(Incident):
     id: str
     createdAt: Optional[str] = None
+
+    _iso_times = field_validator("createdAt", mode="before")(to_iso)
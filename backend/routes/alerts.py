@@ -1,10 +1,22 @@
-from fastapi import APIRouter, HTTPException
+import zlib
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from backend.utils.logger import get_logger
+from backend.utils.config import settings
+from backend.utils.bulk import BodyTooLarge, iter_json_records
+from backend.utils.export import MEDIA_TYPES, WRITERS, ExportUnavailable, require_parquet
+from backend.utils.timeutil import time_range, utcnow
+from backend.utils.pagination import InvalidCursor, Page, fetch_page
 from backend.database import get_db
+from backend.services.write_buffer import BufferFull, alert_buffer
+from backend.services.dedup import alert_dedup
+from backend.services.rollups import rollups
 from backend.models.alertModel import AlertIn, AlertOut
 from datetime import datetime
+from typing import Literal
 from bson import ObjectId
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
+from pymongo.errors import BulkWriteError
 
 router = APIRouter(prefix="/alerts", tags=["alerts"])
 log = get_logger(__name__)
@@ -20,37 +32,189 @@ class UpdateAlertStatus(BaseModel):
     status: str
 
 
+def _new_alert_doc(alert: AlertIn) -> dict:
+    doc = alert.model_dump()
+    doc["createdAt"] = utcnow()
+    return doc
+
+
 @router.post("", response_model=AlertOut)
 async def ingest_alert(alert: AlertIn):
     try:
-        db = get_db()
-        doc = alert.model_dump()
-        doc["createdAt"] = datetime.utcnow().isoformat() + "Z"
-        res = await db.alerts.insert_one(doc)
-        return AlertOut(id=str(res.inserted_id), **doc)
+        doc = _new_alert_doc(alert)
+        repeat_of = alert_dedup.check(doc)
+        if repeat_of is not None:
+            return AlertOut(id=str(repeat_of), **doc)
+        try:
+            alert_id = await alert_buffer.submit(doc)
+        except Exception:
+            alert_dedup.discard([doc["_id"]])
+            raise
+        alert_dedup.confirm([alert_id])
+        doc.pop("_id", None)
+        return AlertOut(id=str(alert_id), **doc)
+    except BufferFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
         log.exception("Failed to ingest alert")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("", response_model=list[AlertOut])
-async def list_alerts(limit: int = 100, severity: str | None = None):
+async def _insert_batch(docs: list[dict], positions: list[int], errors: list[dict]) -> int:
+    """Unordered insert_many; per-document failures are reported at their request position"""
+    if not docs:
+        return 0
+    try:
+        await get_db().alerts.insert_many(docs, ordered=False)
+        stored = docs
+    except BulkWriteError as e:
+        write_errors = e.details.get("writeErrors", [])
+        failed = {err["index"] for err in write_errors}
+        for err in write_errors:
+            errors.append({"index": positions[err["index"]], "error": err.get("errmsg", "write failed")})
+        alert_dedup.discard(docs[i]["_id"] for i in failed)
+        stored = [doc for i, doc in enumerate(docs) if i not in failed]
+    except Exception:
+        alert_dedup.discard(doc["_id"] for doc in docs if "_id" in doc)
+        raise
+
+    alert_dedup.confirm(doc["_id"] for doc in stored)
+    # The alerts are stored at this point; a counter failure must not fail the
+    # request (the client would retry and duplicate them). Reconciliation fixes the drift.
+    try:
+        await rollups.record_alerts(stored)
+    except Exception:
+        log.exception("Failed to update rollups for bulk alerts")
+    return len(stored)
+
+
+@router.post("/bulk")
+async def ingest_bulk(request: Request):
+    """
+    Bulk ingest from a JSON array or an NDJSON stream (optionally gzip-encoded).
+    Records are validated and written in unordered batches; invalid records are
+    reported by position and do not fail the rest of the request.
+    """
+    accepted = 0
+    deduplicated = 0
+    errors: list[dict] = []
+    docs: list[dict] = []
+    positions: list[int] = []
+    try:
+        records = iter_json_records(
+            request.stream(),
+            content_type=request.headers.get("content-type", ""),
+            content_encoding=request.headers.get("content-encoding", ""),
+            max_array_bytes=settings.BULK_MAX_ARRAY_BYTES,
+            max_record_bytes=settings.BULK_MAX_RECORD_BYTES,
+        )
+        async for position, record in records:
+            if isinstance(record, Exception):
+                errors.append({"index": position, "error": f"Invalid JSON: {record}"})
+                continue
+            try:
+                doc = _new_alert_doc(AlertIn.model_validate(record))
+            except ValidationError as e:
+                errors.append({"index": position, "error": e.errors(include_url=False, include_input=False, include_context=False)})
+                continue
+            if alert_dedup.check(doc) is not None:
+                deduplicated += 1
+                continue
+            docs.append(doc)
+            positions.append(position)
+            if len(docs) >= settings.BULK_INGEST_BATCH:
+                accepted += await _insert_batch(docs, positions, errors)
+                docs, positions = [], []
+        accepted += await _insert_batch(docs, positions, errors)
+    except BodyTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except (ValueError, zlib.error) as e:
+        # Earlier batches may already be committed; tell the client what landed
+        raise HTTPException(status_code=400, detail={
+            "error": f"Malformed body: {e}", "accepted": accepted, "errors": errors[:settings.BULK_MAX_ERRORS],
+        })
+    except Exception as e:
+        log.exception("Bulk alert ingest failed")
+        raise HTTPException(status_code=500, detail={
+            "error": str(e), "accepted": accepted, "errors": errors[:settings.BULK_MAX_ERRORS],
+        })
+
+    errors.sort(key=lambda err: err["index"])
+    return {
+        "accepted": accepted,
+        "deduplicated": deduplicated,
+        "rejected": len(errors),
+        "errors": errors[:settings.BULK_MAX_ERRORS],
+        "errorsTruncated": len(errors) > settings.BULK_MAX_ERRORS,
+    }
+
+
+@router.get("", response_model=Page[AlertOut])
+async def list_alerts(
+    limit: int = Query(100, ge=1, le=1000),
+    severity: str | None = None,
+    cursor: str | None = None,
+):
+    """Newest first. Pass `next_cursor` back as `cursor` for the next page."""
     try:
         db = get_db()
         query = {}
         if severity:
             query["severity"] = severity
-        cursor = db.alerts.find(query).sort("createdAt", -1).limit(limit)
-        items = [
-            _to_alert_out(doc)
-            async for doc in cursor
-        ]
-        return items
+        docs, next_cursor = await fetch_page(db.alerts, query, "createdAt", limit, cursor)
+        return Page(items=[_to_alert_out(doc) for doc in docs], next_cursor=next_cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         log.exception("Failed to list alerts")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/export")
+async def export_alerts(
+    format: Literal["csv", "ndjson", "parquet"] = "csv",
+    severity: str | None = None,
+    status: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    limit: int | None = Query(None, ge=1),
+):
+    """
+    Stream alerts newest first as CSV, NDJSON or Parquet. Rows are written as
+    the cursor yields them, so memory use does not grow with the export size.
+    """
+    if format == "parquet":
+        try:
+            require_parquet()
+        except ExportUnavailable as e:
+            raise HTTPException(status_code=501, detail=str(e))
+
+    query: dict = {}
+    if severity:
+        query["severity"] = severity
+    if status:
+        query["status"] = status
+    if since or until:
+        query.update(time_range("createdAt", since, until))
+
+    cursor = get_db().alerts.find(query).sort([("createdAt", -1), ("_id", -1)]).batch_size(1000)
+    if limit:
+        cursor = cursor.limit(limit)
+
+    filename = f"alerts-{datetime.utcnow():%Y%m%dT%H%M%SZ}.{format}"
+    return StreamingResponse(
+        WRITERS[format](cursor),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/export/csv")
+async def export_csv(limit: int | None = Query(None, ge=1)):
+    """Kept for existing clients; streams the same CSV as /alerts/export."""
+    return await export_alerts(format="csv", limit=limit)
+
+
 @router.get("/{alert_id}", response_model=AlertOut)
 async def get_alert(alert_id: str):
     try:
@@ -72,8 +236,16 @@ async def update_status(alert_id: str, body: UpdateAlertStatus):
         if body.status not in {"new", "investigating", "false_positive", "resolved"}:
             raise HTTPException(status_code=400, detail="Invalid status")
         db = get_db()
-        res = await db.alerts.update_one({"_id": ObjectId(alert_id)}, {"$set": {"status": body.status}})
-        if res.matched_count == 0:
+        async with rollups.lock("alerts"):
+            before = await db.alerts.find_one_and_update(
+                {"_id": ObjectId(alert_id)}, {"$set": {"status": body.status}},
+                projection={"status": 1, "createdAt": 1},
+            )
+            if before is not None:
+                await rollups.record_status_change(
+                    "alerts", before.get("status"), body.status, before.get("createdAt")
+                )
+        if before is None:
             raise HTTPException(status_code=404, detail="Alert not found")
         return {"ok": True}
     except HTTPException:
@@ -81,19 +253,3 @@ async def update_status(alert_id: str, body: UpdateAlertStatus):
     except Exception as e:
         log.exception("Failed to update alert status")
         raise HTTPException(status_code=500, detail=str(e))
-
-
-@router.get("/export/csv")
-async def export_csv(limit: int = 1000):
-    try:
-        db = get_db()
-        cursor = db.alerts.find().sort("createdAt", -1).limit(limit)
-        rows = ["id,source,severity,type,status,createdAt"]
-        async for doc in cursor:
-            rows.append(
-                f"{doc['_id']},{doc.get('source', '')},{doc.get('severity', '')},{doc.get('type', '')},{doc.get('status', '')},{doc.get('createdAt', '')}"
-            )
-        return {"content": "\n".join(rows)}
-    except Exception as e:
-        log.exception("CSV export failed")
-        raise HTTPException(status_code=500, detail=str(e))
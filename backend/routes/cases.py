@@ -1,8 +1,9 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
-from datetime import datetime, timezone
 from backend.database import get_db
+from backend.utils.pagination import InvalidCursor, fetch_page
 from backend.utils.logger import get_logger
+from backend.utils.timeutil import to_iso, utcnow
 
 router = APIRouter(prefix="/cases", tags=["cases"])
 log = get_logger(__name__)
@@ -18,24 +19,29 @@ async def create_case(body: CaseCreate):
         db = get_db()
         doc = body.model_dump()
         doc["status"] = "open"
-        doc["createdAt"] = datetime.now(timezone.utc).isoformat()
+        doc["createdAt"] = utcnow()
         res = await db.cases.insert_one(doc)
+        doc.pop("_id", None)
         doc["id"] = str(res.inserted_id)
+        doc["createdAt"] = to_iso(doc["createdAt"])
         return doc
     except Exception as e:
         log.exception("create_case failed")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("", summary="List cases")
-async def list_cases(limit: int = 50):
+async def list_cases(limit: int = Query(50, ge=1, le=1000), cursor: str | None = None):
     try:
         db = get_db()
-        cursor = db.cases.find().sort("createdAt", -1).limit(limit)
+        docs, next_cursor = await fetch_page(db.cases, {}, "createdAt", limit, cursor)
         out = []
-        async for c in cursor:
+        for c in docs:
             c["id"] = str(c.pop("_id"))
+            c["createdAt"] = to_iso(c.get("createdAt"))
             out.append(c)
-        return out
+        return {"items": out, "next_cursor": next_cursor}
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         log.exception("list_cases failed")
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,11 +1,13 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
 from typing import Optional
-from datetime import datetime
 from bson import ObjectId
 
 from backend.utils.logger import get_logger
 from backend.database import get_db
+from backend.utils.timeutil import utcnow
+from backend.services.rollups import rollups
+from backend.utils.pagination import InvalidCursor, Page, fetch_page
 from backend.models.incidentModel import Incident, IncidentOut
 
 router = APIRouter(prefix="/incidents", tags=["incidents"])
@@ -23,8 +25,11 @@ async def create_incident(body: Incident):
     try:
         db = get_db()
         data = body.model_dump()
-        data["createdAt"] = datetime.utcnow().isoformat() + "Z"
-        res = await db.incidents.insert_one(data)
+        data["createdAt"] = utcnow()
+        async with rollups.lock("incidents"):
+            res = await db.incidents.insert_one(data)
+            await rollups.record_incidents([data])
+        data.pop("_id", None)
         data["id"] = str(res.inserted_id)
         return IncidentOut(**data)
     except Exception as e:
@@ -32,16 +37,17 @@ async def create_incident(body: Incident):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("", response_model=list[IncidentOut])
-async def list_incidents(limit: int = 50):
+@router.get("", response_model=Page[IncidentOut])
+async def list_incidents(
+    limit: int = Query(50, ge=1, le=1000),
+    cursor: str | None = None,
+):
     try:
         db = get_db()
-        cursor = db.incidents.find().sort("createdAt", -1).limit(limit)
-        items = [
-            _to_incident_out(doc)
-            async for doc in cursor
-        ]
-        return items
+        docs, next_cursor = await fetch_page(db.incidents, {}, "createdAt", limit, cursor)
+        return Page(items=[_to_incident_out(doc) for doc in docs], next_cursor=next_cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         log.exception("Failed to list incidents")
         raise HTTPException(status_code=500, detail=str(e))
@@ -70,12 +76,15 @@ class UpdateStatus(BaseModel):
 async def update_status(incident_id: str, body: UpdateStatus):
     try:
         db = get_db()
-        res = await db.incidents.update_one(
-            {"_id": ObjectId(incident_id)}, {"$set": {"status": body.status}}
-        )
-        if res.matched_count == 0:
+        async with rollups.lock("incidents"):
+            before = await db.incidents.find_one_and_update(
+                {"_id": ObjectId(incident_id)}, {"$set": {"status": body.status}}, projection={"status": 1}
+            )
+            if before is not None:
+                await rollups.record_status_change("incidents", before.get("status"), body.status)
+        if before is None:
             raise HTTPException(status_code=404, detail="Incident not found")
-        return {"ok": True, "updated": res.modified_count}
+        return {"ok": True, "updated": int(before.get("status") != body.status)}
     except HTTPException:
         raise
     except Exception as e:
@@ -1,4 +1,5 @@
 from fastapi import APIRouter
+from backend.services.breaker import provider_health
 from backend.utils.config import settings
 from backend.utils.logger import get_logger
 
@@ -16,5 +17,6 @@ async def status():
         "elk": bool(settings.__dict__.get("ELK_ENDPOINT")),
         "okta": bool(settings.__dict__.get("OKTA_API_TOKEN")),
         "ad": bool(settings.__dict__.get("AD_SERVER")),
+        "circuits": provider_health(),
     }
 
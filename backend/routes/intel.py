@@ -1,5 +1,8 @@
+import asyncio
 from fastapi import APIRouter, HTTPException
 from backend.services import virustotal, abuseipdb, otx
+from backend.services.intel_cache import reputation_cache
+from backend.services.ratelimit import limiters
 from backend.utils.logger import get_logger
 
 router = APIRouter(prefix="/intel", tags=["intel"])
@@ -9,9 +12,11 @@ log = get_logger(__name__)
 @router.get("/ip/{ip}")
 async def enrich_ip(ip: str):
     try:
-        vt = virustotal.lookup_ip(ip)
-        abuse = abuseipdb.lookup_ip(ip)
-        alien = otx.lookup_ip(ip)
+        vt, abuse, alien = await asyncio.gather(
+            reputation_cache.get_or_fetch(ip, "ip", "virustotal", lambda: virustotal.lookup_ip(ip)),
+            reputation_cache.get_or_fetch(ip, "ip", "abuseipdb", lambda: abuseipdb.lookup_ip(ip)),
+            reputation_cache.get_or_fetch(ip, "ip", "otx", lambda: otx.lookup_ip(ip)),
+        )
         return {"ip": ip, "virustotal": vt, "abuseipdb": abuse, "otx": alien}
     except Exception as e:
         log.exception("IP enrichment failed")
@@ -21,9 +26,31 @@ async def enrich_ip(ip: str):
 @router.get("/domain/{domain}")
 async def enrich_domain(domain: str):
     try:
-        vt = virustotal.lookup_domain(domain)
-        alien = otx.lookup_domain(domain)
+        vt, alien = await asyncio.gather(
+            reputation_cache.get_or_fetch(domain, "domain", "virustotal", lambda: virustotal.lookup_domain(domain)),
+            reputation_cache.get_or_fetch(domain, "domain", "otx", lambda: otx.lookup_domain(domain)),
+        )
         return {"domain": domain, "virustotal": vt, "otx": alien}
     except Exception as e:
         log.exception("Domain enrichment failed")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/cache/stats")
+async def cache_stats():
+    return reputation_cache.snapshot()
+
+
+@router.get("/limits")
+async def rate_limits():
+    return {name: limiter.snapshot() for name, limiter in limiters.items()}
+
+
+@router.delete("/cache")
+async def invalidate_cache(ioc: str | None = None, type: str | None = None, provider: str | None = None):
+    try:
+        removed = await reputation_cache.invalidate(ioc=ioc, ioc_type=type, provider=provider)
+        return {"ok": True, "removed": removed}
+    except Exception as e:
+        log.exception("Intel cache invalidation failed")
+        raise HTTPException(status_code=500, detail=str(e))
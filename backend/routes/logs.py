@@ -1,7 +1,9 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
 from datetime import datetime, timezone
-from backend.database import get_db
+from backend.services.log_search import index_log, search_logs
+from backend.utils.pagination import InvalidCursor
+from backend.services.write_buffer import BufferFull, log_buffer
 from backend.utils.logger import get_logger
 
 router = APIRouter(prefix="/logs", tags=["logs"])
@@ -17,32 +19,39 @@ class LogIngest(BaseModel):
 @router.post("/ingest")
 async def ingest(body: LogIngest):
     try:
-        db = get_db()
         doc = body.model_dump()
         doc["ts"] = doc.get("ts") or datetime.now(timezone.utc).isoformat()
-        res = await db.logs.insert_one(doc)
-        return {"id": str(res.inserted_id)}
+        log_id = await log_buffer.submit(index_log(doc))
+        return {"id": str(log_id)}
+    except BufferFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
         log.exception("log ingest failed")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/search")
-async def search(q: str | None = None, ip: str | None = None, type: str | None = None, limit: int = 100):
+async def search(
+    q: str | None = None,
+    ip: str | None = None,
+    type: str | None = None,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: str | None = None,
+    rank: bool = False,
+):
+    """
+    Token search over log messages: plain terms must all match, `term*` is a
+    prefix match and "quoted text" an exact phrase. Combines with ip/type.
+    With rank=true the newest matches are ordered by relevance (single page).
+    """
     try:
-        db = get_db()
-        query: dict = {}
-        if ip:
-            query["ip"] = ip
-        if type:
-            query["type"] = type
-        if q:
-            query["message"] = {"$regex": q, "$options": "i"}
-        cursor = db.logs.find(query).sort("ts", -1).limit(limit)
+        docs, next_cursor = await search_logs(q, ip, type, limit, cursor, rank)
         out = []
-        async for d in cursor:
+        for d in docs:
             d["id"] = str(d.pop("_id"))
             out.append(d)
-        return {"items": out}
+        return {"items": out, "next_cursor": next_cursor}
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         log.exception("log search failed")
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,6 +1,11 @@
 from fastapi import APIRouter
 from datetime import datetime, timezone
 from backend.utils.logger import get_logger
+from backend.services.write_buffer import buffers
+from backend.services.spool import ingest_spool
+from backend.services.syslog_listener import syslog_listener
+from backend.services.wazuh_tail import wazuh_tailer
+from backend.services.dedup import alert_dedup
 
 router = APIRouter(prefix="/monitor", tags=["monitor"])
 log = get_logger(__name__)
@@ -23,3 +28,14 @@ async def metrics():
         ],
     }
 
+
+@router.get("/ingest")
+async def ingest_metrics():
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "buffers": [b.snapshot() for b in buffers],
+        "spool": ingest_spool.snapshot() if ingest_spool is not None else {"enabled": False},
+        "syslog": syslog_listener.snapshot(),
+        "wazuh_tail": wazuh_tailer.snapshot(),
+        "dedup": alert_dedup.snapshot(),
+    }
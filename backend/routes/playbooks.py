@@ -26,7 +26,7 @@ async def run_playbook(body: PlaybookRequest):
                 raise ValueError("Missing 'ip' param")
             result["details"] = firewall.block_ip(ip)
             # Auto-notify Slack
-            slack.send_message(f"🚫 Firewall Rule Added: Blocked IP {ip}")
+            await slack.send_message(f"🚫 Firewall Rule Added: Blocked IP {ip}")
             
         elif name == "quarantine_email":
             msg_id = params.get("message_id")
@@ -34,11 +34,11 @@ async def run_playbook(body: PlaybookRequest):
                 raise ValueError("Missing 'message_id' param")
             result["details"] = email_svc.quarantine_email(msg_id)
             # Auto-notify Slack
-            slack.send_message(f"📧 Email Quarantined: Message ID {msg_id}")
+            await slack.send_message(f"📧 Email Quarantined: Message ID {msg_id}")
             
         elif name == "notify_slack":
             text = params.get("text", "Playbook executed")
-            result["details"] = slack.send_message(text)
+            result["details"] = await slack.send_message(text)
             
         elif name == "isolate_host":
             hostname = params.get("hostname")
@@ -50,7 +50,7 @@ async def run_playbook(body: PlaybookRequest):
                 "network_disabled": True,
                 "message": f"Host {hostname} has been isolated from network"
             }
-            slack.send_message(f"🔒 Host Isolated: {hostname} disconnected from network")
+            await slack.send_message(f"🔒 Host Isolated: {hostname} disconnected from network")
             
         elif name == "kill_process":
             process_name = params.get("process_name")
@@ -65,7 +65,7 @@ async def run_playbook(body: PlaybookRequest):
                 "hostname": hostname or "local",
                 "message": f"Successfully terminated {target}"
             }
-            slack.send_message(f"⚠️ Process Killed: {target} on {hostname or 'local'}")
+            await slack.send_message(f"⚠️ Process Killed: {target} on {hostname or 'local'}")
             
         elif name == "reset_password":
             username = params.get("username")
@@ -79,7 +79,7 @@ async def run_playbook(body: PlaybookRequest):
                 "force_change": True,
                 "message": f"Password reset for {username}. User must change on next login."
             }
-            slack.send_message(f"🔑 Password Reset: User {username} credentials have been reset")
+            await slack.send_message(f"🔑 Password Reset: User {username} credentials have been reset")
             
         elif name == "create_incident":
             alert_id = params.get("alert_id")
@@ -97,7 +97,7 @@ async def run_playbook(body: PlaybookRequest):
                 "assigned_to": "SOC Team",
                 "message": f"Incident created from alert {alert_id}"
             }
-            slack.send_message(f"🚨 New Incident: {title} (Severity: {severity.upper()})")
+            await slack.send_message(f"🚨 New Incident: {title} (Severity: {severity.upper()})")
             
         elif name == "enrich_ioc":
             ioc_value = params.get("ioc_value")
@@ -127,7 +127,7 @@ async def run_playbook(body: PlaybookRequest):
                 "dns_sinkhole": True,
                 "message": f"Domain {domain} blocked via DNS sinkhole"
             }
-            slack.send_message(f"🌐 Domain Blocked: {domain} added to DNS blacklist")
+            await slack.send_message(f"🌐 Domain Blocked: {domain} added to DNS blacklist")
             
         elif name == "disable_user":
             username = params.get("username")
@@ -141,7 +141,7 @@ async def run_playbook(body: PlaybookRequest):
                 "active_sessions_terminated": True,
                 "message": f"User {username} has been disabled. Reason: {reason}"
             }
-            slack.send_message(f"👤 User Disabled: {username} - {reason}")
+            await slack.send_message(f"👤 User Disabled: {username} - {reason}")
             
         elif name == "snapshot_memory":
             hostname = params.get("hostname")
@@ -154,7 +154,7 @@ async def run_playbook(body: PlaybookRequest):
                 "size_mb": 4096,
                 "message": f"Memory dump captured from {hostname}"
             }
-            slack.send_message(f"💾 Memory Snapshot: Captured from {hostname}")
+            await slack.send_message(f"💾 Memory Snapshot: Captured from {hostname}")
             
         else:
             raise ValueError(f"Unknown playbook: {name}")
@@ -1,6 +1,14 @@
-from fastapi import APIRouter, HTTPException
+import asyncio
+from fastapi import APIRouter, HTTPException, Query, Request
 from datetime import datetime, timedelta, timezone
 from backend.database import get_db
+from backend.models.incidentModel import IncidentOut
+from backend.routes.monitor import metrics as monitor_metrics
+from backend.services.rollups import rollups
+from backend.services.stats_cache import stats_cache
+from backend.services.time_buckets import MINUTE, UNITS, time_buckets
+from backend.services.wazuh import wazuh_service
+from backend.utils.timeutil import to_iso
 from backend.utils.logger import get_logger
 
 router = APIRouter(prefix="/stats", tags=["stats"])
@@ -8,46 +16,34 @@ log = get_logger(__name__)
 
 
 @router.get("/overview")
-async def overview():
-    try:
-        db = get_db()
-        # Severity counts
-        pipeline_sev = [
-            {"$group": {"_id": "$severity", "count": {"$sum": 1}}}
-        ]
-        sev = {d["_id"]: d["count"] async for d in db.alerts.aggregate(pipeline_sev)}
-
-        # Total and last 24h
-        total = await db.alerts.count_documents({})
-        since = (datetime.now(timezone.utc) - timedelta(hours=24)).isoformat().replace("+00:00", "Z")
-        last24 = await db.alerts.count_documents({"createdAt": {"$gte": since}})
-
-        # Top sources
-        pipeline_src = [
-            {"$group": {"_id": "$source", "count": {"$sum": 1}}},
-            {"$sort": {"count": -1}},
-            {"$limit": 5},
-        ]
-        top_sources = [{"source": d["_id"], "count": d["count"]} async for d in db.alerts.aggregate(pipeline_src)]
+async def overview(request: Request):
+    """Answered from the rollup counters plus one indexed query for recent alerts"""
+    return await stats_cache.respond(request, _overview)
 
-        # Recent alerts
-        recent = [
-            {"id": str(d["_id"]), "severity": d.get("severity"), "type": d.get("type"), "source": d.get("source"), "createdAt": d.get("createdAt")}
-            async for d in db.alerts.find({}, {"source": 1, "severity": 1, "type": 1, "createdAt": 1}).sort("createdAt", -1).limit(8)
-        ]
 
-        # Incident status counts
-        pipeline_inc = [
-            {"$group": {"_id": "$status", "count": {"$sum": 1}}}
-        ]
-        incidents = {d["_id"]: d["count"] async for d in db.incidents.aggregate(pipeline_inc)}
+async def _overview():
+    try:
+        db = get_db()
+        since = datetime.now(timezone.utc) - timedelta(hours=24)
+        total, last24, sev, top_sources, incidents, recent = await asyncio.gather(
+            rollups.total("alerts"),
+            rollups.alerts_since(since),
+            rollups.counts("alerts", "severity"),
+            rollups.top("alerts", "source", 5),
+            rollups.counts("incidents", "status"),
+            db.alerts.find({}, {"source": 1, "severity": 1, "type": 1, "createdAt": 1})
+            .sort("createdAt", -1).limit(8).to_list(length=8),
+        )
 
         return {
             "totalAlerts": total,
             "last24hAlerts": last24,
             "severity": sev,
-            "topSources": top_sources,
-            "recentAlerts": recent,
+            "topSources": [{"source": source, "count": count} for source, count in top_sources],
+            "recentAlerts": [
+                {"id": str(d["_id"]), "severity": d.get("severity"), "type": d.get("type"), "source": d.get("source"), "createdAt": to_iso(d.get("createdAt"))}
+                for d in recent
+            ],
             "incidents": incidents,
         }
     except Exception as e:
@@ -55,64 +51,156 @@ async def overview():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/snapshot")
+async def snapshot(
+    request: Request,
+    days: int = Query(7, ge=1, le=3650),
+    bucket: str = "day",
+    incidents: int = Query(10, ge=0, le=100),
+):
+    """
+    Everything the dashboard renders in one round trip: the overview,
+    timeseries, MITRE, compliance, FIM, SCA, host metrics and the most recent
+    incidents, with every section computed concurrently.
+    """
+    return await stats_cache.respond(request, lambda: _snapshot(days, bucket, incidents))
+
+
+async def _snapshot(days: int, bucket: str, incident_limit: int):
+    ovr, ts, mitre, comp, fim, sca, hosts, recent = await asyncio.gather(
+        _overview(),
+        _timeseries(days, bucket, False),
+        _mitre_top(days * 24),
+        _compliance(),
+        _fim_recent(),
+        _sca_latest(),
+        monitor_metrics(),
+        _recent_incidents(incident_limit),
+    )
+    return {
+        "overview": ovr,
+        "timeseries": ts,
+        "mitre": mitre,
+        "compliance": comp,
+        "fim": fim,
+        "sca": sca,
+        "metrics": hosts,
+        "incidents": recent,
+    }
+
+
+async def _recent_incidents(limit: int):
+    if not limit:
+        return []
+    try:
+        docs = await get_db().incidents.find({}).sort([("createdAt", -1), ("_id", -1)]).limit(limit).to_list(length=limit)
+        return [IncidentOut(id=str(doc.pop("_id")), **doc) for doc in docs]
+    except Exception as e:
+        log.exception("recent incidents failed")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/cache")
+async def cache_stats():
+    """Hit/miss/coalescing counters for the stats response cache"""
+    return stats_cache.snapshot()
+
+
+@router.post("/rollups/reconcile")
+async def reconcile_rollups(hours: int | None = Query(None, ge=0, le=24 * 3650)):
+    """
+    Correct the rollup counters and time buckets from the source collections
+    now, over the last `hours` of alerts (default ROLLUP_RECONCILE_HOURS, 0 = all)
+    """
+    try:
+        corrected = await rollups.reconcile(hours)
+        return {"corrected": corrected, "reconciledAt": rollups.last_reconciled}
+    except Exception as e:
+        log.exception("rollup reconciliation failed")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/timeseries")
-async def timeseries(days: int = 7, bucket: str = "day"):
+async def timeseries(request: Request, days: int = Query(7, ge=1, le=3650), bucket: str = "day", sources: bool = False):
+    """
+    Alert counts per minute/hour/day (with a severity breakdown, and per-source
+    counts when sources=true), read from the materialized time buckets.
+    Minute buckets only exist for the last BUCKET_MINUTE_RETENTION_HOURS.
+    """
+    return await stats_cache.respond(request, lambda: _timeseries(days, bucket, sources))
+
+
+async def _timeseries(days: int, bucket: str, sources: bool):
     try:
-        db = get_db()
-        if bucket not in {"hour", "day"}:
+        if bucket not in UNITS:
             bucket = "day"
-        start_dt = datetime.now(timezone.utc) - timedelta(days=days)
-        start_iso = start_dt.isoformat().replace("+00:00", "Z")
+        now = datetime.now(timezone.utc)
+        start_dt = now - timedelta(days=days)
+        if bucket == MINUTE:
+            start_dt = max(start_dt, now - time_buckets.minute_retention)
 
-        # Parse createdAt string to date and truncate
-        unit = "hour" if bucket == "hour" else "day"
-        pipeline = [
-            {"$match": {"createdAt": {"$gte": start_iso}}},
+        points = [
             {
-                "$addFields": {
-                    "createdAtDate": {
-                        "$dateFromString": {"dateString": "$createdAt"}
-                    }
-                }
-            },
-            {
-                "$group": {
-                    "_id": {
-                        "$dateTrunc": {
-                            "date": "$createdAtDate",
-                            "unit": unit,
-                            "binSize": 1,
-                        }
-                    },
-                    "count": {"$sum": 1}
-                }
-            },
-            {"$sort": {"_id": 1}}
+                "ts": to_iso(b["ts"]),
+                "count": b["count"],
+                "severity": b["severity"],
+                **({"sources": b["source"]} if sources else {}),
+            }
+            for b in await time_buckets.series(bucket, start_dt)
         ]
-        points = [{"ts": d["_id"].isoformat(), "count": d["count"]} async for d in db.alerts.aggregate(pipeline)]
         return {"start": start_dt.isoformat(), "bucket": bucket, "points": points}
     except Exception as e:
         log.exception("timeseries stats failed")
         raise HTTPException(status_code=500, detail=str(e))
 
+
 @router.get("/mitre")
-async def mitre_top():
+async def mitre_top(
+    request: Request,
+    hours: int | None = Query(None, ge=1, le=24 * 3650),
+    limit: int = Query(10, ge=1, le=100),
+):
+    """
+    Top MITRE ATT&CK tactics and techniques among stored alerts, all time or
+    over the last `hours` (read from the rollup counters / time buckets)
+    """
+    return await stats_cache.respond(request, lambda: _mitre_top(hours, limit))
+
+
+async def _mitre_top(hours: int | None = None, limit: int = 10):
     try:
-        # Stub data; in real system map alerts to MITRE tactics via classification logic
+        if hours is None:
+            tactics, techniques = await asyncio.gather(
+                rollups.top("alerts", "tactic", limit),
+                rollups.top("alerts", "technique", limit),
+            )
+        else:
+            since = datetime.now(timezone.utc) - timedelta(hours=hours)
+            tactic_totals, technique_totals = await asyncio.gather(
+                time_buckets.breakdown("tactic", since),
+                time_buckets.breakdown("technique", since),
+            )
+            tactics = tactic_totals.most_common(limit)
+            techniques = technique_totals.most_common(limit)
         return {
-            "tactics": [
-                {"name": "Defense Evasion", "count": 12},
-                {"name": "Initial Access", "count": 8},
-                {"name": "Persistence", "count": 5},
-                {"name": "Privilege Escalation", "count": 3},
-            ]
+            "hours": hours,
+            "tactics": [{"name": name, "count": count} for name, count in tactics],
+            "techniques": [
+                {"id": technique, "name": wazuh_service.technique_name(technique), "count": count}
+                for technique, count in techniques
+            ],
         }
     except Exception as e:
         log.exception("mitre stats failed")
         raise HTTPException(status_code=500, detail=str(e))
 
+
 @router.get("/compliance")
-async def compliance():
+async def compliance(request: Request):
+    return await stats_cache.respond(request, _compliance)
+
+
+async def _compliance():
     try:
         # Stub compliance donut values; integrate with benchmark scanner later
         return {
@@ -128,8 +216,13 @@ async def compliance():
         log.exception("compliance stats failed")
         raise HTTPException(status_code=500, detail=str(e))
 
+
 @router.get("/fim/recent")
-async def fim_recent():
+async def fim_recent(request: Request):
+    return await stats_cache.respond(request, _fim_recent)
+
+
+async def _fim_recent():
     try:
         # Stub file integrity events
         return {
@@ -139,8 +232,13 @@ async def fim_recent():
         log.exception("fim recent failed")
         raise HTTPException(status_code=500, detail=str(e))
 
+
 @router.get("/sca/latest")
-async def sca_latest():
+async def sca_latest(request: Request):
+    return await stats_cache.respond(request, _sca_latest)
+
+
+async def _sca_latest():
     try:
         # Stub secure configuration assessment results
         return {
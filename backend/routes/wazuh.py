@@ -5,8 +5,8 @@ Provides endpoints for accessing Wazuh security data
 
 from fastapi import APIRouter, HTTPException, Query
 from typing import Optional
-from backend.services.wazuh import wazuh_service
-from backend.services.enrichment import enrichment_service
+from backend.services.wazuh import wazuh_service, BULK_PAGE_SIZE
+from backend.services.jobs import job_manager
 from backend.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -14,10 +14,10 @@ logger = get_logger(__name__)
 router = APIRouter(tags=["wazuh"], prefix="/wazuh")
 
 @router.get('/health')
-def health_check():
+async def health_check():
     """Check Wazuh service health and configuration status"""
     try:
-        health = wazuh_service.health_check()
+        health = await wazuh_service.health_check()
         if health['status'] != 'healthy':
             raise HTTPException(status_code=503, detail=health)
         return health
@@ -32,10 +32,10 @@ def health_check():
 
 
 @router.get('/agents')
-def get_agents(limit: int = Query(100, ge=1, le=1000)):
+async def get_agents(limit: int = Query(100, ge=1, le=1000)):
     """Get all Wazuh agents"""
     try:
-        agents = wazuh_service.get_agents(limit=limit)
+        agents = await wazuh_service.get_agents(limit=limit)
         
         return {
             'success': True,
@@ -51,10 +51,10 @@ def get_agents(limit: int = Query(100, ge=1, le=1000)):
 
 
 @router.get('/agents/{agent_id}')
-def get_agent_details(agent_id: str):
+async def get_agent_details(agent_id: str):
     """Get detailed information about a specific agent"""
     try:
-        agent = wazuh_service.get_agent_details(agent_id)
+        agent = await wazuh_service.get_agent_details(agent_id)
         
         if agent:
             return {
@@ -77,24 +77,33 @@ def get_agent_details(agent_id: str):
 
 
 @router.get('/alerts')
-def get_alerts(
-    limit: int = Query(100, ge=1, le=1000),
+async def get_alerts(
+    limit: int = Query(100, ge=1, le=10000),
     offset: int = Query(0, ge=0),
     severity: Optional[str] = Query(None, regex="^(low|medium|high|critical)$")
 ):
     """
     Get alerts from Wazuh
     Query params:
-        - limit: number of alerts (default: 100)
+        - limit: number of alerts (default: 100); larger limits are fetched as concurrent pages
         - offset: pagination offset (default: 0)
         - severity: filter by severity (low, medium, high, critical)
     """
     try:
-        alerts = wazuh_service.get_alerts(
-            limit=limit,
-            offset=offset,
-            severity=severity
-        )
+        if limit > BULK_PAGE_SIZE:
+            alerts = [
+                alert async for alert in wazuh_service.iter_alerts(
+                    offset=offset,
+                    max_items=limit,
+                    severity=severity
+                )
+            ]
+        else:
+            alerts = await wazuh_service.get_alerts(
+                limit=limit,
+                offset=offset,
+                severity=severity
+            )
         
         return {
             'success': True,
@@ -111,10 +120,10 @@ def get_alerts(
 
 
 @router.get('/security-events')
-def get_security_events(limit: int = Query(100, ge=1, le=1000)):
+async def get_security_events(limit: int = Query(100, ge=1, le=1000)):
     """Get recent security events"""
     try:
-        events = wazuh_service.get_security_events(limit=limit)
+        events = await wazuh_service.get_security_events(limit=limit)
         
         return {
             'success': True,
@@ -130,7 +139,7 @@ def get_security_events(limit: int = Query(100, ge=1, le=1000)):
 
 
 @router.get('/fim')
-def get_fim_events(
+async def get_fim_events(
     agent_id: Optional[str] = Query(None),
     limit: int = Query(100, ge=1, le=1000)
 ):
@@ -141,7 +150,7 @@ def get_fim_events(
         - limit: number of events (default: 100)
     """
     try:
-        events = wazuh_service.get_fim_events(agent_id=agent_id, limit=limit)
+        events = await wazuh_service.get_fim_events(agent_id=agent_id, limit=limit)
         
         return {
             'success': True,
@@ -157,14 +166,14 @@ def get_fim_events(
 
 
 @router.get('/vulnerabilities')
-def get_vulnerabilities(agent_id: Optional[str] = Query(None)):
+async def get_vulnerabilities(agent_id: Optional[str] = Query(None)):
     """
     Get vulnerability information
     Query params:
         - agent_id: specific agent (optional)
     """
     try:
-        vulns = wazuh_service.get_vulnerability_detector(agent_id=agent_id)
+        vulns = await wazuh_service.get_vulnerability_detector(agent_id=agent_id)
         
         return {
             'success': True,
@@ -180,10 +189,10 @@ def get_vulnerabilities(agent_id: Optional[str] = Query(None)):
 
 
 @router.get('/rule/{rule_id}')
-def get_rule_info(rule_id: str):
+async def get_rule_info(rule_id: str):
     """Get information about a specific Wazuh rule"""
     try:
-        rule = wazuh_service.get_rule_info(rule_id)
+        rule = await wazuh_service.get_rule_info(rule_id)
         
         if rule:
             return {
@@ -206,10 +215,10 @@ def get_rule_info(rule_id: str):
 
 
 @router.get('/mitre')
-def get_mitre_attack():
+async def get_mitre_attack():
     """Get MITRE ATT&CK framework mappings"""
     try:
-        mitre_data = wazuh_service.get_mitre_attack_info()
+        mitre_data = await wazuh_service.get_mitre_attack_info()
         
         return {
             'success': True,
@@ -224,31 +233,95 @@ def get_mitre_attack():
         })
 
 
-@router.post('/enrich-alerts')
-async def enrich_alerts(limit: int = Query(100, ge=1, le=500)):
+@router.post('/enrich-alerts', status_code=202)
+async def enrich_alerts(limit: int = Query(100, ge=1, le=10000)):
     """
-    Fetch Wazuh alerts and enrich with threat intelligence
+    Queue a background job that fetches Wazuh alerts and enriches them with threat intelligence
     
-    This endpoint:
+    The job:
     1. Fetches alerts from Wazuh
     2. Extracts IOCs (IPs, domains, hashes)
     3. Queries threat intel APIs (VirusTotal, AbuseIPDB, OTX)
     4. Calculates threat scores
     5. Stores enriched alerts in MongoDB
+    
+    Poll /wazuh/jobs/{job_id} for progress and /wazuh/jobs/{job_id}/results for output.
+    """
+    try:
+        job = await job_manager.submit(limit=limit)
+        
+        return {
+            'success': True,
+            'job_id': job['id'],
+            'status': job['status']
+        }
+    except Exception as e:
+        logger.error(f"Error queuing enrichment job: {str(e)}")
+        raise HTTPException(status_code=500, detail={
+            'success': False,
+            'error': str(e)
+        })
+
+
+@router.get('/jobs/{job_id}')
+async def get_job(job_id: str):
+    """Get status and progress of an enrichment job"""
+    try:
+        job = await job_manager.get(job_id)
+        
+        if job:
+            return {
+                'success': True,
+                'data': job
+            }
+        else:
+            raise HTTPException(status_code=404, detail={
+                'success': False,
+                'error': 'Job not found'
+            })
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching job: {str(e)}")
+        raise HTTPException(status_code=500, detail={
+            'success': False,
+            'error': str(e)
+        })
+
+
+@router.get('/jobs/{job_id}/results')
+async def get_job_results(
+    job_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """
+    Get enriched alerts produced by a job
+    Query params:
+        - offset: pagination offset (default: 0)
+        - limit: page size (default: 100)
     """
     try:
-        enriched_alerts = await enrichment_service.process_wazuh_alerts(limit=limit)
+        job = await job_manager.get(job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail={
+                'success': False,
+                'error': 'Job not found'
+            })
         
-        malicious_count = sum(1 for alert in enriched_alerts if alert.get('enrichment', {}).get('is_malicious', False))
+        page = await job_manager.results(job_id, offset=offset, limit=limit)
+        malicious_count = sum(1 for alert in page['data'] if alert.get('enrichment', {}).get('is_malicious', False))
         
         return {
             'success': True,
-            'processed': len(enriched_alerts),
+            'status': job['status'],
             'malicious_detected': malicious_count,
-            'data': enriched_alerts
+            **page
         }
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error enriching alerts: {str(e)}")
+        logger.error(f"Error fetching job results: {str(e)}")
         raise HTTPException(status_code=500, detail={
             'success': False,
             'error': str(e)
@@ -1,11 +1,13 @@
 from backend.utils.config import settings
 from backend.utils.logger import get_logger
-import requests
+from backend.services.http_client import provider_get
+from backend.services.breaker import CircuitOpenError
+from backend.services.ratelimit import RateLimitExceeded
 
 log = get_logger(__name__)
 
 
-def lookup_ip(ip: str) -> dict:
+async def lookup_ip(ip: str) -> dict:
     if not settings.ABUSEIPDB_API_KEY:
         log.warning("ABUSEIPDB_API_KEY not set; returning stub response")
         return {"available": False, "message": "API key missing"}
@@ -16,7 +18,7 @@ def lookup_ip(ip: str) -> dict:
             "Key": settings.ABUSEIPDB_API_KEY,
             "Accept": "application/json",
         }
-        resp = requests.get(url, params=params, headers=headers, timeout=10)
+        resp = await provider_get("abuseipdb", url, params=params, headers=headers)
         if resp.status_code != 200:
             return {"error": resp.text, "status": resp.status_code}
         data = resp.json()
@@ -24,7 +26,9 @@ def lookup_ip(ip: str) -> dict:
             "abuseConfidenceScore": data.get("data", {}).get("abuseConfidenceScore"),
             "totalReports": data.get("data", {}).get("totalReports"),
         }
+    except (RateLimitExceeded, CircuitOpenError) as e:
+        log.warning(str(e))
+        return {"error": str(e), "status": e.status}
     except Exception as e:
         log.exception("AbuseIPDB lookup failed")
         return {"error": str(e)}
-
@@ -0,0 +1,160 @@
+"""
+Provider Circuit Breakers
+Per-provider circuit breakers and latency-driven timeouts, so a slow or dead
+threat intel API fails fast instead of stalling every lookup for the full timeout.
+"""
+
+import time
+from collections import deque
+from typing import Deque, Dict
+
+from backend.utils.config import settings
+from backend.utils.logger import get_logger
+
+log = get_logger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised when a provider's circuit is open and the call is short-circuited"""
+
+    status = 503
+
+    def __init__(self, provider: str):
+        super().__init__(f"{provider} circuit open; skipping lookup")
+        self.provider = provider
+
+
+class CircuitBreaker:
+    """Closed -> open after N consecutive failures -> half-open probes after a cool-down"""
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float, half_open_probes: int = 1):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = max(1, half_open_probes)
+        self.state = CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self.stats = {"successes": 0, "failures": 0, "short_circuited": 0, "opened": 0}
+
+    def _transition(self, state: str) -> None:
+        if state != self.state:
+            log.warning(f"{self.name} circuit {self.state} -> {state}")
+            self.state = state
+
+    def allow(self) -> bool:
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                self.stats["short_circuited"] += 1
+                return False
+            self._transition(HALF_OPEN)
+            self._opened_at = time.monotonic()
+            self._probes = 0
+        elif time.monotonic() - self._opened_at >= self.reset_timeout:
+            # Probes that never reported back (lost tasks) don't hold the slots forever
+            self._opened_at = time.monotonic()
+            self._probes = 0
+        if self._probes < self.half_open_probes:
+            self._probes += 1
+            return True
+        self.stats["short_circuited"] += 1
+        return False
+
+    def release(self) -> None:
+        """Hand back a half-open probe slot taken by allow() for a call that never went out"""
+        if self.state == HALF_OPEN and self._probes > 0:
+            self._probes -= 1
+
+    def record_success(self) -> None:
+        self.stats["successes"] += 1
+        self.failures = 0
+        self._probes = 0
+        self._transition(CLOSED)
+
+    def record_failure(self) -> None:
+        self.stats["failures"] += 1
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+            self._probes = 0
+            self.stats["opened"] += 1
+            self._transition(OPEN)
+
+    def snapshot(self) -> Dict:
+        retry_in = 0.0
+        if self.state == OPEN:
+            retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "retry_in": round(retry_in, 2),
+            **self.stats,
+        }
+
+
+class AdaptiveTimeout:
+    """Timeout derived from the p95 of recent latencies, clamped to [minimum, maximum]"""
+
+    def __init__(self, minimum: float, maximum: float, multiplier: float, window: int = 200, min_samples: int = 20):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.multiplier = multiplier
+        self.min_samples = min_samples
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def observe(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def p95(self) -> float:
+        if not self._samples:
+            return 0.0
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def current(self) -> float:
+        if len(self._samples) < self.min_samples:
+            return self.maximum
+        return min(self.maximum, max(self.minimum, self.p95() * self.multiplier))
+
+    def snapshot(self) -> Dict:
+        return {
+            "timeout": round(self.current(), 3),
+            "p95": round(self.p95(), 3),
+            "samples": len(self._samples),
+        }
+
+
+PROVIDERS = ("virustotal", "abuseipdb", "otx")
+
+breakers: Dict[str, CircuitBreaker] = {
+    name: CircuitBreaker(
+        name,
+        failure_threshold=settings.BREAKER_FAILURE_THRESHOLD,
+        reset_timeout=settings.BREAKER_RESET_TIMEOUT,
+        half_open_probes=settings.BREAKER_HALF_OPEN_PROBES,
+    )
+    for name in PROVIDERS
+}
+
+timeouts: Dict[str, AdaptiveTimeout] = {
+    name: AdaptiveTimeout(
+        minimum=settings.ADAPTIVE_TIMEOUT_MIN,
+        maximum=settings.HTTP_TIMEOUT,
+        multiplier=settings.ADAPTIVE_TIMEOUT_MULTIPLIER,
+    )
+    for name in PROVIDERS
+}
+
+
+def provider_health() -> Dict[str, Dict]:
+    return {
+        name: {**breakers[name].snapshot(), **timeouts[name].snapshot()}
+        for name in PROVIDERS
+    }
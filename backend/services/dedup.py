@@ -0,0 +1,225 @@
+"""
+Alert Deduplication
+Folds repeats of the same alert into the first stored document instead of
+inserting a new one. Alerts are keyed by a configurable fingerprint and kept
+in an in-memory index for a per-source suppression window; repeats become
+count/lastSeen increments that are applied in batches with bulk $inc updates.
+A first document accepted into the ingest spool isn't in MongoDB until the
+spool drains, so increments for documents not found yet are held back while
+the spool has a backlog.
+"""
+
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from backend.database import get_db
+from backend.services.spool import ingest_spool
+from backend.utils.config import settings
+from backend.utils.logger import get_logger
+
+log = get_logger(__name__)
+
+
+def _parse_fields(spec: str) -> List[List[str]]:
+    """"source,metadata.host|metadata.hostname" -> [["source"], ["metadata.host", "metadata.hostname"]]"""
+    return [[alt.strip() for alt in field.split("|") if alt.strip()] for field in spec.split(",") if field.strip()]
+
+
+def _parse_windows(spec: str) -> Dict[str, float]:
+    """"wazuh=300,syslog=30" -> {"wazuh": 300.0, "syslog": 30.0}"""
+    windows = {}
+    for item in spec.split(","):
+        source, sep, seconds = item.partition("=")
+        if sep and source.strip():
+            windows[source.strip()] = float(seconds)
+    return windows
+
+
+def _lookup(doc: Dict, path: str):
+    value = doc
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+class AlertDeduplicator:
+    """Fingerprint index with fixed suppression windows and batched $inc flushes"""
+
+    def __init__(self, enabled: bool, fields: str, window: float, source_windows: str,
+                 max_keys: int, flush_interval: float):
+        self.enabled = enabled
+        self.fields = _parse_fields(fields)
+        self.window = window
+        self.source_windows = _parse_windows(source_windows)
+        self.max_keys = max_keys
+        self.flush_interval = flush_interval
+        # fingerprint -> (alert _id, expires at)
+        self._index: "OrderedDict[str, tuple]" = OrderedDict()
+        # alert _id -> [count, lastSeen] not yet written
+        self._increments: Dict[ObjectId, list] = {}
+        # first documents still in flight; their increments wait for the insert
+        self._unconfirmed: Set[ObjectId] = set()
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"checked": 0, "suppressed": 0, "flushes": 0, "evictions": 0, "orphaned": 0}
+
+    def fingerprint(self, doc: Dict) -> str:
+        parts = []
+        for alternatives in self.fields:
+            value = next((v for v in (_lookup(doc, p) for p in alternatives) if v not in (None, "")), "")
+            parts.append(str(value))
+        return hashlib.sha1("\x1f".join(parts).encode()).hexdigest()
+
+    def window_for(self, source: Optional[str]) -> float:
+        return self.source_windows.get(source, self.window)
+
+    def _evict(self, now: float):
+        while self._index:
+            fp, (alert_id, expires) = next(iter(self._index.items()))
+            if expires > now and len(self._index) <= self.max_keys:
+                break
+            self._index.popitem(last=False)
+            if expires > now:
+                self.stats["evictions"] += 1
+
+    def check(self, doc: Dict) -> Optional[ObjectId]:
+        """
+        Returns the _id of the alert this one repeats, or None if it is new.
+        New alerts get their _id, fingerprint and count assigned here.
+        """
+        window = self.window_for(doc.get("source"))
+        if not self.enabled or window <= 0:
+            return None
+        self.stats["checked"] += 1
+        now = time.monotonic()
+        fp = self.fingerprint(doc)
+
+        entry = self._index.get(fp)
+        if entry is not None and entry[1] > now:
+            alert_id = entry[0]
+            pending = self._increments.setdefault(alert_id, [0, None])
+            pending[0] += 1
+            seen = doc.get("createdAt")
+            if seen is not None and (pending[1] is None or seen > pending[1]):
+                pending[1] = seen
+            self.stats["suppressed"] += 1
+            return alert_id
+
+        alert_id = doc.setdefault("_id", ObjectId())
+        doc["fingerprint"] = fp
+        doc["count"] = 1
+        doc["lastSeen"] = doc.get("createdAt")
+        # Re-insert at the end; expired entries are dropped lazily from the oldest end
+        self._index.pop(fp, None)
+        self._index[fp] = (alert_id, now + window)
+        self._unconfirmed.add(alert_id)
+        self._evict(now)
+        return None
+
+    def confirm(self, alert_ids: Iterable[ObjectId]):
+        """The first documents were written; their increments can now be flushed"""
+        self._unconfirmed.difference_update(alert_ids)
+
+    def discard(self, alert_ids: Iterable[ObjectId]):
+        """The first documents failed to insert; forget them and their repeats"""
+        ids = set(alert_ids)
+        self._unconfirmed.difference_update(ids)
+        for alert_id in ids:
+            self._increments.pop(alert_id, None)
+        for fp in [fp for fp, (alert_id, _) in self._index.items() if alert_id in ids]:
+            del self._index[fp]
+
+    def _restore(self, increments: Dict[ObjectId, list]):
+        """Put increments back so the next flush retries them"""
+        for alert_id, (count, last_seen) in increments.items():
+            pending = self._increments.setdefault(alert_id, [0, None])
+            pending[0] += count
+            if last_seen is not None and (pending[1] is None or last_seen > pending[1]):
+                pending[1] = last_seen
+
+    async def flush(self) -> int:
+        ready = {i: v for i, v in self._increments.items() if i not in self._unconfirmed}
+        if not ready:
+            return 0
+        for alert_id in ready:
+            del self._increments[alert_id]
+        alerts = get_db().alerts
+        try:
+            # Checked before the lookup: a confirmed document missing from MongoDB
+            # can then only be waiting in the spool if it had a backlog at this point
+            spooling = ingest_spool is not None and ingest_spool.has_backlog()
+            found = {d["_id"] async for d in alerts.find({"_id": {"$in": list(ready)}}, {"_id": 1})}
+        except Exception as e:
+            log.error(f"Failed to look up {len(ready)} deduplicated alerts: {e}")
+            self._restore(ready)
+            return 0
+
+        missing = {i: v for i, v in ready.items() if i not in found}
+        if missing and spooling:
+            self._restore(missing)
+        elif missing:
+            self.stats["orphaned"] += len(missing)
+            log.warning(f"Dropping dedup increments for {len(missing)} alerts that were never stored")
+        ready = {i: v for i, v in ready.items() if i in found}
+        if not ready:
+            return 0
+
+        ops = [
+            UpdateOne(
+                {"_id": alert_id},
+                {"$inc": {"count": count}, **({"$max": {"lastSeen": last_seen}} if last_seen else {})},
+            )
+            for alert_id, (count, last_seen) in ready.items()
+        ]
+        try:
+            result = await alerts.bulk_write(ops, ordered=False)
+            self.stats["flushes"] += 1
+        except Exception as e:
+            log.error(f"Failed to apply {len(ops)} dedup increments: {e}")
+            self._restore(ready)
+            return 0
+        if result.matched_count < len(ops):
+            log.warning(f"{len(ops) - result.matched_count} dedup increments matched no alert")
+        return len(ops)
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self._unconfirmed.clear()
+        await self.flush()
+
+    def snapshot(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "fingerprints": len(self._index),
+            "pending_increments": len(self._increments),
+            **self.stats,
+        }
+
+
+alert_dedup = AlertDeduplicator(
+    settings.ALERT_DEDUP_ENABLED,
+    fields=settings.ALERT_DEDUP_FIELDS,
+    window=settings.ALERT_DEDUP_WINDOW,
+    source_windows=settings.ALERT_DEDUP_SOURCE_WINDOWS,
+    max_keys=settings.ALERT_DEDUP_MAX_KEYS,
+    flush_interval=settings.ALERT_DEDUP_FLUSH_INTERVAL,
+)
@@ -3,12 +3,15 @@ Alert Enrichment Service
 Enriches Wazuh alerts with threat intelligence data from multiple sources
 """
 
+import asyncio
 import logging
 import re
-from typing import Dict, List, Optional, Set
+from typing import Awaitable, Callable, Dict, List, Optional, Set
 from backend.services.wazuh import wazuh_service
 from backend.services import virustotal, abuseipdb, otx
+from backend.services.intel_cache import reputation_cache
 from backend.database import get_db
+from backend.utils.config import settings
 
 logger = logging.getLogger(__name__)
 
@@ -16,7 +19,9 @@ logger = logging.getLogger(__name__)
 class AlertEnrichmentService:
     """Service for enriching security alerts with threat intelligence"""
     
-    def __init__(self):
+    def __init__(self, concurrency: int = settings.ENRICHMENT_CONCURRENCY):
+        # Bounds the number of provider lookups in flight across all alerts
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
         self.ip_pattern = re.compile(r'\b(?:\d{1,3}\.){3}\d{1,3}\b')
         self.hash_pattern = re.compile(r'\b[a-fA-F0-9]{32,64}\b')
         self.domain_pattern = re.compile(r'\b(?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+[a-z]{2,}\b', re.IGNORECASE)
@@ -93,6 +98,25 @@ class AlertEnrichmentService:
             return False
         return True
     
+    async def _lookup(self, provider: str, ioc_type: str, func: Callable[[str], Awaitable[Dict]], ioc: str) -> Dict:
+        """Run a provider lookup through the reputation cache, bounded by the concurrency limit"""
+        async def fetch() -> Dict:
+            async with self._semaphore:
+                return await func(ioc)
+        
+        return await reputation_cache.get_or_fetch(ioc, ioc_type, provider, fetch)
+    
+    def _record_errors(self, enrichment: Dict, **results) -> None:
+        """Keep failed provider lookups (timeouts, 429s) visible instead of dropping them"""
+        for provider, result in results.items():
+            if isinstance(result, Exception):
+                error = {'error': str(result)}
+            elif result and result.get('error'):
+                error = {'error': str(result['error'])[:200], 'status': result.get('status')}
+            else:
+                continue
+            enrichment.setdefault('errors', {})[provider] = error
+    
     async def enrich_ip(self, ip: str) -> Dict:
         """Enrich IP with threat intelligence"""
         enrichment = {
@@ -102,47 +126,49 @@ class AlertEnrichmentService:
             'sources': {}
         }
         
-        try:
-            # Check AbuseIPDB
-            abuse_data = abuseipdb.lookup_ip(ip)
-            if abuse_data and not abuse_data.get('error'):
-                enrichment['sources']['abuseipdb'] = {
-                    'confidence_score': abuse_data.get('abuseConfidenceScore', 0),
-                    'total_reports': abuse_data.get('totalReports', 0)
-                }
-                
-                score = abuse_data.get('abuseConfidenceScore', 0)
-                if score and score > 50:
-                    enrichment['malicious'] = True
-                enrichment['threat_score'] = max(enrichment['threat_score'], score or 0)
-        except Exception as e:
-            logger.error(f"AbuseIPDB check failed for {ip}: {str(e)}")
+        abuse_data, otx_data, vt_data = await asyncio.gather(
+            self._lookup('abuseipdb', 'ip', abuseipdb.lookup_ip, ip),
+            self._lookup('otx', 'ip', otx.lookup_ip, ip),
+            self._lookup('virustotal', 'ip', virustotal.lookup_ip, ip),
+            return_exceptions=True
+        )
         
-        try:
-            # Check OTX
-            otx_data = otx.lookup_ip(ip)
-            if otx_data and not otx_data.get('error'):
-                pulse_count = otx_data.get('pulseCount', 0)
-                enrichment['sources']['otx'] = {
-                    'pulse_count': pulse_count
-                }
-                
-                if pulse_count and pulse_count > 0:
-                    enrichment['malicious'] = True
-                    enrichment['threat_score'] = max(enrichment['threat_score'], 75)
-        except Exception as e:
-            logger.error(f"OTX check failed for {ip}: {str(e)}")
+        # AbuseIPDB
+        if isinstance(abuse_data, Exception):
+            logger.error(f"AbuseIPDB check failed for {ip}: {str(abuse_data)}")
+        elif abuse_data and not abuse_data.get('error'):
+            enrichment['sources']['abuseipdb'] = {
+                'confidence_score': abuse_data.get('abuseConfidenceScore', 0),
+                'total_reports': abuse_data.get('totalReports', 0)
+            }
+            
+            score = abuse_data.get('abuseConfidenceScore', 0)
+            if score and score > 50:
+                enrichment['malicious'] = True
+            enrichment['threat_score'] = max(enrichment['threat_score'], score or 0)
         
-        try:
-            # Check VirusTotal
-            vt_data = virustotal.lookup_ip(ip)
-            if vt_data and not vt_data.get('error'):
-                enrichment['sources']['virustotal'] = {
-                    'reputation': vt_data.get('reputation', 0)
-                }
-        except Exception as e:
-            logger.error(f"VirusTotal check failed for {ip}: {str(e)}")
+        # OTX
+        if isinstance(otx_data, Exception):
+            logger.error(f"OTX check failed for {ip}: {str(otx_data)}")
+        elif otx_data and not otx_data.get('error'):
+            pulse_count = otx_data.get('pulseCount', 0)
+            enrichment['sources']['otx'] = {
+                'pulse_count': pulse_count
+            }
+            
+            if pulse_count and pulse_count > 0:
+                enrichment['malicious'] = True
+                enrichment['threat_score'] = max(enrichment['threat_score'], 75)
+        
+        # VirusTotal
+        if isinstance(vt_data, Exception):
+            logger.error(f"VirusTotal check failed for {ip}: {str(vt_data)}")
+        elif vt_data and not vt_data.get('error'):
+            enrichment['sources']['virustotal'] = {
+                'reputation': vt_data.get('reputation', 0)
+            }
         
+        self._record_errors(enrichment, abuseipdb=abuse_data, otx=otx_data, virustotal=vt_data)
         return enrichment
     
     async def enrich_hash(self, file_hash: str) -> Dict:
@@ -169,53 +195,57 @@ class AlertEnrichmentService:
             'sources': {}
         }
         
-        try:
-            # Check VirusTotal
-            vt_data = virustotal.lookup_domain(domain)
-            if vt_data and not vt_data.get('error'):
-                stats = vt_data.get('last_analysis_stats', {})
-                if stats:
-                    malicious_count = stats.get('malicious', 0)
-                    total_engines = sum(stats.values()) if stats.values() else 0
-                    
-                    enrichment['sources']['virustotal'] = {
-                        'malicious': malicious_count,
-                        'suspicious': stats.get('suspicious', 0),
-                        'total_engines': total_engines,
-                        'detection_rate': f"{malicious_count}/{total_engines}" if total_engines > 0 else "0/0"
-                    }
-                    
-                    if malicious_count > 0:
-                        enrichment['malicious'] = True
-                        if total_engines > 0:
-                            detection_percentage = (malicious_count / total_engines) * 100
-                            enrichment['threat_score'] = min(100, detection_percentage)
-        except Exception as e:
-            logger.error(f"VirusTotal check failed for {domain}: {str(e)}")
+        vt_data, otx_data = await asyncio.gather(
+            self._lookup('virustotal', 'domain', virustotal.lookup_domain, domain),
+            self._lookup('otx', 'domain', otx.lookup_domain, domain),
+            return_exceptions=True
+        )
         
-        try:
-            # Check OTX
-            otx_data = otx.lookup_domain(domain)
-            if otx_data and not otx_data.get('error'):
-                pulse_count = otx_data.get('pulseCount', 0)
-                enrichment['sources']['otx'] = {
-                    'pulse_count': pulse_count
+        # VirusTotal
+        if isinstance(vt_data, Exception):
+            logger.error(f"VirusTotal check failed for {domain}: {str(vt_data)}")
+        elif vt_data and not vt_data.get('error'):
+            stats = vt_data.get('last_analysis_stats') or {}
+            if stats:
+                malicious_count = stats.get('malicious', 0)
+                total_engines = sum(stats.values()) if stats.values() else 0
+                
+                enrichment['sources']['virustotal'] = {
+                    'malicious': malicious_count,
+                    'suspicious': stats.get('suspicious', 0),
+                    'total_engines': total_engines,
+                    'detection_rate': f"{malicious_count}/{total_engines}" if total_engines > 0 else "0/0"
                 }
                 
-                if pulse_count and pulse_count > 0:
+                if malicious_count > 0:
                     enrichment['malicious'] = True
-                    enrichment['threat_score'] = max(enrichment['threat_score'], 70)
-        except Exception as e:
-            logger.error(f"OTX check failed for {domain}: {str(e)}")
+                    if total_engines > 0:
+                        detection_percentage = (malicious_count / total_engines) * 100
+                        enrichment['threat_score'] = min(100, detection_percentage)
+        
+        # OTX
+        if isinstance(otx_data, Exception):
+            logger.error(f"OTX check failed for {domain}: {str(otx_data)}")
+        elif otx_data and not otx_data.get('error'):
+            pulse_count = otx_data.get('pulseCount', 0)
+            enrichment['sources']['otx'] = {
+                'pulse_count': pulse_count
+            }
+            
+            if pulse_count and pulse_count > 0:
+                enrichment['malicious'] = True
+                enrichment['threat_score'] = max(enrichment['threat_score'], 70)
         
+        self._record_errors(enrichment, virustotal=vt_data, otx=otx_data)
         return enrichment
     
-    async def enrich_alert(self, alert: Dict) -> Dict:
+    async def enrich_alert(self, alert: Dict, job_id: Optional[str] = None) -> Dict:
         """
         Enrich a Wazuh alert with threat intelligence
         
         Args:
             alert: Wazuh alert data
+            job_id: Enrichment job that produced this alert (optional)
             
         Returns:
             Enriched alert with threat intelligence
@@ -231,9 +261,18 @@ class AlertEnrichmentService:
         # Extract IOCs
         iocs = self.extract_iocs(alert)
         
+        # Fan out every IOC lookup at once; provider calls are bounded by the semaphore
+        ips = list(iocs['ips'])
+        hashes = list(iocs['hashes'])
+        domains = list(iocs['domains'])
+        ip_results, hash_results, domain_results = await asyncio.gather(
+            asyncio.gather(*(self.enrich_ip(ip) for ip in ips)),
+            asyncio.gather(*(self.enrich_hash(h) for h in hashes)),
+            asyncio.gather(*(self.enrich_domain(d) for d in domains))
+        )
+        
         # Enrich IPs
-        for ip in iocs['ips']:
-            ip_enrichment = await self.enrich_ip(ip)
+        for ip, ip_enrichment in zip(ips, ip_results):
             enriched_alert['enrichment']['iocs'][ip] = ip_enrichment
             
             if ip_enrichment['malicious']:
@@ -247,8 +286,7 @@ class AlertEnrichmentService:
                 )
         
         # Enrich hashes
-        for file_hash in iocs['hashes']:
-            hash_enrichment = await self.enrich_hash(file_hash)
+        for file_hash, hash_enrichment in zip(hashes, hash_results):
             enriched_alert['enrichment']['iocs'][file_hash] = hash_enrichment
             
             if hash_enrichment['malicious']:
@@ -262,8 +300,7 @@ class AlertEnrichmentService:
                 )
         
         # Enrich domains
-        for domain in iocs['domains']:
-            domain_enrichment = await self.enrich_domain(domain)
+        for domain, domain_enrichment in zip(domains, domain_results):
             enriched_alert['enrichment']['iocs'][domain] = domain_enrichment
             
             if domain_enrichment['malicious']:
@@ -276,6 +313,13 @@ class AlertEnrichmentService:
                     f"Block malicious domain: {domain}"
                 )
         
+        # Flag alerts where a provider lookup failed so they can be re-enriched later
+        if any('errors' in ioc for ioc in enriched_alert['enrichment']['iocs'].values()):
+            enriched_alert['enrichment']['incomplete'] = True
+        
+        if job_id:
+            enriched_alert['jobId'] = job_id
+        
         # Store enriched alert in MongoDB
         try:
             db = get_db()
@@ -297,12 +341,11 @@ class AlertEnrichmentService:
         """
         try:
             # Fetch alerts from Wazuh
-            alerts = wazuh_service.get_alerts(limit=limit)
+            alerts = await wazuh_service.get_alerts(limit=limit)
             
-            enriched_alerts = []
-            for alert in alerts:
-                enriched = await self.enrich_alert(alert)
-                enriched_alerts.append(enriched)
+            enriched_alerts = list(await asyncio.gather(
+                *(self.enrich_alert(alert) for alert in alerts)
+            ))
             
             logger.info(f"Processed and enriched {len(enriched_alerts)} alerts")
             return enriched_alerts
@@ -0,0 +1,110 @@
+"""
+Shared HTTP Client
+One pooled async client for all outbound threat-intel and notification calls,
+so lookups reuse keep-alive connections instead of re-handshaking every time.
+"""
+
+import importlib.util
+import time
+from typing import Optional
+
+import httpx
+
+from backend.services.breaker import CircuitOpenError, breakers, timeouts
+from backend.services.ratelimit import RateLimitExceeded, limiters
+from backend.utils.config import settings
+from backend.utils.logger import get_logger
+
+log = get_logger(__name__)
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _http2_enabled() -> bool:
+    if not settings.HTTP2_ENABLED:
+        return False
+    if importlib.util.find_spec("h2") is None:
+        log.warning("HTTP2_ENABLED is set but the 'h2' package is missing; falling back to HTTP/1.1")
+        return False
+    return True
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        log.info("Creating shared HTTP client...")
+        _client = httpx.AsyncClient(
+            http2=_http2_enabled(),
+            timeout=httpx.Timeout(settings.HTTP_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+            ),
+        )
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _retry_after(resp: httpx.Response, default: float = 60.0) -> float:
+    try:
+        return float(resp.headers.get("Retry-After", default))
+    except ValueError:
+        return default
+
+
+async def provider_get(provider: str, url: str, **kwargs) -> httpx.Response:
+    """GET against a threat intel provider through its circuit breaker, rate limiter and adaptive timeout"""
+    breaker = breakers.get(provider)
+    if breaker is not None and not breaker.allow():
+        raise CircuitOpenError(provider)
+
+    # Only spend provider quota on calls the breaker has let through
+    limiter = limiters.get(provider)
+    if limiter is not None:
+        acquired = False
+        try:
+            acquired = await limiter.acquire(timeout=settings.INTEL_RATE_LIMIT_WAIT)
+        finally:
+            if not acquired and breaker is not None:
+                breaker.release()
+        if not acquired:
+            raise RateLimitExceeded(provider)
+
+    latency = timeouts.get(provider)
+    timeout = latency.current() if latency is not None else settings.HTTP_TIMEOUT
+    start = time.monotonic()
+    try:
+        resp = await get_http_client().get(url, timeout=timeout, **kwargs)
+    except httpx.TimeoutException:
+        if latency is not None:
+            latency.observe(timeout)
+        if breaker is not None:
+            breaker.record_failure()
+        raise
+    except httpx.HTTPError:
+        if breaker is not None:
+            breaker.record_failure()
+        raise
+    except BaseException:
+        # Cancelled or failed before reaching the provider: no verdict, free the probe slot
+        if breaker is not None:
+            breaker.release()
+        raise
+
+    if latency is not None:
+        latency.observe(time.monotonic() - start)
+    if breaker is not None:
+        if resp.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+    if resp.status_code == 429 and limiter is not None:
+        limiter.penalize(_retry_after(resp))
+    return resp
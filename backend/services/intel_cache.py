@@ -0,0 +1,170 @@
+"""
+Threat Intel Reputation Cache
+Two-tier cache for provider lookups: a bounded in-process LRU in front of the
+persistent `threat_intel` collection, keyed by (ioc, type, provider).
+"""
+
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from backend.database import get_db
+from backend.utils.config import settings
+from backend.utils.logger import get_logger
+from backend.utils.singleflight import SingleFlight
+
+log = get_logger(__name__)
+
+CacheKey = Tuple[str, str, str]
+
+
+def _is_cacheable(result: Optional[Dict]) -> bool:
+    """Only successful provider answers are cached; errors and stubs are retried"""
+    if not result:
+        return False
+    return not result.get("error") and result.get("available", True) is not False
+
+
+class ReputationCache:
+    """LRU + MongoDB cache for threat intel provider results"""
+
+    def __init__(self, max_entries: int, ttls: Dict[str, int], default_ttl: int):
+        self.max_entries = max(1, max_entries)
+        self.ttls = ttls
+        self.default_ttl = default_ttl
+        # key -> (monotonic expiry, result)
+        self._entries: "OrderedDict[CacheKey, Tuple[float, Dict]]" = OrderedDict()
+        self._inflight = SingleFlight()
+        self.stats = {"memory_hits": 0, "db_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    def ttl_for(self, provider: str) -> int:
+        return self.ttls.get(provider, self.default_ttl)
+
+    def _remember(self, key: CacheKey, result: Dict, ttl: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def _memory_get(self, key: CacheKey) -> Optional[Dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, result = entry
+        if expires <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return result
+
+    async def get(self, ioc: str, ioc_type: str, provider: str) -> Optional[Dict]:
+        key = (ioc, ioc_type, provider)
+        result = self._memory_get(key)
+        if result is not None:
+            self.stats["memory_hits"] += 1
+            return result
+
+        try:
+            now = datetime.now(timezone.utc)
+            doc = await get_db().threat_intel.find_one(
+                {"ioc": ioc, "type": ioc_type, "provider": provider, "expiresAt": {"$gt": now}}
+            )
+        except Exception as e:
+            log.error(f"threat_intel cache read failed for {ioc}: {e}")
+            doc = None
+
+        if doc is None:
+            self.stats["misses"] += 1
+            return None
+
+        self.stats["db_hits"] += 1
+        expires_at = doc["expiresAt"]
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        remaining = (expires_at - now).total_seconds()
+        self._remember(key, doc["result"], min(remaining, self.ttl_for(provider)))
+        return doc["result"]
+
+    async def set(self, ioc: str, ioc_type: str, provider: str, result: Dict) -> None:
+        ttl = self.ttl_for(provider)
+        self._remember((ioc, ioc_type, provider), result, ttl)
+        self.stats["stores"] += 1
+        now = datetime.now(timezone.utc)
+        try:
+            await get_db().threat_intel.update_one(
+                {"ioc": ioc, "type": ioc_type, "provider": provider},
+                {"$set": {"result": result, "timestamp": now, "expiresAt": now + timedelta(seconds=ttl)}},
+                upsert=True,
+            )
+        except Exception as e:
+            log.error(f"threat_intel cache write failed for {ioc}: {e}")
+
+    async def get_or_fetch(
+        self,
+        ioc: str,
+        ioc_type: str,
+        provider: str,
+        fetch: Callable[[], Awaitable[Dict]],
+    ) -> Dict:
+        cached = await self.get(ioc, ioc_type, provider)
+        if cached is not None:
+            return cached
+
+        async def fetch_and_store() -> Dict:
+            result = await fetch()
+            if _is_cacheable(result):
+                await self.set(ioc, ioc_type, provider, result)
+            return result
+
+        # Concurrent misses for the same key share one provider request
+        return await self._inflight.do((ioc, ioc_type, provider), fetch_and_store)
+
+    async def invalidate(
+        self,
+        ioc: Optional[str] = None,
+        ioc_type: Optional[str] = None,
+        provider: Optional[str] = None,
+    ) -> Dict[str, int]:
+        """Drop matching entries from both tiers; no filters clears everything"""
+        wanted = (ioc, ioc_type, provider)
+        stale = [
+            key for key in self._entries
+            if all(w is None or w == k for w, k in zip(wanted, key))
+        ]
+        for key in stale:
+            del self._entries[key]
+
+        query = {
+            field: value
+            for field, value in (("ioc", ioc), ("type", ioc_type), ("provider", provider))
+            if value is not None
+        }
+        res = await get_db().threat_intel.delete_many(query)
+        return {"memory": len(stale), "database": res.deleted_count}
+
+    def snapshot(self) -> Dict:
+        lookups = self.stats["memory_hits"] + self.stats["db_hits"] + self.stats["misses"]
+        hits = self.stats["memory_hits"] + self.stats["db_hits"]
+        return {
+            **self.stats,
+            "coalesced": self._inflight.coalesced,
+            "in_flight": len(self._inflight),
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "ttls": {**self.ttls, "default": self.default_ttl},
+        }
+
+
+# Singleton instance
+reputation_cache = ReputationCache(
+    max_entries=settings.INTEL_CACHE_MAX_ENTRIES,
+    ttls={
+        "virustotal": settings.INTEL_CACHE_TTL_VIRUSTOTAL,
+        "abuseipdb": settings.INTEL_CACHE_TTL_ABUSEIPDB,
+        "otx": settings.INTEL_CACHE_TTL_OTX,
+    },
+    default_ttl=settings.INTEL_CACHE_TTL_DEFAULT,
+)
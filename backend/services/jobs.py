@@ -0,0 +1,251 @@
+"""
+Enrichment Job Service
+Runs Wazuh alert enrichment as background jobs on a bounded worker pool.
+Jobs are persisted in MongoDB so queued or interrupted work resumes after a restart.
+A running job is leased to the process running it (`owner`, `leaseUntil`) and
+the lease is renewed by a heartbeat; only jobs whose lease has expired are
+requeued, so several API workers can share the collection without running a
+job twice.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from backend.database import get_db
+from backend.services.enrichment import enrichment_service
+from backend.services.wazuh import wazuh_service
+from backend.utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class LeaseLost(Exception):
+    """Another worker took over the job after our lease expired"""
+
+
+def _job_out(doc: Dict) -> Dict:
+    doc = dict(doc)
+    doc['id'] = doc.pop('_id')
+    return doc
+
+
+class EnrichmentJobManager:
+    """Queue + asyncio worker pool for enrichment jobs"""
+    
+    def __init__(
+        self,
+        workers: int = settings.ENRICHMENT_JOB_WORKERS,
+        chunk_size: int = settings.ENRICHMENT_JOB_CHUNK,
+        lease: float = settings.ENRICHMENT_JOB_LEASE,
+    ):
+        self.workers = max(1, workers)
+        self.chunk_size = max(1, chunk_size)
+        self.lease = max(1.0, lease)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._lost: set = set()
+    
+    def _lease_until(self) -> datetime:
+        return _utcnow() + timedelta(seconds=self.lease)
+    
+    async def start(self):
+        """Start workers and re-queue jobs left unfinished by a previous process"""
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        # Resume in the background so a slow database doesn't hold up app startup
+        self._tasks.append(asyncio.create_task(self._resume()))
+        logger.info(f"Enrichment job workers started: {self.workers}")
+    
+    async def _reclaim_expired(self, enqueue: bool) -> int:
+        """Requeue running jobs whose owner stopped renewing the lease"""
+        db = get_db()
+        expired = {'status': RUNNING, '$or': [
+            {'leaseUntil': {'$lt': _utcnow()}},
+            {'leaseUntil': {'$exists': False}},
+        ]}
+        reclaimed = 0
+        while True:
+            job = await db.jobs.find_one_and_update(
+                expired, {'$set': {'status': QUEUED, 'owner': None, 'leaseUntil': None}}
+            )
+            if not job:
+                return reclaimed
+            if enqueue:
+                self._queue.put_nowait(job['_id'])
+            reclaimed += 1
+    
+    async def _resume(self):
+        db = get_db()
+        try:
+            await self._reclaim_expired(enqueue=False)
+            resumed = 0
+            async for job in db.jobs.find({'status': QUEUED}, {'_id': 1}).sort('createdAt', 1):
+                self._queue.put_nowait(job['_id'])
+                resumed += 1
+            if resumed:
+                logger.info(f"Resumed {resumed} unfinished enrichment jobs")
+        except Exception as e:
+            logger.error(f"Failed to resume enrichment jobs: {str(e)}")
+        
+        # Pick up jobs from workers that die while this one keeps running
+        while True:
+            await asyncio.sleep(self.lease)
+            try:
+                reclaimed = await self._reclaim_expired(enqueue=True)
+                if reclaimed:
+                    logger.info(f"Requeued {reclaimed} enrichment jobs with expired leases")
+            except Exception as e:
+                logger.error(f"Failed to reclaim enrichment jobs: {str(e)}")
+    
+    async def stop(self):
+        """Cancel workers; running jobs are requeued by any worker once their lease expires"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+    
+    async def submit(self, limit: int) -> Dict:
+        """Persist a new job and queue it for the workers"""
+        job = {
+            '_id': uuid.uuid4().hex,
+            'type': 'wazuh_enrichment',
+            'status': QUEUED,
+            'params': {'limit': limit},
+            'progress': {'total': 0, 'processed': 0, 'malicious': 0},
+            'error': None,
+            'createdAt': _utcnow(),
+            'startedAt': None,
+            'finishedAt': None,
+        }
+        await get_db().jobs.insert_one(job)
+        if self._queue is None:
+            # Workers not running (e.g. lifespan disabled); start lazily
+            await self.start()
+        self._queue.put_nowait(job['_id'])
+        return _job_out(job)
+    
+    async def get(self, job_id: str) -> Optional[Dict]:
+        doc = await get_db().jobs.find_one({'_id': job_id})
+        return _job_out(doc) if doc else None
+    
+    async def results(self, job_id: str, offset: int = 0, limit: int = 100) -> Dict:
+        """Page through the enriched alerts produced by a job"""
+        db = get_db()
+        query = {'jobId': job_id}
+        total = await db.enriched_alerts.count_documents(query)
+        cursor = db.enriched_alerts.find(query).sort('_id', 1).skip(offset).limit(limit)
+        items = []
+        async for doc in cursor:
+            doc['_id'] = str(doc['_id'])
+            items.append(doc)
+        return {'data': items, 'total': total, 'offset': offset, 'limit': limit}
+    
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except LeaseLost:
+                logger.warning(f"Enrichment job {job_id} lease lost; leaving it to its new owner")
+            except Exception as e:
+                logger.error(f"Enrichment job {job_id} failed: {str(e)}")
+                await get_db().jobs.update_one(
+                    {'_id': job_id, 'owner': self.owner},
+                    {'$set': {'status': FAILED, 'error': str(e), 'finishedAt': _utcnow()}}
+                )
+            finally:
+                self._lost.discard(job_id)
+                self._queue.task_done()
+    
+    async def _heartbeat(self, job_id: str):
+        """Renew the lease while the job runs; flag it if another worker took over"""
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            try:
+                res = await get_db().jobs.update_one(
+                    {'_id': job_id, 'status': RUNNING, 'owner': self.owner},
+                    {'$set': {'leaseUntil': self._lease_until()}}
+                )
+            except Exception as e:
+                logger.warning(f"Lease renewal for job {job_id} failed: {str(e)}")
+                continue
+            if res.matched_count == 0:
+                self._lost.add(job_id)
+                return
+    
+    async def _run(self, job_id: str):
+        db = get_db()
+        job = await db.jobs.find_one_and_update(
+            {'_id': job_id, 'status': QUEUED},
+            {'$set': {'status': RUNNING, 'owner': self.owner, 'leaseUntil': self._lease_until(),
+                      'startedAt': _utcnow(), 'progress.processed': 0, 'progress.malicious': 0}},
+        )
+        if not job:
+            # Already claimed by another worker or cancelled
+            return
+        
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        try:
+            await self._execute(job_id, job)
+        finally:
+            heartbeat.cancel()
+    
+    async def _execute(self, job_id: str, job: Dict):
+        db = get_db()
+        # Drop partial output from an interrupted earlier attempt
+        await db.enriched_alerts.delete_many({'jobId': job_id})
+        
+        limit = job.get('params', {}).get('limit', 100)
+        total = min(limit, await wazuh_service.count_alerts())
+        await db.jobs.update_one({'_id': job_id}, {'$set': {'progress.total': total}})
+        
+        # Stream pages from Wazuh and enrich chunk by chunk instead of loading everything first
+        chunk: List[Dict] = []
+        async for alert in wazuh_service.iter_alerts(max_items=limit):
+            chunk.append(alert)
+            if len(chunk) >= self.chunk_size:
+                await self._enrich_chunk(job_id, chunk)
+                chunk = []
+        if chunk:
+            await self._enrich_chunk(job_id, chunk)
+        
+        res = await db.jobs.update_one(
+            {'_id': job_id, 'owner': self.owner},
+            {'$set': {'status': COMPLETED, 'finishedAt': _utcnow(), 'leaseUntil': None}}
+        )
+        if res.matched_count == 0:
+            raise LeaseLost(job_id)
+        logger.info(f"Enrichment job {job_id} completed: {total} alerts")
+    
+    async def _enrich_chunk(self, job_id: str, chunk: List[Dict]):
+        if job_id in self._lost:
+            raise LeaseLost(job_id)
+        enriched = await asyncio.gather(
+            *(enrichment_service.enrich_alert(alert, job_id=job_id) for alert in chunk)
+        )
+        malicious = sum(1 for a in enriched if a['enrichment']['is_malicious'])
+        await get_db().jobs.update_one(
+            {'_id': job_id},
+            {'$inc': {'progress.processed': len(chunk), 'progress.malicious': malicious}}
+        )
+
+
+# Singleton instance
+job_manager = EnrichmentJobManager()
@@ -0,0 +1,93 @@
+"""
+Log Search
+Token-index backed search over the `logs` collection, plus a backfill for
+documents stored before messages were tokenized:
+    python -m backend.services.log_search --backfill
+"""
+
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from backend.database import get_db
+from backend.utils.pagination import fetch_page
+from backend.utils.search import parse_query, score, tokenize
+
+logger = logging.getLogger(__name__)
+
+RANK_CANDIDATES = 1000
+RESULT_PROJECTION = {"tokens": 0}
+
+
+def index_log(doc: Dict) -> Dict:
+    """Attach search tokens to a log document before it is stored"""
+    doc["tokens"] = tokenize(doc.get("message", ""))
+    return doc
+
+
+async def search_logs(
+    q: Optional[str],
+    ip: Optional[str],
+    log_type: Optional[str],
+    limit: int,
+    cursor: Optional[str] = None,
+    rank: bool = False,
+) -> Tuple[List[Dict], Optional[str]]:
+    """Returns (docs, next_cursor). Ranked results are a single page."""
+    query: Dict = {}
+    terms: List[str] = []
+    phrases: List[str] = []
+    if q:
+        text_filter, terms, phrases = parse_query(q)
+        if text_filter is None:
+            return [], None
+        query.update(text_filter)
+    if ip:
+        query["ip"] = ip
+    if log_type:
+        query["type"] = log_type
+    
+    db = get_db()
+    if not (rank and terms):
+        return await fetch_page(db.logs, query, "ts", limit, cursor, RESULT_PROJECTION)
+    
+    # Rank the newest candidates by relevance, recency breaking ties
+    candidates = await (
+        db.logs.find(query, RESULT_PROJECTION)
+        .sort([("ts", -1), ("_id", -1)])
+        .limit(RANK_CANDIDATES)
+        .to_list(length=RANK_CANDIDATES)
+    )
+    for doc in candidates:
+        doc["score"] = score(doc.get("message", ""), terms, phrases)
+    candidates.sort(key=lambda d: d["score"], reverse=True)
+    return candidates[:limit], None
+
+
+async def backfill_tokens(batch_size: int = 1000) -> int:
+    """Tokenize logs stored before search tokens existed"""
+    db = get_db()
+    updated = 0
+    while True:
+        docs = await db.logs.find(
+            {"tokens": {"$exists": False}}, {"message": 1}
+        ).limit(batch_size).to_list(length=batch_size)
+        if not docs:
+            return updated
+        await db.logs.bulk_write(
+            [UpdateOne({"_id": d["_id"]}, {"$set": {"tokens": tokenize(d.get("message", ""))}}) for d in docs],
+            ordered=False
+        )
+        updated += len(docs)
+        logger.info(f"Tokenized {updated} logs")
+
+
+if __name__ == '__main__':
+    import sys
+    logging.basicConfig(level=logging.INFO)
+    if "--backfill" in sys.argv:
+        asyncio.run(backfill_tokens())
+    else:
+        print("usage: python -m backend.services.log_search --backfill")
@@ -0,0 +1,131 @@
+"""
+Provider Rate Limiting
+Token-bucket limiters for threat intel providers. Callers queue in FIFO order
+and give up early when the expected wait would overrun their deadline.
+"""
+
+import asyncio
+import time
+from typing import Dict, List, Optional
+
+from backend.utils.config import settings
+from backend.utils.logger import get_logger
+
+log = get_logger(__name__)
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a provider token cannot be obtained before the caller's deadline"""
+
+    status = 429
+
+    def __init__(self, provider: str):
+        super().__init__(f"{provider} rate limit reached")
+        self.provider = provider
+
+
+class TokenBucket:
+    """Continuous-refill token bucket; `rate` is tokens per second"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, needed: float = 1.0) -> float:
+        missing = needed - self.tokens
+        return 0.0 if missing <= 0 else missing / self.rate
+
+
+class RateLimiter:
+    """All-of limiter over several buckets (e.g. per-minute burst + daily quota)"""
+
+    def __init__(self, name: str, buckets: List[TokenBucket]):
+        self.name = name
+        self.buckets = buckets
+        self._lock = asyncio.Lock()
+        self._waiters = 0
+        self._blocked_until = 0.0
+        self.stats = {"granted": 0, "rejected": 0, "throttled": 0}
+
+    def _wait_for(self, now: float, position: int = 0) -> float:
+        wait = max(0.0, self._blocked_until - now)
+        for bucket in self.buckets:
+            bucket.refill(now)
+            wait = max(wait, bucket.wait_time(position + 1))
+        return wait
+
+    async def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Take one token, waiting at most `timeout` seconds; returns False if that isn't enough"""
+        start = time.monotonic()
+        deadline = None if timeout is None else start + timeout
+
+        # Fail fast when everyone already queued would push us past the deadline
+        if deadline is not None and self._wait_for(start, self._waiters) > timeout:
+            self.stats["rejected"] += 1
+            return False
+
+        self._waiters += 1
+        try:
+            try:
+                if deadline is None:
+                    await self._lock.acquire()
+                else:
+                    await asyncio.wait_for(self._lock.acquire(), max(0.0, deadline - time.monotonic()))
+            except asyncio.TimeoutError:
+                self.stats["rejected"] += 1
+                return False
+
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = self._wait_for(now)
+                    if wait <= 0:
+                        for bucket in self.buckets:
+                            bucket.tokens -= 1
+                        self.stats["granted"] += 1
+                        return True
+                    if deadline is not None and now + wait > deadline:
+                        self.stats["rejected"] += 1
+                        return False
+                    await asyncio.sleep(wait)
+            finally:
+                self._lock.release()
+        finally:
+            self._waiters -= 1
+
+    def penalize(self, retry_after: float) -> None:
+        """Upstream answered 429: hold every caller back for `retry_after` seconds"""
+        self.stats["throttled"] += 1
+        self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+        log.warning(f"{self.name} returned 429; pausing lookups for {retry_after:.0f}s")
+
+    def snapshot(self) -> Dict:
+        now = time.monotonic()
+        for bucket in self.buckets:
+            bucket.refill(now)
+        return {
+            **self.stats,
+            "queued": self._waiters,
+            "tokens": [round(b.tokens, 2) for b in self.buckets],
+            "blocked_for": round(max(0.0, self._blocked_until - now), 2),
+        }
+
+
+def _build_limiter(name: str, per_minute: int, daily_quota: int) -> RateLimiter:
+    buckets = [TokenBucket(rate=per_minute / 60.0, capacity=per_minute)]
+    if daily_quota > 0:
+        buckets.append(TokenBucket(rate=daily_quota / 86400.0, capacity=daily_quota))
+    return RateLimiter(name, buckets)
+
+
+limiters: Dict[str, RateLimiter] = {
+    "virustotal": _build_limiter("virustotal", settings.VIRUSTOTAL_RATE_PER_MIN, settings.VIRUSTOTAL_DAILY_QUOTA),
+    "abuseipdb": _build_limiter("abuseipdb", settings.ABUSEIPDB_RATE_PER_MIN, settings.ABUSEIPDB_DAILY_QUOTA),
+    "otx": _build_limiter("otx", settings.OTX_RATE_PER_MIN, settings.OTX_DAILY_QUOTA),
+}
@@ -0,0 +1,236 @@
+"""
+Rollup Counters
+Pre-aggregated counts behind the dashboard, kept in the `rollups` collection
+as one small document per (metric, dimension, value), e.g.
+    {_id: "alerts|severity|high", metric: "alerts", dim: "severity", value: "high", count: 42}
+    {_id: "alerts|technique|T1110", metric: "alerts", dim: "technique", value: "T1110", count: 7}
+Counters are incremented as alerts/incidents are stored or change status
+(alerts also feed the time buckets in time_buckets.py), and a periodic
+reconciliation fixes any drift (crashes between write and increment, manual
+edits, ...) by $inc-ing the difference, never by overwriting a counter:
+alerts are compared over a recent, settled window of hour buckets, and
+incidents from a snapshot taken under the same lock their writes hold.
+MITRE counters of alerts that need the Wazuh rule index to be mapped wait
+for it; one full pass is rerun once the index has loaded.
+"""
+
+import asyncio
+import logging
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pymongo import DESCENDING, UpdateOne
+
+from backend.database import get_db
+from backend.services.stats_cache import stats_cache
+from backend.services.time_buckets import HOUR, alert_mitre, decode_key, mitre_ready, time_buckets, truncate
+from backend.utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+# sync_state document recording which full rebuilds have completed
+STATE_ID = 'rollups'
+
+ALERT_DIMENSIONS = ("severity", "source", "status")
+
+Key = Tuple[str, str, str]
+
+
+def _value(value) -> str:
+    return "unknown" if value is None else str(value)
+
+
+def _counter_id(key: Key) -> str:
+    return "|".join(key)
+
+
+class RollupStore:
+    """Incremental counters plus the reconciliation loop that keeps them honest"""
+    
+    def __init__(
+        self,
+        reconcile_interval: float = settings.ROLLUP_RECONCILE_INTERVAL,
+        reconcile_hours: int = settings.ROLLUP_RECONCILE_HOURS,
+        reconcile_settle: float = settings.ROLLUP_RECONCILE_SETTLE,
+    ):
+        self.reconcile_interval = reconcile_interval
+        self.reconcile_hours = reconcile_hours
+        self.reconcile_settle = timedelta(seconds=reconcile_settle)
+        self.last_reconciled: Optional[str] = None
+        self._locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self._task: Optional[asyncio.Task] = None
+    
+    def lock(self, metric: str) -> asyncio.Lock:
+        """
+        Held around a source write plus its increment so reconciliation can
+        take a consistent snapshot of both. Alert inserts don't need it (their
+        window has settled by the time it is reconciled), alert status
+        changes do since they can touch any alert.
+        """
+        return self._locks[metric]
+    
+    # ---- incremental updates ----
+    
+    async def apply(self, increments: Dict[Key, int]):
+        ops = [
+            UpdateOne(
+                {'_id': _counter_id(key)},
+                {'$inc': {'count': n}, '$setOnInsert': {'metric': key[0], 'dim': key[1], 'value': key[2]}},
+                upsert=True
+            )
+            for key, n in increments.items() if n
+        ]
+        if ops:
+            await get_db().rollups.bulk_write(ops, ordered=False)
+            stats_cache.bump()
+    
+    async def record_alerts(self, docs: Iterable[Dict]):
+        """Count newly stored alerts, including their time buckets"""
+        docs = list(docs)
+        increments: Counter = Counter()
+        for doc in docs:
+            increments[('alerts', 'total', 'all')] += 1
+            for dim in ALERT_DIMENSIONS:
+                increments[('alerts', dim, _value(doc.get(dim)))] += 1
+            techniques, tactics = alert_mitre(doc)
+            for technique in techniques:
+                increments[('alerts', 'technique', technique)] += 1
+            for tactic in tactics:
+                increments[('alerts', 'tactic', tactic)] += 1
+        await asyncio.gather(self.apply(increments), time_buckets.record(docs))
+    
+    async def record_incidents(self, docs: Iterable[Dict]):
+        increments: Counter = Counter()
+        for doc in docs:
+            increments[('incidents', 'total', 'all')] += 1
+            increments[('incidents', 'status', _value(doc.get('status')))] += 1
+        await self.apply(increments)
+    
+    async def record_status_change(self, metric: str, old: Optional[str], new: Optional[str], created=None):
+        """`created` places an alert's status change in its time buckets"""
+        if old == new:
+            return
+        increments = {
+            (metric, 'status', _value(old)): -1,
+            (metric, 'status', _value(new)): 1,
+        }
+        if metric == 'alerts':
+            await asyncio.gather(self.apply(increments), time_buckets.record_status_change(created, old, new))
+        else:
+            await self.apply(increments)
+    
+    # ---- reads ----
+    
+    async def counts(self, metric: str, dim: str) -> Dict[str, int]:
+        cursor = get_db().rollups.find({'metric': metric, 'dim': dim, 'count': {'$gt': 0}}, {'value': 1, 'count': 1})
+        return {d['value']: d['count'] async for d in cursor}
+    
+    async def total(self, metric: str) -> int:
+        doc = await get_db().rollups.find_one({'_id': _counter_id((metric, 'total', 'all'))})
+        return doc['count'] if doc else 0
+    
+    async def top(self, metric: str, dim: str, n: int) -> List[Tuple[str, int]]:
+        cursor = get_db().rollups.find(
+            {'metric': metric, 'dim': dim, 'count': {'$gt': 0}}, {'value': 1, 'count': 1}
+        ).sort('count', DESCENDING).limit(n)
+        return [(d['value'], d['count']) async for d in cursor]
+    
+    async def alerts_since(self, since: datetime) -> int:
+        return await time_buckets.count_since(since)
+    
+    # ---- reconciliation ----
+    
+    async def _reconcile_alerts(self, start: Optional[datetime], end: datetime) -> Tuple[Counter, bool]:
+        # Rollups and time buckets are incremented from the same batches, so
+        # the bucket correction is also the rollup correction
+        deltas: Counter = Counter()
+        async with self.lock('alerts'):
+            fields, mitre_complete = await time_buckets.reconcile(start, end)
+            for field, n in fields.items():
+                if field == 'count':
+                    deltas[('alerts', 'total', 'all')] += n
+                else:
+                    dim, key = field.split('.', 1)
+                    deltas[('alerts', dim, decode_key(key))] += n
+            await self.apply(deltas)
+        return deltas, mitre_complete
+    
+    async def _reconcile_incidents(self) -> Counter:
+        db = get_db()
+        pipeline = [{'$group': {'_id': '$status', 'count': {'$sum': 1}}}]
+        async with self.lock('incidents'):
+            computed: Counter = Counter()
+            async for g in db.incidents.aggregate(pipeline):
+                computed[('incidents', 'total', 'all')] += g['count']
+                computed[('incidents', 'status', _value(g['_id']))] += g['count']
+            observed = {
+                (d['metric'], d['dim'], d['value']): d['count']
+                async for d in db.rollups.find({'metric': 'incidents'})
+            }
+            deltas = Counter({
+                key: computed.get(key, 0) - observed.get(key, 0)
+                for key in set(computed) | set(observed)
+            })
+            await self.apply(deltas)
+        return deltas
+    
+    async def reconcile(self, hours: Optional[int] = None) -> int:
+        """
+        Correct alert counters for alerts created in the last `hours` (default
+        ROLLUP_RECONCILE_HOURS; 0 = all of them) up to the settle margin, and
+        the incident counters; returns how many counters changed
+        """
+        now = datetime.now(timezone.utc)
+        hours = self.reconcile_hours if hours is None else hours
+        end = truncate(now - self.reconcile_settle, HOUR)
+        start = end - timedelta(hours=hours) if hours else None
+        
+        alert_deltas, mitre_complete = await self._reconcile_alerts(start, end)
+        incident_deltas = await self._reconcile_incidents()
+        if start is None:
+            # Mark the full build done; MITRE counters only once every alert could be mapped
+            done = {'builtAt': now, **({'mitreBuiltAt': now} if mitre_complete else {})}
+            await get_db().sync_state.update_one({'_id': STATE_ID}, {'$set': done}, upsert=True)
+        
+        corrected = sum(1 for n in alert_deltas.values() if n) + sum(1 for n in incident_deltas.values() if n)
+        if corrected:
+            logger.info(f"Rollup reconciliation corrected {corrected} counters")
+        self.last_reconciled = now.isoformat()
+        return corrected
+    
+    async def _full_build_due(self) -> bool:
+        """
+        Whether the next pass must cover every alert: no full build has
+        completed yet (first start against an existing database, or the last
+        attempt failed), or none has mapped every alert's MITRE tactics/
+        techniques and the rule index has loaded since
+        """
+        state = await get_db().sync_state.find_one({'_id': STATE_ID}) or {}
+        if not state.get('builtAt'):
+            return True
+        return not state.get('mitreBuiltAt') and mitre_ready()
+    
+    async def run(self):
+        while True:
+            try:
+                await self.reconcile(hours=0 if await self._full_build_due() else None)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Rollup reconciliation failed: {str(e)}")
+            await asyncio.sleep(self.reconcile_interval)
+    
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+# Singleton instance
+rollups = RollupStore()
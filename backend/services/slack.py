@@ -1,16 +1,16 @@
 from backend.utils.logger import get_logger
 from backend.utils.config import settings
-import requests
+from backend.services.http_client import get_http_client
 
 log = get_logger(__name__)
 
 
-def send_message(text: str) -> dict:
+async def send_message(text: str) -> dict:
     if not settings.SLACK_WEBHOOK_URL:
         log.warning("SLACK_WEBHOOK_URL not set; returning stub response")
         return {"available": False, "message": "Webhook missing"}
     try:
-        resp = requests.post(settings.SLACK_WEBHOOK_URL, json={"text": text}, timeout=10)
+        resp = await get_http_client().post(settings.SLACK_WEBHOOK_URL, json={"text": text})
         if resp.status_code >= 300:
             return {"error": resp.text, "status": resp.status_code}
         return {"ok": True}
@@ -0,0 +1,308 @@
+"""
+Ingest Spool
+Local append-only write-ahead log used when MongoDB is slow or unreachable.
+Events are appended to segmented NDJSON files with group-committed fsyncs and
+a background drainer replays them into MongoDB, checkpointing its position so
+a restart resumes where it stopped. Documents carry their _id before they are
+spooled, so replaying a batch twice is harmless.
+"""
+
+import asyncio
+import json
+import os
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from bson import json_util
+from pymongo.errors import BulkWriteError, ConnectionFailure, ExecutionTimeout, WTimeoutError
+
+from backend.database import get_db
+from backend.utils.config import settings
+from backend.utils.logger import get_logger
+
+log = get_logger(__name__)
+
+SEGMENT_PREFIX = "spool-"
+SEGMENT_SUFFIX = ".ndjson"
+CHECKPOINT_FILE = "checkpoint.json"
+DUPLICATE_KEY = 11000
+
+# Errors that mean "the database is unavailable", as opposed to a bad document
+UNAVAILABLE_ERRORS = (ConnectionFailure, ExecutionTimeout, WTimeoutError)
+
+
+class IngestSpool:
+    """Segmented on-disk WAL with a background drainer into MongoDB"""
+
+    def __init__(self, directory: str, segment_bytes: int, fsync_interval: float,
+                 drain_batch: int, drain_interval: float, max_backoff: float):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.fsync_interval = fsync_interval
+        self.drain_batch = drain_batch
+        self.drain_interval = drain_interval
+        self.max_backoff = max_backoff
+        # While degraded, writers go straight to the spool instead of MongoDB
+        self.degraded = False
+        self.last_error: Optional[str] = None
+        self.stats = {"appended": 0, "drained": 0, "dropped": 0, "fsyncs": 0}
+        self._seq: Optional[int] = None
+        self._fd: Optional[int] = None
+        self._size = 0
+        self._lock = asyncio.Lock()
+        self._commit: Optional[asyncio.Future] = None
+        self._commit_task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    # ---- segment bookkeeping ----
+
+    def _path(self, seq: int) -> str:
+        return os.path.join(self.directory, f"{SEGMENT_PREFIX}{seq:012d}{SEGMENT_SUFFIX}")
+
+    def _segments(self) -> List[int]:
+        if not os.path.isdir(self.directory):
+            return []
+        seqs = []
+        for name in os.listdir(self.directory):
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX):
+                try:
+                    seqs.append(int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]))
+                except ValueError:
+                    continue
+        return sorted(seqs)
+
+    def _load_checkpoint(self) -> Tuple[int, int]:
+        try:
+            with open(os.path.join(self.directory, CHECKPOINT_FILE)) as f:
+                cp = json.load(f)
+            return int(cp["segment"]), int(cp["offset"])
+        except (OSError, ValueError, KeyError):
+            return 0, 0
+
+    def _save_checkpoint(self, seq: int, offset: int):
+        path = os.path.join(self.directory, CHECKPOINT_FILE)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"segment": seq, "offset": offset}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def _open_segment(self):
+        os.makedirs(self.directory, exist_ok=True)
+        # Never reopen an old segment: a crash may have left a torn last line.
+        # Stay past the checkpoint too, or a fully drained spool would reuse a
+        # sequence number the drainer treats as already replayed
+        cp_seq, _ = self._load_checkpoint()
+        self._seq = max([cp_seq - 1] + self._segments()) + 1
+        self._fd = os.open(self._path(self._seq), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+        self._size = 0
+
+    def _close_segment(self):
+        if self._fd is not None:
+            os.fsync(self._fd)
+            os.close(self._fd)
+        self._fd = None
+        self._seq = None
+
+    def has_backlog(self) -> bool:
+        return bool(self._segments()) and self.backlog_bytes() > 0
+
+    def backlog_bytes(self) -> int:
+        cp_seq, cp_offset = self._load_checkpoint()
+        total = 0
+        for seq in self._segments():
+            if seq < cp_seq:
+                continue
+            try:
+                size = os.path.getsize(self._path(seq))
+            except OSError:
+                continue
+            total += size - cp_offset if seq == cp_seq else size
+        return max(0, total)
+
+    # ---- writer ----
+
+    async def append(self, collection: str, docs: List[Dict]):
+        """Durably append documents; returns once they are fsynced"""
+        if not docs:
+            return
+        data = b"".join(
+            json_util.dumps({"c": collection, "d": doc}).encode() + b"\n" for doc in docs
+        )
+        async with self._lock:
+            if self._fd is None:
+                self._open_segment()
+            elif self._size and self._size + len(data) > self.segment_bytes:
+                self._close_segment()
+                self._open_segment()
+            view = memoryview(data)
+            while view:
+                written = os.write(self._fd, view)
+                view = view[written:]
+            self._size += len(data)
+        self.stats["appended"] += len(docs)
+        await self._group_commit()
+        self._wake.set()
+
+    async def _group_commit(self):
+        # Every append within one fsync interval shares a single fsync
+        if self._commit is None:
+            self._commit = asyncio.get_running_loop().create_future()
+            self._commit_task = asyncio.create_task(self._fsync_after_interval(self._commit))
+        await asyncio.shield(self._commit)
+
+    async def _fsync_after_interval(self, future: asyncio.Future):
+        await asyncio.sleep(self.fsync_interval)
+        self._commit = None
+        try:
+            async with self._lock:
+                if self._fd is not None:
+                    await asyncio.to_thread(os.fsync, self._fd)
+                    self.stats["fsyncs"] += 1
+            future.set_result(None)
+        except Exception as e:
+            future.set_exception(e)
+
+    # ---- drainer ----
+
+    def _read_batch(self, seq: int, offset: int, sealed: bool) -> Tuple[List[Tuple[str, Dict]], int]:
+        records: List[Tuple[str, Dict]] = []
+        with open(self._path(seq), "rb") as f:
+            f.seek(offset)
+            while len(records) < self.drain_batch:
+                line = f.readline()
+                if not line:
+                    break
+                if not line.endswith(b"\n"):
+                    if sealed:
+                        log.warning(f"Discarding torn record at end of spool segment {seq}")
+                        offset += len(line)
+                    break
+                offset += len(line)
+                try:
+                    rec = json_util.loads(line)
+                    records.append((rec["c"], rec["d"]))
+                except (ValueError, KeyError, TypeError):
+                    self.stats["dropped"] += 1
+                    log.warning(f"Skipping unreadable record in spool segment {seq}")
+        return records, offset
+
+    async def _replay(self, records: List[Tuple[str, Dict]]):
+        by_collection: Dict[str, List[Dict]] = defaultdict(list)
+        for collection, doc in records:
+            by_collection[collection].append(doc)
+        db = get_db()
+        for collection, docs in by_collection.items():
+            try:
+                await db[collection].insert_many(docs, ordered=False)
+            except BulkWriteError as e:
+                # Duplicates are records already replayed before a crash
+                bad = [err for err in e.details.get("writeErrors", []) if err.get("code") != DUPLICATE_KEY]
+                if bad:
+                    self.stats["dropped"] += len(bad)
+                    log.error(f"Dropped {len(bad)} spooled {collection} docs: {bad[0].get('errmsg')}")
+        self.stats["drained"] += len(records)
+
+    async def drain_once(self) -> int:
+        """Replay everything past the checkpoint; raises if MongoDB is unavailable"""
+        cp_seq, cp_offset = self._load_checkpoint()
+        replayed = 0
+        for seq in self._segments():
+            sealed = seq != self._seq
+            if seq < cp_seq:
+                os.remove(self._path(seq))
+                continue
+            offset = cp_offset if seq == cp_seq else 0
+            while True:
+                records, offset_after = await asyncio.to_thread(self._read_batch, seq, offset, sealed)
+                if records:
+                    await self._replay(records)
+                    replayed += len(records)
+                if offset_after == offset:
+                    break
+                offset = offset_after
+                self._save_checkpoint(seq, offset)
+            if sealed:
+                self._save_checkpoint(seq + 1, 0)
+                os.remove(self._path(seq))
+        return replayed
+
+    async def run(self):
+        backoff = self.drain_interval
+        while True:
+            if self.last_error is None:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=self.drain_interval)
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                # Appends must not short-circuit the backoff while MongoDB is down
+                await asyncio.sleep(backoff)
+            self._wake.clear()
+            if not self._segments():
+                continue
+            try:
+                replayed = await self.drain_once()
+                if replayed:
+                    log.info(f"Replayed {replayed} spooled documents into MongoDB")
+                if self.degraded and not self.has_backlog():
+                    log.info("Spool drained, resuming direct MongoDB writes")
+                    self.degraded = False
+                    # Seal the replayed active segment so the drain below deletes it
+                    async with self._lock:
+                        if not self.has_backlog():
+                            self._close_segment()
+                    await self.drain_once()
+                backoff = self.drain_interval
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                backoff = min(backoff * 2, self.max_backoff)
+                log.warning(f"Spool drain failed, retrying in {backoff:.0f}s: {e}")
+
+    def mark_degraded(self, error: Exception):
+        if not self.degraded:
+            log.warning(f"MongoDB unavailable, spooling ingest to {self.directory}: {error}")
+        self.degraded = True
+        self.last_error = str(error)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            if self.has_backlog():
+                # Leftovers from a previous run: keep new writes behind them
+                self.degraded = True
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        async with self._lock:
+            self._close_segment()
+
+    def snapshot(self) -> Dict:
+        return {
+            "enabled": True,
+            "directory": self.directory,
+            "degraded": self.degraded,
+            "segments": len(self._segments()),
+            "backlog_bytes": self.backlog_bytes(),
+            "last_error": self.last_error,
+            **self.stats,
+        }
+
+
+ingest_spool: Optional[IngestSpool] = IngestSpool(
+    settings.SPOOL_DIR,
+    segment_bytes=settings.SPOOL_SEGMENT_BYTES,
+    fsync_interval=settings.SPOOL_FSYNC_INTERVAL_MS / 1000,
+    drain_batch=settings.SPOOL_DRAIN_BATCH,
+    drain_interval=settings.SPOOL_DRAIN_INTERVAL,
+    max_backoff=settings.SPOOL_MAX_BACKOFF,
+) if settings.SPOOL_ENABLED else None
@@ -0,0 +1,95 @@
+"""
+Stats Response Cache
+Caches serialized /stats responses for a short TTL. Entries are keyed by path
+and query string and tagged with a data version that is bumped whenever alerts
+or incidents are written, so dashboards see new data on the next refresh
+instead of waiting out the TTL. Concurrent identical requests share one
+computation, and every response carries an ETag so unchanged dashboards
+revalidate with a bodiless 304.
+"""
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, NamedTuple
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from backend.utils.config import settings
+from backend.utils.singleflight import SingleFlight
+
+
+class _Entry(NamedTuple):
+    version: int
+    created: float
+    body: bytes
+    etag: str
+
+
+class StatsCache:
+    """Versioned TTL cache of JSON responses with single-flight and ETags"""
+
+    def __init__(self, ttl: float, min_age: float, max_entries: int):
+        self.ttl = ttl
+        # Under constant ingest the version moves every few ms; an entry is
+        # still served for min_age seconds so the cache keeps absorbing load
+        self.min_age = min_age
+        self.max_entries = max_entries
+        self.version = 0
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._flight = SingleFlight()
+        self.stats = {"hits": 0, "misses": 0, "not_modified": 0}
+
+    def bump(self):
+        """Mark every cached response as stale"""
+        self.version += 1
+
+    def _fresh(self, entry: _Entry) -> bool:
+        age = time.monotonic() - entry.created
+        return age < self.ttl and (entry.version == self.version or age < self.min_age)
+
+    async def _compute(self, key: str, compute: Callable[[], Awaitable[Any]]) -> _Entry:
+        version = self.version
+        body = json.dumps(jsonable_encoder(await compute()), separators=(",", ":")).encode()
+        entry = _Entry(version, time.monotonic(), body, f'"{hashlib.sha1(body).hexdigest()[:20]}"')
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    async def respond(self, request: Request, compute: Callable[[], Awaitable[Any]]) -> Response:
+        key = f"{request.url.path}?{request.url.query}"
+        entry = self._entries.get(key)
+        if entry is not None and self._fresh(entry):
+            self.stats["hits"] += 1
+            cache_status = "HIT"
+        else:
+            self.stats["misses"] += 1
+            cache_status = "MISS"
+            entry = await self._flight.do((key, self.version), lambda: self._compute(key, compute))
+
+        headers = {"ETag": entry.etag, "Cache-Control": "no-cache", "X-Cache": cache_status}
+        if_none_match = request.headers.get("if-none-match", "")
+        if entry.etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+            self.stats["not_modified"] += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, media_type="application/json", headers=headers)
+
+    def snapshot(self) -> Dict:
+        return {
+            "version": self.version,
+            "entries": len(self._entries),
+            "in_flight": len(self._flight),
+            "coalesced": self._flight.coalesced,
+            **self.stats,
+        }
+
+
+stats_cache = StatsCache(
+    ttl=settings.STATS_CACHE_TTL,
+    min_age=settings.STATS_CACHE_MIN_AGE,
+    max_entries=settings.STATS_CACHE_MAX_ENTRIES,
+)
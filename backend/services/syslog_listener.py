@@ -0,0 +1,200 @@
+"""
+Syslog Listener
+asyncio UDP/TCP receiver for RFC 3164/5424 syslog (including CEF and LEEF
+payloads). Parsed events are queued on the logs write-behind buffer, so they
+reach MongoDB in batches without an HTTP hop. Runs inside the API process when
+SYSLOG_ENABLED is set, or standalone via `python -m backend.services.syslog_listener`.
+"""
+
+import asyncio
+import logging
+import socket
+from typing import Dict, Optional
+
+from backend.services.log_search import index_log
+from backend.services.spool import ingest_spool
+from backend.services.write_buffer import BufferFull, log_buffer
+from backend.utils.config import settings
+from backend.utils.syslog import parse_syslog
+
+logger = logging.getLogger(__name__)
+
+# RFC 6587 octet counting: longest accepted MSG-LEN and the chunk size used to
+# skip oversized frames without buffering them
+MAX_LENGTH_DIGITS = 10
+DISCARD_CHUNK = 64 * 1024
+
+
+class _UDPProtocol(asyncio.DatagramProtocol):
+    def __init__(self, listener: "SyslogListener"):
+        self.listener = listener
+
+    def datagram_received(self, data: bytes, addr):
+        self.listener.handle_datagram(data, addr[0])
+
+    def error_received(self, exc: Exception):
+        logger.warning(f"Syslog UDP error: {exc}")
+
+
+class SyslogListener:
+    """Receives syslog over UDP and TCP and feeds the logs buffer"""
+    
+    def __init__(self, host: str, udp_port: int, tcp_port: int, max_message: int):
+        self.host = host
+        self.udp_port = udp_port
+        self.tcp_port = tcp_port
+        self.max_message = max_message
+        self._udp: Optional[asyncio.DatagramTransport] = None
+        self._tcp: Optional[asyncio.base_events.Server] = None
+        self.stats = {"received": 0, "dropped": 0, "tcp_connections": 0, "oversized": 0, "malformed": 0}
+    
+    def _parse(self, data: bytes, peer_ip: Optional[str]) -> Optional[Dict]:
+        """Parse and index one frame; a frame the parser chokes on is counted and skipped"""
+        try:
+            return index_log(parse_syslog(data, peer_ip))
+        except Exception as e:
+            self.stats["malformed"] += 1
+            logger.debug(f"Skipping malformed syslog frame from {peer_ip}: {e}")
+            return None
+    
+    def handle_datagram(self, data: bytes, peer_ip: str):
+        self.stats["received"] += 1
+        doc = self._parse(data[:self.max_message], peer_ip)
+        # UDP senders can't be slowed down; drop when the buffer is full
+        if doc is not None and not log_buffer.enqueue(doc):
+            self.stats["dropped"] += 1
+    
+    async def _handle_frame(self, data: bytes, peer_ip: str):
+        self.stats["received"] += 1
+        doc = self._parse(data, peer_ip)
+        if doc is None or log_buffer.enqueue(doc):
+            return
+        # Buffer full: block this connection (TCP backpressure) until accepted
+        while True:
+            try:
+                await log_buffer.submit(doc)
+                return
+            except BufferFull as e:
+                await asyncio.sleep(e.retry_after)
+    
+    async def _read_frame(self, reader: asyncio.StreamReader) -> Optional[bytes]:
+        first = await reader.read(1)
+        if not first:
+            return None
+        if first.isdigit():
+            # RFC 6587 octet counting: "<len> <frame>"
+            digits = first
+            while True:
+                ch = await reader.readexactly(1)
+                if ch == b" ":
+                    break
+                if not ch.isdigit() or len(digits) >= MAX_LENGTH_DIGITS:
+                    raise ValueError("invalid octet-counting frame length")
+                digits += ch
+            length = int(digits)
+            if length > self.max_message:
+                self.stats["oversized"] += 1
+                # Skip the frame in bounded chunks rather than reading it into memory
+                remaining = length
+                while remaining:
+                    chunk = await reader.read(min(remaining, DISCARD_CHUNK))
+                    if not chunk:
+                        raise asyncio.IncompleteReadError(b"", remaining)
+                    remaining -= len(chunk)
+                return b""
+            return await reader.readexactly(length)
+        # Non-transparent framing: newline terminated
+        try:
+            return first + await reader.readuntil(b"\n")
+        except asyncio.LimitOverrunError as e:
+            self.stats["oversized"] += 1
+            consumed = e.consumed
+        # Discard the rest of an oversized frame up to its newline
+        while True:
+            await reader.readexactly(consumed)
+            try:
+                await reader.readuntil(b"\n")
+                return b""
+            except asyncio.LimitOverrunError as e:
+                consumed = e.consumed
+    
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        peer = writer.get_extra_info("peername")
+        peer_ip = peer[0] if peer else None
+        self.stats["tcp_connections"] += 1
+        try:
+            while True:
+                frame = await self._read_frame(reader)
+                if frame is None:
+                    break
+                if frame.strip():
+                    await self._handle_frame(frame, peer_ip)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError, ValueError):
+            # Truncated or malformed stream: drop the connection, the sender reconnects
+            pass
+        finally:
+            self.stats["tcp_connections"] -= 1
+            writer.close()
+    
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        if self.udp_port:
+            self._udp, _ = await loop.create_datagram_endpoint(
+                lambda: _UDPProtocol(self), local_addr=(self.host, self.udp_port)
+            )
+            sock = self._udp.get_extra_info("socket")
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, settings.SYSLOG_UDP_RCVBUF)
+            except OSError:
+                pass
+            logger.info(f"Syslog UDP listening on {self.host}:{self.udp_port}")
+        if self.tcp_port:
+            self._tcp = await asyncio.start_server(
+                self._handle_connection, self.host, self.tcp_port, limit=self.max_message
+            )
+            logger.info(f"Syslog TCP listening on {self.host}:{self.tcp_port}")
+    
+    async def stop(self):
+        if self._udp is not None:
+            self._udp.close()
+            self._udp = None
+        if self._tcp is not None:
+            self._tcp.close()
+            await self._tcp.wait_closed()
+            self._tcp = None
+    
+    def snapshot(self) -> Dict:
+        return {
+            "enabled": self._udp is not None or self._tcp is not None,
+            "udp_port": self.udp_port,
+            "tcp_port": self.tcp_port,
+            **self.stats,
+        }
+
+
+# Singleton instance
+syslog_listener = SyslogListener(
+    settings.SYSLOG_HOST,
+    udp_port=settings.SYSLOG_UDP_PORT,
+    tcp_port=settings.SYSLOG_TCP_PORT,
+    max_message=settings.SYSLOG_MAX_MESSAGE,
+)
+
+
+async def _serve():
+    if ingest_spool is not None:
+        ingest_spool.start()
+    log_buffer.start()
+    await syslog_listener.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await syslog_listener.stop()
+        await log_buffer.stop()
+        if ingest_spool is not None:
+            await ingest_spool.stop()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_serve())
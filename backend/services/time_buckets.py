@@ -0,0 +1,338 @@
+"""
+Alert Time Buckets
+Materialized minute/hour/day buckets in `alert_buckets`, each holding the
+alert count broken down by severity, source, status and MITRE tactic/technique:
+    {_id: "hour|2025-01-02T13:00:00Z", unit: "hour", ts: <date>, count: 12,
+     severity: {high: 3, low: 9}, source: {wazuh: 12}, status: {new: 12},
+     tactic: {"Credential Access": 4}, technique: {T1110: 4}}
+An alert can map to several tactics/techniques (or none), so those
+breakdowns don't necessarily sum to the count.
+Buckets are upserted with $inc for every stored batch of alerts (and status
+change), at every unit at once. Minute buckets are only kept for a short
+retention and then deleted; old hour buckets are dropped in favour of days.
+Charts therefore read a few hundred small documents regardless of how many
+alerts were ingested.
+
+Reconciliation compares a closed window of `alerts` with the hour (or, past
+hour retention, day) buckets and applies the difference as $inc, so it never
+overwrites increments made while it runs. The per-field differences are
+returned for the rollup counters to apply the same correction.
+"""
+
+import asyncio
+import logging
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from pymongo import UpdateOne
+
+from backend.database import get_db
+from backend.services.wazuh import wazuh_service
+from backend.utils.config import settings
+from backend.utils.timeutil import time_range, to_datetime, to_iso, utcnow
+
+logger = logging.getLogger(__name__)
+
+MINUTE, HOUR, DAY = 'minute', 'hour', 'day'
+UNITS = (MINUTE, HOUR, DAY)
+BREAKDOWNS = ('severity', 'source', 'status')
+MITRE_BREAKDOWNS = ('tactic', 'technique')
+ALL_BREAKDOWNS = BREAKDOWNS + MITRE_BREAKDOWNS
+
+
+def alert_mitre(doc: Dict) -> Tuple[List[str], List[str]]:
+    """(technique ids, tactic names) for a stored alert, via its raw Wazuh rule"""
+    return wazuh_service.mitre_for_alert(doc.get('metadata') or {})
+
+
+def mitre_ready() -> bool:
+    """Whether the rule index is loaded, so every alert's MITRE mapping can be resolved"""
+    return bool(wazuh_service.rules)
+
+
+def mitre_resolvable(doc: Dict) -> bool:
+    """
+    Whether alert_mitre already gives the final answer for a stored alert: it
+    embeds its own rule.mitre block, has no rule to look up, or the rule
+    index is loaded
+    """
+    rule = (doc.get('metadata') or {}).get('rule') or {}
+    return bool(rule.get('mitre')) or rule.get('id') is None or mitre_ready()
+
+
+def truncate(dt: datetime, unit: str) -> datetime:
+    if unit == MINUTE:
+        return dt.replace(second=0, microsecond=0)
+    if unit == HOUR:
+        return dt.replace(minute=0, second=0, microsecond=0)
+    return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def bucket_id(unit: str, start: datetime) -> str:
+    return f"{unit}|{to_iso(start)}"
+
+
+def _encode_key(value) -> str:
+    # Field names can't contain "." or start with "$"
+    key = 'unknown' if value is None else str(value)
+    key = key.replace('.', '\uff0e')
+    return '\uff04' + key[1:] if key.startswith('$') else key
+
+
+def decode_key(key: str) -> str:
+    key = key.replace('\uff0e', '.')
+    return '$' + key[1:] if key.startswith('\uff04') else key
+
+
+class AlertTimeBuckets:
+    """Incremental time buckets with compaction and reconciliation"""
+    
+    def __init__(
+        self,
+        minute_retention: timedelta = timedelta(hours=settings.BUCKET_MINUTE_RETENTION_HOURS),
+        hour_retention: timedelta = timedelta(days=settings.BUCKET_HOUR_RETENTION_DAYS),
+        compact_interval: float = settings.BUCKET_COMPACT_INTERVAL,
+    ):
+        self.minute_retention = minute_retention
+        self.hour_retention = hour_retention
+        self.compact_interval = compact_interval
+        self._task: Optional[asyncio.Task] = None
+    
+    # ---- writes ----
+    
+    def _units_for(self, created: datetime) -> Tuple[str, ...]:
+        # Late (backfilled) alerts skip minute buckets that compaction already removed
+        if created < utcnow() - self.minute_retention:
+            return (HOUR, DAY)
+        return UNITS
+    
+    @staticmethod
+    def _fields(doc: Dict) -> Counter:
+        """Bucket counter fields one alert contributes to"""
+        techniques, tactics = alert_mitre(doc)
+        fields = Counter({'count': 1})
+        for dim in BREAKDOWNS:
+            fields[f"{dim}.{_encode_key(doc.get(dim))}"] += 1
+        for technique in techniques:
+            fields[f"technique.{_encode_key(technique)}"] += 1
+        for tactic in tactics:
+            fields[f"tactic.{_encode_key(tactic)}"] += 1
+        return fields
+    
+    async def _apply(self, increments: Dict[tuple, Counter]):
+        ops = [
+            UpdateOne(
+                {'_id': bucket_id(unit, start)},
+                {'$inc': dict(inc), '$setOnInsert': {'unit': unit, 'ts': start}},
+                upsert=True
+            )
+            for (unit, start), inc in increments.items() if any(inc.values())
+        ]
+        if ops:
+            await get_db().alert_buckets.bulk_write(ops, ordered=False)
+    
+    async def record(self, docs: Iterable[Dict]):
+        """Count newly stored alerts into their minute, hour and day buckets"""
+        increments: Dict[tuple, Counter] = defaultdict(Counter)
+        for doc in docs:
+            created = to_datetime(doc.get('createdAt'))
+            if created is None:
+                continue
+            fields = self._fields(doc)
+            for unit in self._units_for(created):
+                increments[(unit, truncate(created, unit))].update(fields)
+        await self._apply(increments)
+    
+    async def record_status_change(self, created, old: Optional[str], new: Optional[str]):
+        """Move one alert between status breakdowns in the buckets it was counted in"""
+        created = to_datetime(created)
+        if created is None or old == new:
+            return
+        move = Counter({f"status.{_encode_key(old)}": -1, f"status.{_encode_key(new)}": 1})
+        await self._apply({(unit, truncate(created, unit)): move for unit in self._units_for(created)})
+    
+    # ---- reads ----
+    
+    async def series(self, unit: str, start: datetime, end: Optional[datetime] = None) -> List[Dict]:
+        """Buckets of `unit` starting in [start, end), oldest first"""
+        ts = {'$gte': truncate(start, unit)}
+        if end is not None:
+            ts['$lt'] = end
+        cursor = get_db().alert_buckets.find({'unit': unit, 'ts': ts}).sort('ts', 1)
+        return [
+            {
+                'ts': to_datetime(d['ts']),
+                'count': d.get('count', 0),
+                **{dim: {decode_key(k): v for k, v in (d.get(dim) or {}).items() if v}
+                   for dim in ALL_BREAKDOWNS},
+            }
+            async for d in cursor
+        ]
+    
+    async def count_since(self, since: datetime) -> int:
+        """
+        Exact count of alerts created at or after `since`: whole hour buckets
+        after the boundary hour, plus an indexed range count for the part of
+        the boundary hour that falls inside the window.
+        """
+        since = to_datetime(since)
+        boundary = truncate(since, HOUR) + timedelta(hours=1)
+        buckets, partial = await asyncio.gather(
+            self.series(HOUR, boundary),
+            get_db().alerts.count_documents(time_range('createdAt', since, boundary)),
+        )
+        return sum(b['count'] for b in buckets) + partial
+    
+    async def breakdown(self, dim: str, since: datetime) -> Counter:
+        """
+        Per-value totals of `dim` for alerts since `since`, rounded down to the
+        hour (or to the day for windows longer than a week)
+        """
+        unit = HOUR if utcnow() - to_datetime(since) <= timedelta(days=7) else DAY
+        totals: Counter = Counter()
+        for b in await self.series(unit, since):
+            totals.update(b[dim])
+        return totals
+    
+    # ---- maintenance ----
+    
+    async def compact(self) -> int:
+        """
+        Drop minute buckets past retention (their hour and day were incremented
+        alongside them) and hour buckets past hour retention (kept as days)
+        """
+        db = get_db()
+        now = utcnow()
+        minutes = await db.alert_buckets.delete_many(
+            {'unit': MINUTE, 'ts': {'$lt': truncate(now - self.minute_retention, HOUR)}}
+        )
+        await db.alert_buckets.delete_many({'unit': HOUR, 'ts': {'$lt': self.hour_floor(now)}})
+        return minutes.deleted_count
+    
+    def hour_floor(self, now: datetime) -> datetime:
+        """Start of the oldest day whose hour buckets are all still retained"""
+        return truncate(now - self.hour_retention, DAY) + timedelta(days=1)
+    
+    async def _expected(self, unit: str, start: Optional[datetime], end: datetime) -> Tuple[Dict[datetime, Counter], Set[datetime]]:
+        """
+        Bucket fields per `unit` computed from `alerts` created in [start, end),
+        plus the buckets whose MITRE breakdowns can't be computed yet
+        """
+        pipeline = [
+            {'$match': time_range('createdAt', start, end)},
+            {'$group': {
+                '_id': {
+                    'ts': {'$dateTrunc': {'date': {'$toDate': '$createdAt'}, 'unit': unit}},
+                    **{dim: f'${dim}' for dim in BREAKDOWNS},
+                    'rule': '$metadata.rule.id',
+                    'mitre': '$metadata.rule.mitre',
+                },
+                'n': {'$sum': 1},
+            }},
+        ]
+        expected: Dict[datetime, Counter] = defaultdict(Counter)
+        unresolved: Set[datetime] = set()
+        async for g in get_db().alerts.aggregate(pipeline, allowDiskUse=True):
+            key = g['_id']
+            ts = to_datetime(key['ts'])
+            doc = {dim: key.get(dim) for dim in BREAKDOWNS}
+            doc['metadata'] = {'rule': {'id': key.get('rule'), 'mitre': key.get('mitre')}}
+            if not mitre_resolvable(doc):
+                unresolved.add(ts)
+            for field, n in self._fields(doc).items():
+                expected[ts][field] += n * g['n']
+        return expected, unresolved
+    
+    async def _observed(self, unit: str, start: Optional[datetime], end: datetime) -> Dict[datetime, Counter]:
+        ts = {'$lt': end}
+        if start is not None:
+            ts['$gte'] = start
+        observed: Dict[datetime, Counter] = {}
+        async for d in get_db().alert_buckets.find({'unit': unit, 'ts': ts}):
+            fields = Counter({'count': d.get('count', 0)})
+            for dim in ALL_BREAKDOWNS:
+                fields.update({f"{dim}.{k}": v for k, v in (d.get(dim) or {}).items()})
+            observed[to_datetime(d['ts'])] = fields
+        return observed
+    
+    async def _diff(self, unit: str, start: Optional[datetime], end: datetime) -> Tuple[Dict[datetime, Counter], bool]:
+        """Per-bucket field deltas, and whether the MITRE breakdowns were all compared"""
+        (expected, unresolved), observed = await asyncio.gather(
+            self._expected(unit, start, end), self._observed(unit, start, end)
+        )
+        diffs: Dict[datetime, Counter] = {}
+        for ts in set(expected) | set(observed):
+            exp, obs = expected.get(ts, Counter()), observed.get(ts, Counter())
+            # MITRE breakdowns of buckets holding unmappable alerts are left alone
+            dims = BREAKDOWNS if ts in unresolved else ALL_BREAKDOWNS
+            diff = Counter({
+                field: exp[field] - obs[field]
+                for field in set(exp) | set(obs)
+                if exp[field] != obs[field] and (field == 'count' or field.split('.', 1)[0] in dims)
+            })
+            if diff:
+                diffs[ts] = diff
+        return diffs, not unresolved
+    
+    async def reconcile(self, start: Optional[datetime], end: datetime) -> Tuple[Counter, bool]:
+        """
+        Correct buckets for alerts created in [start, end) (start=None: all of
+        them) with $inc deltas. `end` should lie far enough in the past that no
+        insert for it is still in flight. Returns the summed field deltas and
+        whether MITRE breakdowns were reconciled for every bucket.
+        """
+        end = truncate(end, HOUR)
+        floor = self.hour_floor(utcnow())
+        increments: Dict[tuple, Counter] = defaultdict(Counter)
+        complete = True
+        
+        # Hour buckets are the finest retained unit; their days get the same deltas
+        hour_start = floor if start is None else max(truncate(start, HOUR), floor)
+        if hour_start < end:
+            diffs, resolved = await self._diff(HOUR, hour_start, end)
+            complete = complete and resolved
+            for ts, diff in diffs.items():
+                increments[(HOUR, ts)].update(diff)
+                increments[(DAY, truncate(ts, DAY))].update(diff)
+        # Older ranges only have whole day buckets left
+        if start is None or start < floor:
+            day_start = None if start is None else truncate(start, DAY)
+            diffs, resolved = await self._diff(DAY, day_start, min(floor, end))
+            complete = complete and resolved
+            for ts, diff in diffs.items():
+                increments[(DAY, ts)].update(diff)
+        
+        await self._apply(increments)
+        totals: Counter = Counter()
+        for (unit, _), diff in increments.items():
+            if unit == DAY:
+                totals.update(diff)
+        return totals, complete
+    
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.compact_interval)
+            try:
+                compacted = await self.compact()
+                if compacted:
+                    logger.info(f"Dropped {compacted} expired minute buckets")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Bucket compaction failed: {str(e)}")
+    
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+# Singleton instance
+time_buckets = AlertTimeBuckets()
@@ -1,35 +1,40 @@
 from backend.utils.config import settings
 from backend.utils.logger import get_logger
-import requests
+from backend.services.http_client import provider_get
+from backend.services.breaker import CircuitOpenError
+from backend.services.ratelimit import RateLimitExceeded
 
 log = get_logger(__name__)
 
 
-def lookup_ip(ip: str) -> dict:
+async def lookup_ip(ip: str) -> dict:
     if not settings.VIRUSTOTAL_API_KEY:
         log.warning("VIRUSTOTAL_API_KEY not set; returning stub response")
         return {"available": False, "message": "API key missing"}
     try:
         url = f"https://www.virustotal.com/api/v3/ip_addresses/{ip}"
         headers = {"x-apikey": settings.VIRUSTOTAL_API_KEY}
-        resp = requests.get(url, headers=headers, timeout=10)
+        resp = await provider_get("virustotal", url, headers=headers)
         if resp.status_code != 200:
             return {"error": resp.text, "status": resp.status_code}
         data = resp.json()
         return {"reputation": data.get("data", {}).get("attributes", {}).get("reputation")}
+    except (RateLimitExceeded, CircuitOpenError) as e:
+        log.warning(str(e))
+        return {"error": str(e), "status": e.status}
     except Exception as e:
         log.exception("VirusTotal IP lookup failed")
         return {"error": str(e)}
 
 
-def lookup_domain(domain: str) -> dict:
+async def lookup_domain(domain: str) -> dict:
     if not settings.VIRUSTOTAL_API_KEY:
         log.warning("VIRUSTOTAL_API_KEY not set; returning stub response")
         return {"available": False, "message": "API key missing"}
     try:
         url = f"https://www.virustotal.com/api/v3/domains/{domain}"
         headers = {"x-apikey": settings.VIRUSTOTAL_API_KEY}
-        resp = requests.get(url, headers=headers, timeout=10)
+        resp = await provider_get("virustotal", url, headers=headers)
         if resp.status_code != 200:
             return {"error": resp.text, "status": resp.status_code}
         data = resp.json()
@@ -38,6 +43,9 @@ def lookup_domain(domain: str) -> dict:
             "reputation": attrs.get("reputation"),
             "last_analysis_stats": attrs.get("last_analysis_stats"),
         }
+    except (RateLimitExceeded, CircuitOpenError) as e:
+        log.warning(str(e))
+        return {"error": str(e), "status": e.status}
     except Exception as e:
         log.exception("VirusTotal domain lookup failed")
         return {"error": str(e)}
@@ -4,22 +4,40 @@ Handles communication with Wazuh API for security event monitoring,
 agent management, and alert retrieval.
 """
 
+import asyncio
 import os
-import requests
+import time
 import logging
-from typing import Dict, List, Optional
-from requests.auth import HTTPBasicAuth
-import urllib3
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
 
-# Suppress SSL warnings if SSL verification is disabled
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+import httpx
+import jwt
+
+from backend.utils.singleflight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
+# Bulk alert iteration defaults
+BULK_PAGE_SIZE = int(os.getenv('WAZUH_BULK_PAGE_SIZE', '500'))
+BULK_WINDOW = int(os.getenv('WAZUH_BULK_WINDOW', '4'))
+
+# Metadata cache TTLs (seconds); entries are refreshed in the background once
+# REFRESH_AHEAD_RATIO of their TTL has elapsed
+AGENTS_TTL = float(os.getenv('WAZUH_AGENTS_TTL', '60'))
+RULES_TTL = float(os.getenv('WAZUH_RULES_TTL', '3600'))
+MITRE_TTL = float(os.getenv('WAZUH_MITRE_TTL', '86400'))
+REFRESH_AHEAD_RATIO = 0.8
+
 
 class WazuhService:
     """Service class for interacting with Wazuh API"""
     
+    # Refresh the JWT this many seconds before it expires
+    TOKEN_REFRESH_MARGIN = 60
+    # Wazuh's default token lifetime, used when the token carries no `exp`
+    DEFAULT_TOKEN_TTL = 900
+    
     def __init__(self):
         self.api_url = os.getenv('WAZUH_API_URL', 'https://localhost:55000')
         self.api_user = os.getenv('WAZUH_API_USER', 'wazuh')
@@ -28,6 +46,19 @@ class WazuhService:
         verify_ssl_str = os.getenv('WAZUH_VERIFY_SSL') or os.getenv('WAZUH_VERIFY_SSL', 'false')
         self.verify_ssl = verify_ssl_str.lower() == 'true'
         self.token = None
+        self.token_expires_at = 0.0
+        self._token_lock = asyncio.Lock()
+        self._client: Optional[httpx.AsyncClient] = None
+        
+        # Metadata cache: (endpoint, params) -> (loaded_at, raw response)
+        self._metadata: Dict[Tuple, Tuple[float, Dict]] = {}
+        self._metadata_flight = SingleFlight()
+        self._background: Set[asyncio.Task] = set()
+        self._refresh_task: Optional[asyncio.Task] = None
+        # Preloaded lookup tables
+        self.rules: Dict[str, Dict] = {}
+        self.mitre_techniques: Dict[str, Dict] = {}
+        self._index_loaded_at: Dict[str, Optional[float]] = {'rules': None, 'mitre': None}
         
         logger.info(f"Wazuh Service initialized: URL={self.api_url}, User={self.api_user}, SSL={self.verify_ssl}")
         
@@ -35,80 +66,215 @@ class WazuhService:
             logger.warning("Wazuh API password not configured. Service will not function.")
             logger.warning("Wazuh API password not configured. Service will not function.")
     
-    def _get_token(self) -> Optional[str]:
-        """Authenticate and retrieve JWT token from Wazuh API"""
+    def _get_client(self) -> httpx.AsyncClient:
+        """Pooled keep-alive client for the Wazuh manager (separate from the intel client for its TLS settings)"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.api_url,
+                verify=self.verify_ssl,
+                timeout=15,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            )
+        return self._client
+    
+    async def close(self):
+        """Stop background refresh and close the pooled client (called at app shutdown)"""
+        tasks = [t for t in [self._refresh_task, *self._background] if t is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._refresh_task = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    def _token_valid(self) -> bool:
+        return bool(self.token) and time.time() < self.token_expires_at - self.TOKEN_REFRESH_MARGIN
+    
+    def _token_expiry(self, token: str) -> float:
+        """Read `exp` from the JWT without verifying it (we only need the lifetime)"""
+        try:
+            claims = jwt.decode(token, options={'verify_signature': False})
+            if claims.get('exp'):
+                return float(claims['exp'])
+        except jwt.PyJWTError:
+            pass
+        return time.time() + self.DEFAULT_TOKEN_TTL
+    
+    async def _get_token(self, stale: Optional[str] = None) -> Optional[str]:
+        """
+        Return a valid JWT, authenticating when it is missing, near expiry or rejected
+        
+        Args:
+            stale: Token the caller saw rejected; forces a refresh unless another
+                   caller already replaced it
+        """
         if not self.api_password:
             logger.error("Wazuh API password not configured")
             return None
-            
-        try:
-            auth_url = f"{self.api_url}/security/user/authenticate"
-            response = requests.post(
-                auth_url,
-                auth=HTTPBasicAuth(self.api_user, self.api_password),
-                verify=self.verify_ssl,
-                timeout=10
-            )
-            response.raise_for_status()
-            
-            data = response.json()
-            self.token = data.get('data', {}).get('token')
-            logger.info("Successfully authenticated with Wazuh API")
+        
+        if stale is None and self._token_valid():
             return self.token
+        
+        # Serialize refreshes so a burst of requests triggers a single authentication
+        async with self._token_lock:
+            if self._token_valid() and (stale is None or self.token != stale):
+                return self.token
             
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Failed to authenticate with Wazuh API: {str(e)}")
-            return None
+            try:
+                response = await self._get_client().post(
+                    '/security/user/authenticate',
+                    auth=(self.api_user, self.api_password),
+                    timeout=10
+                )
+                response.raise_for_status()
+                
+                data = response.json()
+                self.token = data.get('data', {}).get('token')
+                self.token_expires_at = self._token_expiry(self.token) if self.token else 0.0
+                logger.info("Successfully authenticated with Wazuh API")
+                return self.token
+                
+            except httpx.HTTPError as e:
+                logger.error(f"Failed to authenticate with Wazuh API: {str(e)}")
+                self.token = None
+                self.token_expires_at = 0.0
+                return None
     
-    def _make_request(self, endpoint: str, method: str = 'GET', params: Optional[Dict] = None) -> Optional[Dict]:
+    async def _make_request(self, endpoint: str, method: str = 'GET', params: Optional[Dict] = None) -> Optional[Dict]:
         """Make authenticated request to Wazuh API"""
-        if not self.token:
-            self.token = self._get_token()
-            
-        if not self.token:
+        token = await self._get_token()
+        
+        if not token:
             return {"error": "Authentication failed", "data": []}
         
         try:
             headers = {
-                'Authorization': f'Bearer {self.token}',
+                'Authorization': f'Bearer {token}',
                 'Content-Type': 'application/json'
             }
             
-            url = f"{self.api_url}{endpoint}"
-            response = requests.request(
-                method,
-                url,
-                headers=headers,
-                params=params,
-                verify=self.verify_ssl,
-                timeout=15
-            )
+            client = self._get_client()
+            response = await client.request(method, endpoint, headers=headers, params=params)
             
-            # Token expired, retry with new token
+            # Token revoked or expired early, retry once with a fresh token
             if response.status_code == 401:
-                logger.info("Token expired, re-authenticating...")
-                self.token = self._get_token()
-                if self.token:
-                    headers['Authorization'] = f'Bearer {self.token}'
-                    response = requests.request(
-                        method,
-                        url,
-                        headers=headers,
-                        params=params,
-                        verify=self.verify_ssl,
-                        timeout=15
-                    )
+                logger.info("Token rejected, re-authenticating...")
+                token = await self._get_token(stale=token)
+                if token:
+                    headers['Authorization'] = f'Bearer {token}'
+                    response = await client.request(method, endpoint, headers=headers, params=params)
             
             response.raise_for_status()
             return response.json()
             
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Wazuh API request failed: {str(e)}")
             return {"error": str(e), "data": []}
     
-    def get_agents(self, limit: int = 100) -> List[Dict]:
+    async def _load_metadata(self, key: Tuple, endpoint: str, params: Optional[Dict]) -> Optional[Dict]:
+        result = await self._make_request(endpoint, params=params)
+        if result and not result.get('error'):
+            self._metadata[key] = (time.monotonic(), result)
+        return result
+    
+    def _spawn(self, coro: Awaitable) -> None:
+        task = asyncio.ensure_future(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+    
+    async def _cached_request(self, endpoint: str, ttl: float, params: Optional[Dict] = None) -> Optional[Dict]:
+        """
+        GET a slowly-changing resource through the metadata cache
+        
+        Fresh entries are served locally; entries past REFRESH_AHEAD_RATIO of
+        their TTL are still served but refreshed in the background; expired or
+        missing entries are loaded inline, with concurrent loads coalesced.
+        Error responses are never cached.
+        """
+        key = (endpoint, tuple(sorted((params or {}).items())))
+        load = lambda: self._load_metadata(key, endpoint, params)
+        entry = self._metadata.get(key)
+        if entry is not None:
+            age = time.monotonic() - entry[0]
+            if age < ttl:
+                if age >= ttl * REFRESH_AHEAD_RATIO:
+                    self._spawn(self._metadata_flight.do(key, load))
+                return entry[1]
+        return await self._metadata_flight.do(key, load)
+    
+    def invalidate_metadata(self):
+        """Drop cached metadata responses (lookup tables are kept until reloaded)"""
+        self._metadata.clear()
+    
+    async def _load_index(self, name: str, endpoint: str, key_fields: Tuple[str, ...]) -> Optional[Dict[str, Dict]]:
+        index: Dict[str, Dict] = {}
+        try:
+            async for item in self._iter_items(endpoint, {}):
+                key = next((item.get(f) for f in key_fields if item.get(f) is not None), None)
+                if key is not None:
+                    index[str(key)] = item
+        except Exception as e:
+            logger.error(f"Failed to load Wazuh {name}: {str(e)}")
+            return None
+        self._index_loaded_at[name] = time.monotonic()
+        logger.info(f"Loaded {len(index)} Wazuh {name}")
+        return index
+    
+    async def load_rules(self) -> int:
+        """Preload every rule into the in-memory index keyed by rule id"""
+        index = await self._load_index('rules', '/rules', ('id',))
+        if index is not None:
+            self.rules = index
+        return len(self.rules)
+    
+    async def load_mitre(self) -> int:
+        """Preload MITRE ATT&CK techniques keyed by technique id (e.g. T1110)"""
+        index = await self._load_index('mitre', '/mitre', ('external_id', 'id'))
+        if index is not None:
+            self.mitre_techniques = index
+        return len(self.mitre_techniques)
+    
+    async def _refresh_indexes(self):
+        """Refresh-ahead loop for the rule and MITRE lookup tables"""
+        loaders = (('rules', RULES_TTL, self.load_rules), ('mitre', MITRE_TTL, self.load_mitre))
+        while True:
+            for name, ttl, loader in loaders:
+                loaded_at = self._index_loaded_at[name]
+                if loaded_at is None or time.monotonic() - loaded_at >= ttl * REFRESH_AHEAD_RATIO:
+                    await loader()
+            await asyncio.sleep(min(60.0, min(ttl for _, ttl, _ in loaders) * (1 - REFRESH_AHEAD_RATIO)))
+    
+    def start_metadata_refresh(self):
+        """Preload rules/MITRE and keep them fresh in the background"""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_indexes())
+    
+    def rule_for_alert(self, alert: Dict) -> Optional[Dict]:
+        """Local rule lookup for an alert; no API call"""
+        rule_id = (alert.get('rule') or {}).get('id')
+        return self.rules.get(str(rule_id)) if rule_id is not None else None
+    
+    def mitre_for_alert(self, alert: Dict) -> Tuple[List[str], List[str]]:
+        """
+        MITRE technique ids and tactic names for a raw alert, from its embedded
+        rule.mitre block or else the cached rule index; no API call
+        """
+        mitre = (alert.get('rule') or {}).get('mitre') or (self.rule_for_alert(alert) or {}).get('mitre') or {}
+        techniques = [str(t) for t in mitre.get('id') or []]
+        tactics = list(mitre.get('tactic') or [])
+        if not tactics:
+            for technique in techniques:
+                info = self.mitre_techniques.get(technique) or {}
+                tactics.extend(info.get('tactics') or [])
+        return techniques, list(dict.fromkeys(str(t) for t in tactics))
+    
+    def technique_name(self, technique_id: str) -> Optional[str]:
+        return (self.mitre_techniques.get(technique_id) or {}).get('name')
+    
+    async def get_agents(self, limit: int = 100) -> List[Dict]:
         """Get list of Wazuh agents"""
-        result = self._make_request('/agents', params={'limit': limit})
+        result = await self._cached_request('/agents', AGENTS_TTL, params={'limit': limit})
         if result and 'data' in result:
             data = result['data']
             # Handle case where data might be a list or dict
@@ -118,9 +284,9 @@ class WazuhService:
                 return data.get('affected_items', [])
         return []
     
-    def get_agent_details(self, agent_id: str) -> Optional[Dict]:
+    async def get_agent_details(self, agent_id: str) -> Optional[Dict]:
         """Get detailed information about a specific agent"""
-        result = self._make_request(f'/agents/{agent_id}')
+        result = await self._cached_request(f'/agents/{agent_id}', AGENTS_TTL)
         if result and 'data' in result:
             data = result['data']
             if isinstance(data, list):
@@ -130,15 +296,7 @@ class WazuhService:
                 return items[0] if items else None
         return None
     
-    def get_alerts(self, limit: int = 100, offset: int = 0, severity: Optional[str] = None) -> List[Dict]:
-        """
-        Get alerts from Wazuh
-        
-        Args:
-            limit: Maximum number of alerts to retrieve
-            offset: Offset for pagination
-            severity: Filter by severity level (low, medium, high, critical)
-        """
+    def _alert_params(self, limit: int, offset: int, severity: Optional[str]) -> Dict:
         params = {
             'limit': limit,
             'offset': offset,
@@ -154,20 +312,134 @@ class WazuhService:
                 'critical': '12-15'
             }
             params['rule.level'] = severity_map.get(severity.lower(), '0-15')
+        return params
+    
+    async def get_alerts(self, limit: int = 100, offset: int = 0, severity: Optional[str] = None) -> List[Dict]:
+        """
+        Get alerts from Wazuh
         
-        result = self._make_request('/alerts', params=params)
+        Args:
+            limit: Maximum number of alerts to retrieve
+            offset: Offset for pagination
+            severity: Filter by severity level (low, medium, high, critical)
+        """
+        result = await self._make_request('/alerts', params=self._alert_params(limit, offset, severity))
         if result and 'data' in result:
             return result['data'].get('affected_items', [])
         return []
     
-    def get_security_events(self, limit: int = 100) -> List[Dict]:
+    async def _count(self, endpoint: str, params: Dict) -> int:
+        """Get total_affected_items for a list endpoint with a one-item probe"""
+        result = await self._make_request(endpoint, params={**params, 'limit': 1, 'offset': 0})
+        if result and not result.get('error') and isinstance(result.get('data'), dict):
+            return int(result['data'].get('total_affected_items', 0))
+        raise RuntimeError(f"Failed to count {endpoint}: {result.get('error') if result else 'no response'}")
+    
+    async def _get_page(self, endpoint: str, params: Dict, limit: int, offset: int, retries: int = 2) -> List[Dict]:
+        """Fetch one page for bulk iteration; unlike the list helpers, a failed page raises instead of returning []"""
+        for attempt in range(retries + 1):
+            result = await self._make_request(endpoint, params={**params, 'limit': limit, 'offset': offset})
+            if result and not result.get('error') and isinstance(result.get('data'), dict):
+                return result['data'].get('affected_items', [])
+            if attempt < retries:
+                await asyncio.sleep(0.5 * (attempt + 1))
+        raise RuntimeError(f"Failed to fetch {endpoint} at offset {offset}: {result.get('error') if result else 'no response'}")
+    
+    async def _iter_items(
+        self,
+        endpoint: str,
+        params: Dict,
+        page_size: int = BULK_PAGE_SIZE,
+        window: int = BULK_WINDOW,
+        offset: int = 0,
+        max_items: Optional[int] = None
+    ) -> AsyncIterator[Dict]:
+        """
+        Stream a paginated list endpoint in order, fetching up to `window` pages concurrently
+        
+        Learns the total first, then keeps a bounded window of page requests in
+        flight and yields each page as soon as it is next in order, so memory
+        stays at roughly `window * page_size` items however large the listing.
+        """
+        total = await self._count(endpoint, params)
+        end = total if max_items is None else min(total, offset + max_items)
+        page_offsets = iter(range(offset, end, page_size))
+        in_flight: Deque[asyncio.Task] = deque()
+        
+        def schedule_next() -> None:
+            page_offset = next(page_offsets, None)
+            if page_offset is not None:
+                limit = min(page_size, end - page_offset)
+                in_flight.append(asyncio.create_task(self._get_page(endpoint, params, limit, page_offset)))
+        
+        try:
+            for _ in range(max(1, window)):
+                schedule_next()
+            while in_flight:
+                items = await in_flight.popleft()
+                schedule_next()
+                for item in items:
+                    yield item
+        finally:
+            for task in in_flight:
+                task.cancel()
+    
+    async def count_alerts(self, severity: Optional[str] = None) -> int:
+        """Get the total number of alerts matching a severity filter"""
+        return await self._count('/alerts', self._alert_params(1, 0, severity))
+    
+    async def iter_alerts(
+        self,
+        page_size: int = BULK_PAGE_SIZE,
+        window: int = BULK_WINDOW,
+        offset: int = 0,
+        max_items: Optional[int] = None,
+        severity: Optional[str] = None
+    ) -> AsyncIterator[Dict]:
+        """
+        Stream alerts in order, fetching up to `window` pages concurrently
+        
+        Args:
+            page_size: Alerts per request
+            window: Maximum pages in flight
+            offset: Starting offset
+            max_items: Stop after this many alerts (default: all)
+            severity: Filter by severity level (low, medium, high, critical)
+        """
+        params = self._alert_params(page_size, offset, severity)
+        async for alert in self._iter_items('/alerts', params, page_size, window, offset, max_items):
+            yield alert
+    
+    async def get_alerts_since(self, timestamp: Optional[str] = None, limit: int = 500, offset: int = 0) -> List[Dict]:
+        """
+        Get alerts at or after a timestamp, ordered by (timestamp, id) (for incremental sync)
+        
+        Args:
+            timestamp: Lower bound (inclusive); None starts from the oldest alert
+            limit: Maximum number of alerts to retrieve
+            offset: Alerts to skip past the lower bound
+        """
+        params = {
+            'limit': limit,
+            'offset': offset,
+            'sort': '+timestamp,+id'
+        }
+        if timestamp:
+            params['q'] = f'timestamp>={timestamp}'
+        
+        result = await self._make_request('/alerts', params=params)
+        if result and 'data' in result:
+            return result['data'].get('affected_items', [])
+        return []
+    
+    async def get_security_events(self, limit: int = 100) -> List[Dict]:
         """Get recent security events from Wazuh"""
-        result = self._make_request('/security/events', params={'limit': limit})
+        result = await self._make_request('/security/events', params={'limit': limit})
         if result and 'data' in result:
             return result['data'].get('affected_items', [])
         return []
     
-    def get_fim_events(self, agent_id: Optional[str] = None, limit: int = 100) -> List[Dict]:
+    async def get_fim_events(self, agent_id: Optional[str] = None, limit: int = 100) -> List[Dict]:
         """
         Get File Integrity Monitoring events
         
@@ -178,40 +450,45 @@ class WazuhService:
         params = {'limit': limit}
         
         endpoint = '/syscheck' if not agent_id else f'/syscheck/{agent_id}'
-        result = self._make_request(endpoint, params=params)
+        result = await self._make_request(endpoint, params=params)
         
         if result and 'data' in result:
             return result['data'].get('affected_items', [])
         return []
     
-    def get_vulnerability_detector(self, agent_id: Optional[str] = None) -> List[Dict]:
+    async def get_vulnerability_detector(self, agent_id: Optional[str] = None) -> List[Dict]:
         """Get vulnerability information from agents"""
         endpoint = '/vulnerability' if not agent_id else f'/vulnerability/{agent_id}'
-        result = self._make_request(endpoint)
+        result = await self._make_request(endpoint)
         
         if result and 'data' in result:
             return result['data'].get('affected_items', [])
         return []
     
-    def get_rule_info(self, rule_id: str) -> Optional[Dict]:
-        """Get information about a specific Wazuh rule"""
-        result = self._make_request(f'/rules/{rule_id}')
+    async def get_rule_info(self, rule_id: str) -> Optional[Dict]:
+        """Get information about a specific Wazuh rule (served from the preloaded index when possible)"""
+        rule = self.rules.get(str(rule_id))
+        if rule:
+            return rule
+        
+        result = await self._cached_request(f'/rules/{rule_id}', RULES_TTL)
         if result and 'data' in result:
             items = result['data'].get('affected_items', [])
+            if items:
+                self.rules[str(rule_id)] = items[0]
             return items[0] if items else None
         return None
     
-    def get_mitre_attack_info(self) -> List[Dict]:
-        """Get MITRE ATT&CK framework mappings from Wazuh"""
-        result = self._make_request('/mitre')
-        if result and 'data' in result:
-            return result['data'].get('affected_items', [])
-        return []
+    async def get_mitre_attack_info(self) -> List[Dict]:
+        """Get MITRE ATT&CK framework mappings from Wazuh (served from the preloaded index)"""
+        if not self.mitre_techniques:
+            await self._metadata_flight.do('mitre_index', self.load_mitre)
+        return list(self.mitre_techniques.values())
     
-    def health_check(self) -> Dict:
+    async def health_check(self) -> Dict:
         """Check Wazuh service health"""
         try:
-            result = self._make_request('/')
+            result = await self._make_request('/')
             if result and not result.get('error'):
                 return {
                     'status': 'healthy',
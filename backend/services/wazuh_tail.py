@@ -0,0 +1,214 @@
+"""
+Wazuh Alert File Tailer
+Follows the manager's JSON-lines alert log (alerts.json) and pushes new
+alerts through the same storage and enrichment path as the API sync. The
+byte offset and inode are checkpointed in `sync_state`, so a restart resumes
+where it left off; rotation (new inode) and truncation are detected and the
+old file is drained before switching.
+
+Runs inside the app lifespan when WAZUH_TAIL_ENABLED=true, or standalone:
+    python -m backend.services.wazuh_tail
+"""
+
+import asyncio
+import json
+import logging
+import os
+from typing import Dict, List, Optional, Tuple
+
+from backend.database import get_db
+from backend.services.wazuh_sync import store_wazuh_alerts
+from backend.utils.config import settings
+from backend.utils.timeutil import utcnow
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_ID = 'wazuh_alerts_file'
+# Longest alert line accepted; longer lines are skipped and counted as oversized
+READ_CHUNK = 1024 * 1024
+
+
+class WazuhAlertTailer:
+    """Tails alerts.json in line batches with an (inode, offset) checkpoint"""
+    
+    def __init__(
+        self,
+        path: str = settings.WAZUH_ALERTS_FILE,
+        batch_size: int = settings.WAZUH_TAIL_BATCH,
+        poll_interval: float = settings.WAZUH_TAIL_POLL_INTERVAL,
+    ):
+        self.path = path
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._file = None
+        self._inode: Optional[int] = None
+        self._offset = 0
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {'lines': 0, 'stored': 0, 'bad_lines': 0, 'oversized': 0, 'rotations': 0, 'truncations': 0}
+    
+    async def load_checkpoint(self) -> Tuple[Optional[int], int]:
+        doc = await get_db().sync_state.find_one({'_id': CHECKPOINT_ID})
+        if not doc or doc.get('path') != self.path:
+            return None, 0
+        return doc.get('inode'), doc.get('offset', 0)
+    
+    async def save_checkpoint(self):
+        await get_db().sync_state.update_one(
+            {'_id': CHECKPOINT_ID},
+            {'$set': {
+                'path': self.path,
+                'inode': self._inode,
+                'offset': self._offset,
+                'updatedAt': utcnow(),
+            }},
+            upsert=True
+        )
+    
+    def _open(self, offset: int = 0) -> bool:
+        try:
+            f = open(self.path, 'rb')
+        except FileNotFoundError:
+            return False
+        st = os.fstat(f.fileno())
+        self._file = f
+        self._inode = st.st_ino
+        self._offset = offset if offset <= st.st_size else 0
+        f.seek(self._offset)
+        return True
+    
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+        self._file = None
+    
+    def _read_lines(self) -> Tuple[List[bytes], int]:
+        """Read up to batch_size complete lines; returns (lines, bytes consumed)"""
+        f = self._file
+        f.seek(self._offset)
+        lines: List[bytes] = []
+        consumed = 0
+        while len(lines) < self.batch_size:
+            line = f.readline(READ_CHUNK)
+            if len(line) == READ_CHUNK and not line.endswith(b'\n'):
+                rest = self._skip_line(f)
+                if rest is None:
+                    # Oversized line still being written; retry once it is complete
+                    break
+                logger.warning(f"Skipping {len(line) + rest} byte line in {self.path}")
+                self.stats['oversized'] += 1
+                consumed += len(line) + rest
+                continue
+            if not line or not line.endswith(b'\n'):
+                # EOF or a line the manager is still writing
+                break
+            consumed += len(line)
+            if line.strip():
+                lines.append(line)
+        return lines, consumed
+    
+    @staticmethod
+    def _skip_line(f) -> Optional[int]:
+        """Bytes up to and including the next newline, or None if the file ends first"""
+        skipped = 0
+        while True:
+            chunk = f.readline(READ_CHUNK)
+            skipped += len(chunk)
+            if chunk.endswith(b'\n'):
+                return skipped
+            if len(chunk) < READ_CHUNK:
+                return None
+    
+    def _check_rotation(self) -> bool:
+        """At EOF: switch to a new file or rewind after truncation. True if anything changed"""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        if st.st_ino != self._inode:
+            logger.info(f"{self.path} rotated, following new file")
+            self.stats['rotations'] += 1
+            self._close()
+            return self._open(0)
+        if st.st_size < self._offset:
+            logger.info(f"{self.path} truncated, rewinding")
+            self.stats['truncations'] += 1
+            self._offset = 0
+            return True
+        return False
+    
+    def _parse(self, lines: List[bytes]) -> List[Dict]:
+        alerts = []
+        for line in lines:
+            try:
+                alerts.append(json.loads(line))
+            except ValueError:
+                self.stats['bad_lines'] += 1
+        return alerts
+    
+    async def tail_once(self) -> int:
+        """Process one batch. Returns the number of lines consumed"""
+        if self._file is None:
+            inode, offset = await self.load_checkpoint()
+            if not await asyncio.to_thread(self._open, 0):
+                return 0
+            if inode == self._inode:
+                self._offset = offset if offset <= os.fstat(self._file.fileno()).st_size else 0
+        
+        lines, consumed = await asyncio.to_thread(self._read_lines)
+        if not consumed:
+            if await asyncio.to_thread(self._check_rotation):
+                await self.save_checkpoint()
+            return 0
+        
+        alerts = self._parse(lines)
+        if alerts:
+            self.stats['stored'] += await store_wazuh_alerts(alerts)
+        self.stats['lines'] += len(lines)
+        self._offset += consumed
+        await self.save_checkpoint()
+        return len(lines)
+    
+    async def run(self):
+        logger.info(f"Tailing Wazuh alerts from {self.path}")
+        try:
+            while True:
+                try:
+                    consumed = await self.tail_once()
+                    if consumed >= self.batch_size:
+                        # Still catching up; read the next batch straight away
+                        continue
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Wazuh alert tail failed: {str(e)}")
+                await asyncio.sleep(self.poll_interval)
+        finally:
+            self._close()
+    
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+    
+    def snapshot(self) -> Dict:
+        return {
+            'enabled': self._task is not None,
+            'path': self.path,
+            'inode': self._inode,
+            'offset': self._offset,
+            **self.stats,
+        }
+
+
+# Singleton instance
+wazuh_tailer = WazuhAlertTailer()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(wazuh_tailer.run())
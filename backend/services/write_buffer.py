@@ -0,0 +1,231 @@
+"""
+Write-Behind Buffer
+Collects single-document inserts and flushes them to MongoDB as unordered
+insert_many batches on a size or time trigger, with bounded memory and
+backpressure when the database can't keep up. When the ingest spool is enabled,
+batches that MongoDB can't take are written to the spool instead of failing.
+"""
+
+import asyncio
+import math
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+
+from backend.database import get_db
+from backend.services.spool import UNAVAILABLE_ERRORS, ingest_spool
+from backend.utils.config import settings
+from backend.utils.logger import get_logger
+
+log = get_logger(__name__)
+
+
+class BufferFull(Exception):
+    """Raised when the buffer is at capacity; callers should answer 429"""
+
+    def __init__(self, collection: str, retry_after: int):
+        super().__init__(f"{collection} write buffer is full")
+        self.retry_after = retry_after
+
+
+class WriteBehindBuffer:
+    """Micro-batching insert buffer for one collection"""
+
+    def __init__(self, collection: str, max_batch: int, max_delay: float, max_pending: int):
+        self.collection = collection
+        self.max_batch = max(1, max_batch)
+        self.max_delay = max_delay
+        self.max_pending = max(self.max_batch, max_pending)
+        self._pending: List[Tuple[Dict, Optional[asyncio.Future]]] = []
+        self._not_empty = asyncio.Event()
+        self._full = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self._listeners: List[Callable[[List[Dict]], Awaitable]] = []
+        self.metrics = {
+            "submitted": 0,
+            "rejected": 0,
+            "spooled": 0,
+            "flushes": 0,
+            "flushed_docs": 0,
+            "failed_docs": 0,
+            "last_batch_size": 0,
+            "max_batch_size": 0,
+            "last_flush_ms": 0.0,
+            "max_flush_ms": 0.0,
+            "total_flush_ms": 0.0,
+        }
+
+    def add_listener(self, callback: Callable[[List[Dict]], Awaitable]):
+        """Register an async callback run with every batch of documents once it is stored"""
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    async def _notify(self, docs: List[Dict]):
+        for callback in self._listeners:
+            try:
+                await callback(docs)
+            except Exception as e:
+                log.error(f"{self.collection} write listener failed: {e}")
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._closing = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Flush everything still pending, then stop the flusher"""
+        self._closing = True
+        self._not_empty.set()
+        self._full.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+    def _retry_after(self) -> int:
+        batches_ahead = len(self._pending) / self.max_batch
+        avg_flush = self.metrics["total_flush_ms"] / max(1, self.metrics["flushes"]) / 1000
+        return max(1, math.ceil(batches_ahead * max(avg_flush, self.max_delay)))
+
+    async def submit(self, doc: Dict) -> ObjectId:
+        """Queue a document and wait until its batch is written; returns its _id"""
+        doc.setdefault("_id", ObjectId())
+        if self._closing:
+            # Shutting down: write through rather than queueing behind the final flush
+            if ingest_spool is not None and ingest_spool.degraded:
+                await self._spool([doc])
+            else:
+                await get_db()[self.collection].insert_one(doc)
+            await self._notify([doc])
+            return doc["_id"]
+        if len(self._pending) >= self.max_pending:
+            if ingest_spool is not None:
+                # MongoDB is falling behind; accept at disk speed instead of rejecting
+                await self._spool([doc])
+                await self._notify([doc])
+                return doc["_id"]
+            self.metrics["rejected"] += 1
+            raise BufferFull(self.collection, self._retry_after())
+
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((doc, future))
+        self.metrics["submitted"] += 1
+        self._not_empty.set()
+        if len(self._pending) >= self.max_batch:
+            self._full.set()
+        return await future
+
+    def enqueue(self, doc: Dict) -> bool:
+        """Queue a document without waiting for its write; False when full"""
+        if self._closing or len(self._pending) >= self.max_pending:
+            return False
+        doc.setdefault("_id", ObjectId())
+        self.start()
+        self._pending.append((doc, None))
+        self.metrics["submitted"] += 1
+        self._not_empty.set()
+        if len(self._pending) >= self.max_batch:
+            self._full.set()
+        return True
+
+    async def _run(self):
+        while True:
+            if not self._pending:
+                if self._closing:
+                    return
+                self._not_empty.clear()
+                await self._not_empty.wait()
+                continue
+            if not self._closing and len(self._pending) < self.max_batch:
+                # Give the batch up to max_delay to fill
+                self._full.clear()
+                try:
+                    await asyncio.wait_for(self._full.wait(), timeout=self.max_delay)
+                except asyncio.TimeoutError:
+                    pass
+            batch = self._pending[:self.max_batch]
+            del self._pending[:self.max_batch]
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[Tuple[Dict, Optional[asyncio.Future]]]):
+        docs = [doc for doc, _ in batch]
+        failed: Dict[int, Exception] = {}
+        start = time.perf_counter()
+        try:
+            if ingest_spool is not None and ingest_spool.degraded:
+                await self._spool(docs)
+            else:
+                await get_db()[self.collection].insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            for err in e.details.get("writeErrors", []):
+                failed[err["index"]] = Exception(err.get("errmsg", "write failed"))
+        except UNAVAILABLE_ERRORS as e:
+            if ingest_spool is None:
+                log.error(f"{self.collection} batch insert of {len(docs)} docs failed: {e}")
+                failed = {i: e for i in range(len(docs))}
+            else:
+                ingest_spool.mark_degraded(e)
+                try:
+                    await self._spool(docs)
+                except Exception as spool_error:
+                    log.error(f"Spooling {len(docs)} {self.collection} docs failed: {spool_error}")
+                    failed = {i: spool_error for i in range(len(docs))}
+        except Exception as e:
+            log.error(f"{self.collection} batch insert of {len(docs)} docs failed: {e}")
+            failed = {i: e for i in range(len(docs))}
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        m = self.metrics
+        m["flushes"] += 1
+        m["flushed_docs"] += len(docs) - len(failed)
+        m["failed_docs"] += len(failed)
+        m["last_batch_size"] = len(docs)
+        m["max_batch_size"] = max(m["max_batch_size"], len(docs))
+        m["last_flush_ms"] = round(elapsed_ms, 2)
+        m["max_flush_ms"] = round(max(m["max_flush_ms"], elapsed_ms), 2)
+        m["total_flush_ms"] += elapsed_ms
+
+        for i, (doc, future) in enumerate(batch):
+            if future is None or future.done():
+                continue
+            if i in failed:
+                future.set_exception(failed[i])
+            else:
+                future.set_result(doc["_id"])
+
+        if len(failed) < len(docs):
+            await self._notify([doc for i, doc in enumerate(docs) if i not in failed])
+
+    async def _spool(self, docs: List[Dict]):
+        await ingest_spool.append(self.collection, docs)
+        self.metrics["spooled"] += len(docs)
+
+    def snapshot(self) -> Dict:
+        m = self.metrics
+        return {
+            "collection": self.collection,
+            "pending": len(self._pending),
+            "max_pending": self.max_pending,
+            "max_batch": self.max_batch,
+            "max_delay_ms": round(self.max_delay * 1000, 1),
+            **{k: v for k, v in m.items() if k != "total_flush_ms"},
+            "avg_batch_size": round(m["flushed_docs"] / m["flushes"], 2) if m["flushes"] else 0.0,
+            "avg_flush_ms": round(m["total_flush_ms"] / m["flushes"], 2) if m["flushes"] else 0.0,
+        }
+
+
+def _buffer(collection: str) -> WriteBehindBuffer:
+    return WriteBehindBuffer(
+        collection,
+        max_batch=settings.WRITE_BUFFER_MAX_BATCH,
+        max_delay=settings.WRITE_BUFFER_MAX_DELAY_MS / 1000,
+        max_pending=settings.WRITE_BUFFER_MAX_PENDING,
+    )
+
+
+alert_buffer = _buffer("alerts")
+log_buffer = _buffer("logs")
+buffers = (alert_buffer, log_buffer)
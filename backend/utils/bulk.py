@@ -0,0 +1,103 @@
+import json
+import zlib
+from typing import Any, AsyncIterator, Tuple
+
+NDJSON_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl", "application/x-jsonlines"}
+
+# Most decompressed bytes produced per step, so a small gzip bomb can't
+# expand all at once
+DECODE_CHUNK = 64 * 1024
+
+
+class BodyTooLarge(Exception):
+    pass
+
+
+async def _decoded_chunks(stream: AsyncIterator[bytes], gzipped: bool) -> AsyncIterator[bytes]:
+    if not gzipped:
+        async for chunk in stream:
+            yield chunk
+        return
+    # wbits=16+MAX_WBITS accepts the gzip header and trailer
+    inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    async for chunk in stream:
+        out = inflater.decompress(chunk, DECODE_CHUNK)
+        while out:
+            yield out
+            out = inflater.decompress(inflater.unconsumed_tail, DECODE_CHUNK)
+    tail = inflater.flush()
+    if tail:
+        yield tail
+
+
+def _parse_line(line: bytes) -> Any:
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return e
+
+
+async def iter_json_records(
+    stream: AsyncIterator[bytes],
+    content_type: str = "",
+    content_encoding: str = "",
+    max_array_bytes: int = 0,
+    max_record_bytes: int = 0,
+) -> AsyncIterator[Tuple[int, Any]]:
+    """
+    Yield (position, record) pairs from a JSON array or NDJSON request body.
+
+    NDJSON is parsed line by line as it streams in, with each line bounded by
+    `max_record_bytes`. A JSON array has to be buffered, bounded by
+    `max_array_bytes` (0 = unbounded in both cases). A line that is not
+    valid JSON yields its ValueError instead of a record, so callers can
+    report it by position without failing the rest of the batch.
+    """
+    gzipped = "gzip" in (content_encoding or "").lower()
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    chunks = _decoded_chunks(stream, gzipped)
+
+    # Sniff the first meaningful byte when the content type doesn't say
+    buffer = bytearray()
+    async for chunk in chunks:
+        # Leading whitespace is dropped rather than accumulated
+        buffer += chunk.lstrip() if not buffer else chunk
+        if buffer:
+            break
+    is_array = media_type not in NDJSON_TYPES and buffer.startswith(b"[")
+
+    if is_array:
+        async for chunk in chunks:
+            buffer += chunk
+            if max_array_bytes and len(buffer) > max_array_bytes:
+                raise BodyTooLarge(f"JSON array body exceeds {max_array_bytes} bytes; use NDJSON")
+        records = json.loads(buffer)
+        if not isinstance(records, list):
+            raise ValueError("Expected a JSON array")
+        for position, record in enumerate(records):
+            yield position, record
+        return
+
+    position = 0
+    # Only bytes after `scanned` are searched for the next newline
+    scanned = 0
+    while True:
+        start = 0
+        while (end := buffer.find(b"\n", scanned)) != -1:
+            if max_record_bytes and end - start > max_record_bytes:
+                raise BodyTooLarge(f"NDJSON record exceeds {max_record_bytes} bytes")
+            line = bytes(buffer[start:end])
+            if line.strip():
+                yield position, _parse_line(line)
+                position += 1
+            start = scanned = end + 1
+        if max_record_bytes and len(buffer) - start > max_record_bytes:
+            raise BodyTooLarge(f"NDJSON record exceeds {max_record_bytes} bytes")
+        del buffer[:start]
+        scanned = len(buffer)
+        try:
+            buffer += await chunks.__anext__()
+        except StopAsyncIteration:
+            break
+    if buffer.strip():
+        yield position, _parse_line(bytes(buffer))
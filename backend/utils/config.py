@@ -11,6 +11,7 @@ class Settings:
     # MongoDB
     MONGO_URI: str = os.getenv("MONGO_URI", "mongodb://localhost:27017")
     MONGO_DB_NAME: str = os.getenv("MONGO_DB_NAME", "SentinalX")
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
 
     # Integrations
     VIRUSTOTAL_API_KEY: Optional[str] = os.getenv("VIRUSTOTAL_API_KEY")
@@ -18,11 +19,109 @@ class Settings:
     OTX_API_KEY: Optional[str] = os.getenv("OTX_API_KEY")
     SLACK_WEBHOOK_URL: Optional[str] = os.getenv("SLACK_WEBHOOK_URL")
 
+    # Outbound HTTP (threat intel + notifications)
+    HTTP_TIMEOUT: float = float(os.getenv("HTTP_TIMEOUT", "10"))
+    HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    HTTP_MAX_KEEPALIVE: int = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+    HTTP_KEEPALIVE_EXPIRY: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+    HTTP2_ENABLED: bool = os.getenv("HTTP2_ENABLED", "false").lower() == "true"
+
+    # Enrichment
+    ENRICHMENT_CONCURRENCY: int = int(os.getenv("ENRICHMENT_CONCURRENCY", "10"))
+    ENRICHMENT_JOB_WORKERS: int = int(os.getenv("ENRICHMENT_JOB_WORKERS", "2"))
+    ENRICHMENT_JOB_CHUNK: int = int(os.getenv("ENRICHMENT_JOB_CHUNK", "25"))
+    ENRICHMENT_JOB_LEASE: float = float(os.getenv("ENRICHMENT_JOB_LEASE", "60"))
+
+    # Threat intel provider rate limits (0 quota = unlimited)
+    VIRUSTOTAL_RATE_PER_MIN: int = int(os.getenv("VIRUSTOTAL_RATE_PER_MIN", "4"))
+    VIRUSTOTAL_DAILY_QUOTA: int = int(os.getenv("VIRUSTOTAL_DAILY_QUOTA", "500"))
+    ABUSEIPDB_RATE_PER_MIN: int = int(os.getenv("ABUSEIPDB_RATE_PER_MIN", "60"))
+    ABUSEIPDB_DAILY_QUOTA: int = int(os.getenv("ABUSEIPDB_DAILY_QUOTA", "1000"))
+    OTX_RATE_PER_MIN: int = int(os.getenv("OTX_RATE_PER_MIN", "150"))
+    OTX_DAILY_QUOTA: int = int(os.getenv("OTX_DAILY_QUOTA", "10000"))
+    INTEL_RATE_LIMIT_WAIT: float = float(os.getenv("INTEL_RATE_LIMIT_WAIT", "30"))
+
+    # Threat intel circuit breakers / adaptive timeouts
+    BREAKER_FAILURE_THRESHOLD: int = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+    BREAKER_RESET_TIMEOUT: float = float(os.getenv("BREAKER_RESET_TIMEOUT", "30"))
+    BREAKER_HALF_OPEN_PROBES: int = int(os.getenv("BREAKER_HALF_OPEN_PROBES", "1"))
+    ADAPTIVE_TIMEOUT_MIN: float = float(os.getenv("ADAPTIVE_TIMEOUT_MIN", "1.5"))
+    ADAPTIVE_TIMEOUT_MULTIPLIER: float = float(os.getenv("ADAPTIVE_TIMEOUT_MULTIPLIER", "2.0"))
+
+    # Threat intel reputation cache (TTLs in seconds)
+    INTEL_CACHE_MAX_ENTRIES: int = int(os.getenv("INTEL_CACHE_MAX_ENTRIES", "50000"))
+    INTEL_CACHE_TTL_DEFAULT: int = int(os.getenv("INTEL_CACHE_TTL_DEFAULT", "21600"))
+    INTEL_CACHE_TTL_VIRUSTOTAL: int = int(os.getenv("INTEL_CACHE_TTL_VIRUSTOTAL", "86400"))
+    INTEL_CACHE_TTL_ABUSEIPDB: int = int(os.getenv("INTEL_CACHE_TTL_ABUSEIPDB", "21600"))
+    INTEL_CACHE_TTL_OTX: int = int(os.getenv("INTEL_CACHE_TTL_OTX", "43200"))
+
     # Wazuh Integration
     WAZUH_API_URL: str = os.getenv("WAZUH_API_URL", "https://localhost:55000")
     WAZUH_API_USER: str = os.getenv("WAZUH_API_USER", "wazuh")
     WAZUH_API_PASSWORD: Optional[str] = os.getenv("WAZUH_API_PASSWORD")
     WAZUH_VERIFY_SSL: bool = os.getenv("WAZUH_VERIFY_SSL", "false").lower() == "true"
+    WAZUH_SYNC_ENABLED: bool = os.getenv("WAZUH_SYNC_ENABLED", "false").lower() == "true"
+    WAZUH_SYNC_INTERVAL: float = float(os.getenv("WAZUH_SYNC_INTERVAL", "5"))
+    WAZUH_SYNC_MAX_INTERVAL: float = float(os.getenv("WAZUH_SYNC_MAX_INTERVAL", "60"))
+    WAZUH_SYNC_BATCH: int = int(os.getenv("WAZUH_SYNC_BATCH", "500"))
+    WAZUH_TAIL_ENABLED: bool = os.getenv("WAZUH_TAIL_ENABLED", "false").lower() == "true"
+    WAZUH_ALERTS_FILE: str = os.getenv("WAZUH_ALERTS_FILE", "/var/ossec/logs/alerts/alerts.json")
+    WAZUH_TAIL_BATCH: int = int(os.getenv("WAZUH_TAIL_BATCH", "500"))
+    WAZUH_TAIL_POLL_INTERVAL: float = float(os.getenv("WAZUH_TAIL_POLL_INTERVAL", "0.5"))
+
+    # Bulk ingest
+    BULK_INGEST_BATCH: int = int(os.getenv("BULK_INGEST_BATCH", "1000"))
+    BULK_MAX_ARRAY_BYTES: int = int(os.getenv("BULK_MAX_ARRAY_BYTES", str(64 * 1024 * 1024)))
+    BULK_MAX_RECORD_BYTES: int = int(os.getenv("BULK_MAX_RECORD_BYTES", str(1024 * 1024)))
+    BULK_MAX_ERRORS: int = int(os.getenv("BULK_MAX_ERRORS", "1000"))
+
+    # Write-behind insert buffer (alerts + logs)
+    WRITE_BUFFER_MAX_BATCH: int = int(os.getenv("WRITE_BUFFER_MAX_BATCH", "500"))
+    WRITE_BUFFER_MAX_DELAY_MS: float = float(os.getenv("WRITE_BUFFER_MAX_DELAY_MS", "50"))
+    WRITE_BUFFER_MAX_PENDING: int = int(os.getenv("WRITE_BUFFER_MAX_PENDING", "20000"))
+
+    # Alert deduplication at ingest (repeats fold into count/lastSeen)
+    ALERT_DEDUP_ENABLED: bool = os.getenv("ALERT_DEDUP_ENABLED", "true").lower() == "true"
+    ALERT_DEDUP_FIELDS: str = os.getenv(
+        "ALERT_DEDUP_FIELDS",
+        "source,type,metadata.host|metadata.hostname|metadata.agent.name,metadata.ip|metadata.srcip|metadata.data.srcip",
+    )
+    ALERT_DEDUP_WINDOW: float = float(os.getenv("ALERT_DEDUP_WINDOW", "60"))
+    ALERT_DEDUP_SOURCE_WINDOWS: str = os.getenv("ALERT_DEDUP_SOURCE_WINDOWS", "")  # e.g. "wazuh=300,syslog=0"
+    ALERT_DEDUP_MAX_KEYS: int = int(os.getenv("ALERT_DEDUP_MAX_KEYS", "100000"))
+    ALERT_DEDUP_FLUSH_INTERVAL: float = float(os.getenv("ALERT_DEDUP_FLUSH_INTERVAL", "1"))
+
+    # Dashboard rollup counters
+    ROLLUP_RECONCILE_INTERVAL: float = float(os.getenv("ROLLUP_RECONCILE_INTERVAL", "3600"))
+    ROLLUP_RECONCILE_HOURS: int = int(os.getenv("ROLLUP_RECONCILE_HOURS", "48"))  # 0 = all alerts
+    ROLLUP_RECONCILE_SETTLE: float = float(os.getenv("ROLLUP_RECONCILE_SETTLE", "600"))  # seconds left to in-flight inserts
+
+    # Alert time buckets behind /stats/timeseries
+    BUCKET_MINUTE_RETENTION_HOURS: int = int(os.getenv("BUCKET_MINUTE_RETENTION_HOURS", "6"))
+    BUCKET_HOUR_RETENTION_DAYS: int = int(os.getenv("BUCKET_HOUR_RETENTION_DAYS", "90"))
+    BUCKET_COMPACT_INTERVAL: float = float(os.getenv("BUCKET_COMPACT_INTERVAL", "300"))
+
+    # /stats response cache
+    STATS_CACHE_TTL: float = float(os.getenv("STATS_CACHE_TTL", "15"))
+    STATS_CACHE_MIN_AGE: float = float(os.getenv("STATS_CACHE_MIN_AGE", "2"))
+    STATS_CACHE_MAX_ENTRIES: int = int(os.getenv("STATS_CACHE_MAX_ENTRIES", "256"))
+
+    # Ingest spool (on-disk WAL used while MongoDB is slow or down)
+    SPOOL_ENABLED: bool = os.getenv("SPOOL_ENABLED", "true").lower() == "true"
+    SPOOL_DIR: str = os.getenv("SPOOL_DIR", "data/spool")
+    SPOOL_SEGMENT_BYTES: int = int(os.getenv("SPOOL_SEGMENT_BYTES", str(64 * 1024 * 1024)))
+    SPOOL_FSYNC_INTERVAL_MS: float = float(os.getenv("SPOOL_FSYNC_INTERVAL_MS", "10"))
+    SPOOL_DRAIN_BATCH: int = int(os.getenv("SPOOL_DRAIN_BATCH", "1000"))
+    SPOOL_DRAIN_INTERVAL: float = float(os.getenv("SPOOL_DRAIN_INTERVAL", "5"))
+    SPOOL_MAX_BACKOFF: float = float(os.getenv("SPOOL_MAX_BACKOFF", "60"))
+
+    # Syslog / CEF / LEEF listener (feeds the logs collection)
+    SYSLOG_ENABLED: bool = os.getenv("SYSLOG_ENABLED", "false").lower() == "true"
+    SYSLOG_HOST: str = os.getenv("SYSLOG_HOST", "0.0.0.0")
+    SYSLOG_UDP_PORT: int = int(os.getenv("SYSLOG_UDP_PORT", "5514"))
+    SYSLOG_TCP_PORT: int = int(os.getenv("SYSLOG_TCP_PORT", "5514"))
+    SYSLOG_MAX_MESSAGE: int = int(os.getenv("SYSLOG_MAX_MESSAGE", "65536"))
+    SYSLOG_UDP_RCVBUF: int = int(os.getenv("SYSLOG_UDP_RCVBUF", str(8 * 1024 * 1024)))
 
     # ELK Stack
     ELK_ENDPOINT: str = os.getenv("ELK_ENDPOINT", "http://localhost:9200")
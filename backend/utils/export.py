@@ -0,0 +1,129 @@
+"""
+Streaming export writers.
+Each writer consumes an async iterator of documents and yields encoded byte
+chunks, so memory stays bounded by one chunk/row group regardless of how many
+documents are exported. Parquet needs the optional `pyarrow` package.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator, Dict, List
+
+from backend.utils.timeutil import to_iso
+
+CSV_CHUNK_ROWS = 1000
+PARQUET_ROW_GROUP = 50_000
+
+EXPORT_COLUMNS = ["id", "source", "severity", "type", "status", "description", "createdAt", "lastSeen", "count"]
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+class ExportUnavailable(Exception):
+    pass
+
+
+def _row(doc: Dict) -> Dict:
+    row = {col: doc.get(col) for col in EXPORT_COLUMNS}
+    row["id"] = str(doc["_id"])
+    for col in ("createdAt", "lastSeen"):
+        row[col] = to_iso(row[col])
+    return row
+
+
+def _json_default(value):
+    return to_iso(value) if isinstance(value, datetime) else str(value)
+
+
+async def csv_chunks(docs: AsyncIterator[Dict]) -> AsyncIterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=EXPORT_COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    rows = 0
+    async for doc in docs:
+        writer.writerow(_row(doc))
+        rows += 1
+        if rows % CSV_CHUNK_ROWS == 0:
+            yield buf.getvalue().encode()
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode()
+
+
+async def ndjson_chunks(docs: AsyncIterator[Dict]) -> AsyncIterator[bytes]:
+    lines: List[str] = []
+    async for doc in docs:
+        doc["id"] = str(doc.pop("_id"))
+        lines.append(json.dumps(doc, default=_json_default))
+        if len(lines) >= CSV_CHUNK_ROWS:
+            yield ("\n".join(lines) + "\n").encode()
+            lines = []
+    if lines:
+        yield ("\n".join(lines) + "\n").encode()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that hands written bytes back to the generator"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def require_parquet():
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        raise ExportUnavailable("Parquet export requires the 'pyarrow' package")
+
+
+async def parquet_chunks(docs: AsyncIterator[Dict]) -> AsyncIterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(col, pa.int64() if col == "count" else pa.string()) for col in EXPORT_COLUMNS])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    columns: Dict[str, list] = {col: [] for col in EXPORT_COLUMNS}
+    rows = 0
+    try:
+        async for doc in docs:
+            for col, value in _row(doc).items():
+                columns[col].append(value)
+            rows += 1
+            if rows == PARQUET_ROW_GROUP:
+                writer.write_table(pa.table(columns, schema=schema))
+                columns = {col: [] for col in EXPORT_COLUMNS}
+                rows = 0
+                yield sink.drain()
+        if rows:
+            writer.write_table(pa.table(columns, schema=schema))
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+WRITERS = {
+    "csv": csv_chunks,
+    "ndjson": ndjson_chunks,
+    "parquet": parquet_chunks,
+}
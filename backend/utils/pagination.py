@@ -0,0 +1,86 @@
+"""
+Keyset pagination helpers.
+A cursor is an opaque token encoding the (sort key, _id) of the last item on
+a page. The next page is a range predicate on that pair, so it costs an index
+seek no matter how deep the analyst pages, unlike skip/offset.
+
+Every keyset-paginated endpoint answers with a `Page`: {"items": [...],
+"next_cursor": "..."}; pass next_cursor back as `cursor` for the next page
+(it is null on the last one).
+"""
+
+import base64
+from datetime import datetime
+from typing import Any, Dict, Generic, List, Optional, Tuple, TypeVar
+
+from bson import ObjectId, json_util
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(sort_value: Any, doc_id: ObjectId) -> str:
+    raw = json_util.dumps([sort_value, doc_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Tuple[Any, ObjectId]:
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        sort_value, doc_id = json_util.loads(raw)
+    except Exception:
+        raise InvalidCursor("Invalid cursor")
+    if not isinstance(doc_id, ObjectId):
+        raise InvalidCursor("Invalid cursor")
+    return sort_value, doc_id
+
+
+def keyset_filter(sort_field: str, token: str) -> Dict:
+    """Predicate selecting documents strictly after the cursor in (sort_field desc, _id desc)"""
+    sort_value, doc_id = decode_cursor(token)
+    clauses = [
+        {sort_field: {"$lt": sort_value}},
+        {sort_field: sort_value, "_id": {"$lt": doc_id}},
+    ]
+    if isinstance(sort_value, datetime):
+        # Legacy ISO-string values sort after every date in descending order
+        clauses.append({sort_field: {"$type": "string"}})
+    return {"$or": clauses}
+
+
+async def fetch_page(
+    collection: AsyncIOMotorCollection,
+    query: Dict,
+    sort_field: str,
+    limit: int,
+    cursor: Optional[str] = None,
+    projection: Optional[Dict] = None,
+) -> Tuple[List[Dict], Optional[str]]:
+    """
+    Newest-first page of `query` ordered by (sort_field, _id).
+    Returns (docs, next_cursor); next_cursor is None on the last page.
+    """
+    if cursor:
+        query = {"$and": [query, keyset_filter(sort_field, cursor)]} if query else keyset_filter(sort_field, cursor)
+    docs = await (
+        collection.find(query, projection)
+        .sort([(sort_field, -1), ("_id", -1)])
+        .limit(limit + 1)
+        .to_list(length=limit + 1)
+    )
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        last = docs[-1]
+        next_cursor = encode_cursor(last.get(sort_field), last["_id"])
+    return docs, next_cursor
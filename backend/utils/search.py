@@ -0,0 +1,110 @@
+"""
+Log search tokenization and query parsing.
+Messages are tokenized at ingest into a lowercase `tokens` array backed by a
+multikey index, so term, prefix and phrase queries become index lookups
+instead of an unanchored regex over every message.
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+# Compound tokens keep IPs, hostnames, paths and emails whole ("10.0.0.1");
+# their word parts are indexed too so "example" also finds "user@example.com".
+# A compound query term ("example.com", "10.0.0", "var/log") matches messages
+# that contain it as a substring made of whole words: its word parts narrow
+# the candidates via the index and an escaped regex confirms the substring.
+# Partial words ("xample.com") are not matched.
+COMPOUND_RE = re.compile(r"[a-z0-9_]+(?:[.:\-/@][a-z0-9_]+)*")
+WORD_RE = re.compile(r"[a-z0-9_]+")
+QUERY_RE = re.compile(r'"([^"]+)"|(\S+)')
+
+MAX_TOKEN_LENGTH = 64
+MAX_TOKENS = 256
+MIN_PREFIX_LENGTH = 2
+
+
+def tokenize(text: str) -> List[str]:
+    """Unique index tokens for a message, in order of first appearance"""
+    seen: Dict[str, None] = {}
+    for compound in COMPOUND_RE.findall((text or "").lower()):
+        if len(compound) <= MAX_TOKEN_LENGTH:
+            seen.setdefault(compound)
+        for word in WORD_RE.findall(compound):
+            if len(word) <= MAX_TOKEN_LENGTH:
+                seen.setdefault(word)
+        if len(seen) >= MAX_TOKENS:
+            break
+    return list(seen)[:MAX_TOKENS]
+
+
+def _query_tokens(text: str) -> List[str]:
+    return [t for t in COMPOUND_RE.findall(text.lower()) if len(t) <= MAX_TOKEN_LENGTH]
+
+
+def _substring_clauses(term: str, words: List[str]) -> List[Dict]:
+    words = list(dict.fromkeys(w for w in words if len(w) <= MAX_TOKEN_LENGTH))
+    check = {"message": {"$regex": re.escape(term), "$options": "i"}}
+    return [{"tokens": {"$all": words}}, check] if words else [check]
+
+
+def _term_clauses(term: str) -> List[Dict]:
+    words = WORD_RE.findall(term)
+    if len(words) == 1:
+        return [{"tokens": term}]
+    return _substring_clauses(term, words)
+
+
+def _prefix_clauses(prefix: str) -> List[Dict]:
+    # Anchored, escaped prefix: an index range scan on tokens
+    words = WORD_RE.findall(prefix)
+    if len(words) == 1:
+        return [{"tokens": {"$regex": "^" + re.escape(prefix)}}]
+    # Compound prefix: whole leading words, a prefix on the last, substring check
+    return [
+        {"tokens": {"$all": words[:-1]}},
+        {"tokens": {"$regex": "^" + re.escape(words[-1])}},
+        {"message": {"$regex": re.escape(prefix), "$options": "i"}},
+    ]
+
+
+def parse_query(q: str) -> Tuple[Optional[Dict], List[str], List[str]]:
+    """
+    Parse a search string into a Mongo filter over `tokens`/`message`.
+      error timeout     -> both terms
+      auth*             -> any token starting with "auth"
+      example.com       -> "example" and "com" tokens, then the substring
+      "failed password" -> exact phrase (case-insensitive)
+    Returns (filter, terms, phrases); terms and phrases are used for ranking.
+    The filter is None when the query has nothing searchable in it.
+    """
+    clauses: List[Dict] = []
+    terms: List[str] = []
+    phrases: List[str] = []
+    for phrase, word in QUERY_RE.findall(q):
+        if phrase:
+            tokens = _query_tokens(phrase)
+            if not tokens:
+                continue
+            phrases.append(phrase.lower())
+            terms.extend(tokens)
+            # Word tokens narrow the candidates via the index; the escaped phrase check runs on those only
+            clauses.extend(_substring_clauses(phrase, WORD_RE.findall(phrase.lower())))
+        elif word.endswith("*"):
+            tokens = _query_tokens(word[:-1])
+            if tokens and len(tokens[0]) >= MIN_PREFIX_LENGTH:
+                clauses.extend(_prefix_clauses(tokens[0]))
+                terms.append(tokens[0])
+        else:
+            tokens = _query_tokens(word)
+            terms.extend(tokens)
+            for token in tokens:
+                clauses.extend(_term_clauses(token))
+    if not clauses:
+        return None, terms, phrases
+    return (clauses[0] if len(clauses) == 1 else {"$and": clauses}), terms, phrases
+
+
+def score(message: str, terms: List[str], phrases: List[str]) -> float:
+    """Simple relevance: term frequency with a bonus for phrase hits"""
+    text = (message or "").lower()
+    return sum(text.count(t) for t in terms) + 5 * sum(text.count(p) for p in phrases)
@@ -0,0 +1,24 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one in-flight coroutine"""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        # Shield so one cancelled caller doesn't cancel the call for everyone else
+        return await asyncio.shield(task)
+
+    def __len__(self) -> int:
+        return len(self._calls)
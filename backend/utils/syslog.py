@@ -0,0 +1,256 @@
+"""
+Syslog parsing
+Turns RFC 3164 / RFC 5424 syslog frames, optionally carrying CEF or LEEF
+payloads, into documents shaped like LogIngest (source, message, ip, type, ts).
+Parsing is split/partition based rather than regex heavy so a single worker
+can keep up with firewall-rate traffic.
+"""
+
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+MONTHS = {m: i for i, m in enumerate(
+    ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"), 1)}
+
+SEVERITIES = ("emergency", "alert", "critical", "error", "warning", "notice", "info", "debug")
+
+# Extension keys that carry the event's source address, in preference order
+CEF_SOURCE_IP_KEYS = ("src", "sourceAddress", "c6a2")
+LEEF_SOURCE_IP_KEYS = ("src", "srcIP", "sourceAddress")
+
+CEF_ESCAPES = {"\\\\": "\\", "\\=": "=", "\\|": "|", "\\n": "\n", "\\r": "\r"}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _parse_pri(line: str):
+    """Strip <PRI>; returns (facility, severity, rest)"""
+    if line.startswith("<"):
+        end = line.find(">", 1, 5)
+        if end > 1 and line[1:end].isdigit():
+            pri = int(line[1:end])
+            return pri >> 3, pri & 7, line[end + 1:]
+    return None, None, line
+
+
+def _rfc3164_ts(text: str) -> Optional[str]:
+    # "Mmm dd hh:mm:ss" (no year, no zone) - assume UTC and the most recent year
+    try:
+        month = MONTHS[text[0:3]]
+        day = int(text[4:6])
+        hour, minute, second = int(text[7:9]), int(text[10:12]), int(text[13:15])
+        now = datetime.now(timezone.utc)
+        ts = datetime(now.year, month, day, hour, minute, second, tzinfo=timezone.utc)
+        if (ts - now).days > 1:
+            ts = ts.replace(year=now.year - 1)
+    except (KeyError, ValueError):
+        # Unknown month or an impossible date ("Feb 30", "Feb 29" in the wrong year)
+        return None
+    return ts.isoformat()
+
+
+def _rfc5424_ts(text: str) -> Optional[str]:
+    if text == "-":
+        return None
+    try:
+        ts = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(timezone.utc).isoformat()
+
+
+def _skip_structured_data(text: str) -> str:
+    """Drop the RFC 5424 STRUCTURED-DATA element(s) and return the MSG part"""
+    if text.startswith("-"):
+        return text[2:] if len(text) > 1 else ""
+    i, depth, n = 0, 0, len(text)
+    while i < n:
+        ch = text[i]
+        if ch == "\\":
+            i += 2
+            continue
+        if ch == "[":
+            depth += 1
+        elif ch == "]":
+            depth -= 1
+            if depth == 0 and (i + 1 == n or text[i + 1] != "["):
+                return text[i + 2:]
+        i += 1
+    return ""
+
+
+def parse_cef_extension(ext: str) -> Dict[str, str]:
+    """Parse CEF key=value pairs; values may contain unescaped spaces"""
+    fields: Dict[str, str] = {}
+    key = None
+    start = 0
+    i, n = 0, len(ext)
+    while i < n:
+        ch = ext[i]
+        if ch == "\\":
+            i += 2
+            continue
+        if ch == "=":
+            # The key is the last whitespace-delimited token before '='
+            space = ext.rfind(" ", start, i)
+            if key is not None:
+                fields[key] = _cef_unescape(ext[start:space if space != -1 else i].strip())
+            key = ext[space + 1 if space != -1 else start:i].strip()
+            start = i + 1
+        i += 1
+    if key is not None:
+        fields[key] = _cef_unescape(ext[start:].strip())
+    return fields
+
+
+def _cef_unescape(value: str) -> str:
+    if "\\" not in value:
+        return value
+    for esc, ch in CEF_ESCAPES.items():
+        value = value.replace(esc, ch)
+    return value
+
+
+def _split_header(payload: str, count: int):
+    """Split on unescaped pipes, at most `count` times"""
+    parts, current, i, n = [], [], 0, len(payload)
+    while i < n and len(parts) < count:
+        ch = payload[i]
+        if ch == "\\" and i + 1 < n:
+            current.append(payload[i + 1])
+            i += 2
+            continue
+        if ch == "|":
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(ch)
+        i += 1
+    parts.append("".join(current) + payload[i:])
+    return parts
+
+
+def _epoch_or_none(value: Optional[str]) -> Optional[str]:
+    if value and value.isdigit():
+        seconds = int(value) / 1000 if len(value) > 10 else int(value)
+        try:
+            return datetime.fromtimestamp(seconds, timezone.utc).isoformat()
+        except (ValueError, OverflowError, OSError):
+            # Out of the platform's timestamp range
+            return None
+    return None
+
+
+def parse_cef(payload: str) -> Optional[Dict]:
+    parts = _split_header(payload, 7)
+    if len(parts) < 8:
+        return None
+    _, vendor, product, version, signature, name, severity, ext = parts
+    fields = parse_cef_extension(ext)
+    fields.update({"vendor": vendor, "product": product, "version": version,
+                   "signature": signature, "severity": severity})
+    return {
+        "source": f"{vendor} {product}".strip(),
+        "message": fields.get("msg") or name,
+        "ip": next((fields[k] for k in CEF_SOURCE_IP_KEYS if fields.get(k)), None),
+        "type": "cef",
+        "ts": _epoch_or_none(fields.get("rt")),
+        "fields": fields,
+    }
+
+
+def parse_leef(payload: str) -> Optional[Dict]:
+    # LEEF:1.0|Vendor|Product|Version|EventID|attrs (tab delimited)
+    # LEEF:2.0|Vendor|Product|Version|EventID|DelimiterChar|attrs
+    is_v2 = payload.startswith("LEEF:2")
+    parts = payload.split("|", 6 if is_v2 else 5)
+    if len(parts) < (7 if is_v2 else 6):
+        return None
+    vendor, product, version, event_id = parts[1:5]
+    delimiter = "\t"
+    if is_v2:
+        delim = parts[5]
+        if delim.lower().startswith(("0x", "x")):
+            try:
+                delimiter = chr(int(delim[delim.lower().index("x") + 1:], 16))
+            except (ValueError, OverflowError):
+                # Not a hex code point; keep the default tab
+                pass
+        elif delim:
+            delimiter = delim
+    attrs = parts[-1]
+    fields: Dict[str, str] = {}
+    for pair in attrs.split(delimiter):
+        key, sep, value = pair.partition("=")
+        if sep:
+            fields[key.strip()] = value.strip()
+    fields.update({"vendor": vendor, "product": product, "version": version, "eventId": event_id})
+    return {
+        "source": f"{vendor} {product}".strip(),
+        "message": fields.get("msg") or event_id,
+        "ip": next((fields[k] for k in LEEF_SOURCE_IP_KEYS if fields.get(k)), None),
+        "type": "leef",
+        "ts": _epoch_or_none(fields.get("devTime")),
+        "fields": fields,
+    }
+
+
+def parse_syslog(data: bytes, peer_ip: Optional[str] = None) -> Dict:
+    """Parse one syslog frame into a logs document; never raises"""
+    line = data.decode("utf-8", errors="replace").rstrip("\r\n\x00")
+    if line.startswith("\ufeff"):
+        line = line[1:]
+    facility, severity, rest = _parse_pri(line)
+
+    host = app = ts = None
+    msg = rest
+    if rest.startswith("1 "):
+        # RFC 5424: VERSION TIMESTAMP HOSTNAME APP-NAME PROCID MSGID SD [MSG]
+        head = rest.split(" ", 6)
+        if len(head) >= 7:
+            ts = _rfc5424_ts(head[1])
+            host = None if head[2] == "-" else head[2]
+            app = None if head[3] == "-" else head[3]
+            msg = _skip_structured_data(head[6])
+            if msg.startswith("\ufeff"):
+                msg = msg[1:]
+    elif len(rest) >= 16 and rest[3] == " " and rest[0:3] in MONTHS:
+        # RFC 3164: Mmm dd hh:mm:ss HOSTNAME TAG: MSG
+        ts = _rfc3164_ts(rest[0:15])
+        if ts:
+            tail = rest[16:]
+            host, _, tail = tail.partition(" ")
+            tag, sep, body = tail.partition(": ")
+            if sep and " " not in tag:
+                app = tag.split("[", 1)[0]
+                msg = body
+            else:
+                msg = tail
+
+    doc = None
+    for marker, parser in (("CEF:", parse_cef), ("LEEF:", parse_leef)):
+        idx = msg.find(marker)
+        if idx != -1:
+            doc = parser(msg[idx:])
+            break
+    if doc is None:
+        doc = {"source": host or app or peer_ip or "syslog", "message": msg,
+               "ip": None, "type": "syslog", "ts": None, "fields": {}}
+
+    fields = doc["fields"]
+    if host:
+        fields.setdefault("host", host)
+    if app:
+        fields.setdefault("app", app)
+    if facility is not None:
+        fields["facility"] = facility
+        fields["syslogSeverity"] = SEVERITIES[severity]
+    if peer_ip:
+        fields["peer"] = peer_ip
+    doc["ip"] = doc["ip"] or peer_ip
+    doc["ts"] = doc["ts"] or ts or _now()
+    return doc
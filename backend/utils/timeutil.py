@@ -0,0 +1,76 @@
+"""
+Timestamp helpers.
+New documents store times as native BSON dates. Older documents may still
+hold ISO strings (with "Z" or "+00:00"), so reads go through these helpers
+until `migrate_dates.py` has converted every collection.
+"""
+
+import re
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+# Date, time, optional fraction of any length, optional Z/±HH:MM/±HHMM offset
+_ISO = re.compile(r"(\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2})?)(?:\.(\d+))?(Z|[+-]\d{2}:?\d{2})?")
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def to_datetime(value: Any) -> Optional[datetime]:
+    """Aware UTC datetime from a BSON date (naive = UTC) or an ISO string; None if unparseable"""
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+    if isinstance(value, str) and value:
+        try:
+            return to_datetime(datetime.fromisoformat(_normalize_iso(value)))
+        except ValueError:
+            return None
+    return None
+
+
+def _normalize_iso(value: str) -> str:
+    """
+    Rewrite what older fromisoformat (Python < 3.11) rejects: Wazuh's
+    "+0000" offsets, a trailing Z and fractions that aren't 3 or 6 digits
+    """
+    match = _ISO.fullmatch(value.strip())
+    if match is None:
+        return value
+    base, fraction, offset = match.groups()
+    if fraction:
+        base += "." + fraction[:6].ljust(6, "0")
+    if offset == "Z":
+        offset = "+00:00"
+    elif offset and ":" not in offset:
+        offset = offset[:3] + ":" + offset[3:]
+    return base + (offset or "")
+
+
+def to_iso(value: Any) -> Optional[str]:
+    """API representation: ISO-8601 UTC with a trailing Z, whatever the stored form"""
+    dt = to_datetime(value)
+    if dt is None:
+        return value if isinstance(value, str) else None
+    return dt.replace(tzinfo=None).isoformat(timespec="milliseconds") + "Z"
+
+
+def legacy_iso(dt: datetime) -> str:
+    """The string form older documents were written with, for range comparisons"""
+    return to_datetime(dt).replace(tzinfo=None).isoformat(timespec="microseconds") + "Z"
+
+
+def time_range(field: str, gte: Optional[datetime] = None, lt: Optional[datetime] = None) -> Dict:
+    """Range filter matching both native dates and legacy ISO strings"""
+    native: Dict = {}
+    legacy: Dict = {}
+    if gte is not None:
+        native["$gte"] = to_datetime(gte)
+        legacy["$gte"] = legacy_iso(gte)
+    if lt is not None:
+        native["$lt"] = to_datetime(lt)
+        legacy["$lt"] = legacy_iso(lt)
+    if not native:
+        return {}
+    # Type bracketing keeps each branch on its own slice of the same index
+    return {"$or": [{field: native}, {field: legacy}]}
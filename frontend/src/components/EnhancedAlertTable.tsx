@@ -63,7 +63,7 @@ const EnhancedAlertTable: React.FC = () => {
     if (severity) url += `&severity=${encodeURIComponent(severity)}`;
     setLoading(true);
     api.get(url)
-      .then(r => setAlerts(r.data))
+      .then(r => setAlerts(r.data.items))
       .catch(e => setError(e.message))
       .finally(() => setLoading(false));
   };
@@ -16,6 +16,14 @@ interface ComplianceData { standard: string; segments: { label: string; value: n
 interface MitreData { tactics: { name: string; count: number }[] }
 interface FimData { events: { time: string; path: string; action: string; rule?: string }[] }
 interface ScaData { scans: { policy: string; endedAt: string; passed: number; failed: number; score: number }[] }
+interface SnapshotData {
+  overview: OverviewStats;
+  timeseries: TimeseriesData;
+  compliance: ComplianceData;
+  mitre: MitreData;
+  fim: FimData;
+  sca: ScaData;
+}
 
 const Dashboard: React.FC = () => {
   const [overview, setOverview] = useState<OverviewStats | null>(null);
@@ -28,22 +36,15 @@ const Dashboard: React.FC = () => {
 
   useEffect(() => {
     let mounted = true;
-    Promise.all([
-      api.get('/api/stats/overview'),
-      api.get('/api/stats/timeseries?days=7&bucket=day'),
-      api.get('/api/stats/compliance'),
-      api.get('/api/stats/mitre'),
-      api.get('/api/stats/fim/recent'),
-      api.get('/api/stats/sca/latest'),
-    ])
-      .then(([ovr, ts, comp, mitreRes, fimRes, scaRes]) => {
+    api.get<SnapshotData>('/api/stats/snapshot?days=7&bucket=day&incidents=0')
+      .then(({ data }) => {
         if (!mounted) return;
-        setOverview(ovr.data);
-        setTrend(ts.data);
-        setCompliance(comp.data);
-        setMitre(mitreRes.data);
-        setFim(fimRes.data);
-        setSca(scaRes.data);
+        setOverview(data.overview);
+        setTrend(data.timeseries);
+        setCompliance(data.compliance);
+        setMitre(data.mitre);
+        setFim(data.fim);
+        setSca(data.sca);
       })
       .catch((e) => setError(e.message));
     return () => { mounted = false; };
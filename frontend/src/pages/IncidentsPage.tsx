@@ -23,7 +23,7 @@ export default function IncidentsPage() {
 
   useEffect(() => {
     api.get('/api/incidents')
-      .then(r => setIncidents(r.data || []))
+      .then(r => setIncidents(r.data?.items || []))
       .catch(e => console.error(e))
       .finally(() => setLoading(false));
   }, []);
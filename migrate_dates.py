@@ -0,0 +1,88 @@
+"""
+Date Migration Script
+Converts legacy ISO-string timestamps to native BSON dates, online and in
+batches, so range queries and time bucketing can use indexes directly.
+Safe to re-run and to run while the API is serving traffic: each update is
+conditional on the document still holding the string it was read with.
+
+    python migrate_dates.py [--batch 1000] [--pause 0.05] [--dry-run]
+"""
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+from backend.utils.config import settings
+from backend.utils.timeutil import to_datetime
+import argparse
+import asyncio
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# (collection, field) pairs written as ISO strings before native dates
+DATE_FIELDS = [
+    ('alerts', 'createdAt'),
+    ('alerts', 'lastSeen'),
+    ('incidents', 'createdAt'),
+    ('cases', 'createdAt'),
+]
+
+
+async def migrate_field(db, collection: str, field: str, batch: int, pause: float, dry_run: bool):
+    converted = skipped = 0
+    last_id = None
+    while True:
+        query = {field: {'$type': 'string'}}
+        if last_id is not None:
+            query['_id'] = {'$gt': last_id}
+        docs = await db[collection].find(query, {field: 1}).sort('_id', 1).limit(batch).to_list(length=batch)
+        if not docs:
+            break
+        last_id = docs[-1]['_id']
+        
+        ops = []
+        for doc in docs:
+            value = to_datetime(doc[field])
+            if value is None:
+                skipped += 1
+                continue
+            ops.append(UpdateOne({'_id': doc['_id'], field: doc[field]}, {'$set': {field: value}}))
+        if ops and not dry_run:
+            result = await db[collection].bulk_write(ops, ordered=False)
+            converted += result.modified_count
+        else:
+            converted += len(ops)
+        logger.info(f"{collection}.{field}: {converted} converted, {skipped} unparseable")
+        if pause:
+            # Leave headroom for live traffic
+            await asyncio.sleep(pause)
+    return converted, skipped
+
+
+async def migrate_dates(batch: int, pause: float, dry_run: bool):
+    """Convert every legacy string timestamp listed in DATE_FIELDS"""
+    
+    logger.info(f"Database: {settings.MONGO_DB_NAME}{' (dry run)' if dry_run else ''}")
+    client = AsyncIOMotorClient(settings.MONGO_URI)
+    db = client[settings.MONGO_DB_NAME]
+    
+    try:
+        for collection, field in DATE_FIELDS:
+            remaining = await db[collection].count_documents({field: {'$type': 'string'}})
+            if not remaining:
+                logger.info(f"⏭️  {collection}.{field}: nothing to migrate")
+                continue
+            logger.info(f"🔄 {collection}.{field}: {remaining} string values")
+            converted, skipped = await migrate_field(db, collection, field, batch, pause, dry_run)
+            logger.info(f"✅ {collection}.{field}: {converted} converted, {skipped} left as-is (unparseable)")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate ISO-string timestamps to BSON dates")
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--pause", type=float, default=0.05, help="seconds to sleep between batches")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(migrate_dates(args.batch, args.pause, args.dry_run))
@@ -40,7 +40,11 @@ async def setup_mongodb():
             'users',
             'playbooks',
             'threat_intel',
-            'logs'
+            'logs',
+            'jobs',
+            'sync_state',
+            'rollups',
+            'alert_buckets'
         ]
         
         logger.info("\n📦 Setting up collections...")
@@ -59,12 +63,17 @@ async def setup_mongodb():
         await db.alerts.create_index([("timestamp", -1)])
         await db.alerts.create_index([("severity", 1)])
         await db.alerts.create_index([("source", 1)])
+        await db.alerts.create_index(
+            [("externalId", 1)], unique=True,
+            partialFilterExpression={"externalId": {"$exists": True}}
+        )
         logger.info("✅ Created indexes for 'alerts'")
         
         # Enriched alerts indexes
         await db.enriched_alerts.create_index([("enrichment.threat_score", -1)])
         await db.enriched_alerts.create_index([("enrichment.is_malicious", 1)])
         await db.enriched_alerts.create_index([("timestamp", -1)])
+        await db.enriched_alerts.create_index([("jobId", 1), ("_id", 1)])
         logger.info("✅ Created indexes for 'enriched_alerts'")
         
         # Incidents indexes
@@ -73,6 +82,10 @@ async def setup_mongodb():
         await db.incidents.create_index([("created_at", -1)])
         logger.info("✅ Created indexes for 'incidents'")
         
+        # Jobs indexes
+        await db.jobs.create_index([("status", 1), ("createdAt", 1)])
+        logger.info("✅ Created indexes for 'jobs'")
+        
         # Users indexes
         await db.users.create_index([("email", 1)], unique=True)
         await db.users.create_index([("username", 1)], unique=True)
@@ -80,6 +93,8 @@ async def setup_mongodb():
         
         # Threat intel indexes
         await db.threat_intel.create_index([("ioc", 1), ("type", 1)])
+        await db.threat_intel.create_index([("ioc", 1), ("type", 1), ("provider", 1)], unique=True)
+        await db.threat_intel.create_index([("expiresAt", 1)], expireAfterSeconds=0)
         await db.threat_intel.create_index([("timestamp", -1)])
         logger.info("✅ Created indexes for 'threat_intel'")
         
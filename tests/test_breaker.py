@@ -0,0 +1,38 @@
+import asyncio
+import time
+
+import pytest
+
+from backend.services import http_client
+from backend.services.breaker import HALF_OPEN, CircuitBreaker
+
+
+def _half_open(reset_timeout=0.01):
+    breaker = CircuitBreaker("intel", failure_threshold=1, reset_timeout=reset_timeout)
+    breaker.record_failure()
+    time.sleep(reset_timeout)
+    return breaker
+
+
+class CancelledClient:
+    async def get(self, url, **kwargs):
+        raise asyncio.CancelledError()
+
+
+def test_cancelled_probe_releases_its_slot(monkeypatch):
+    breaker = _half_open()
+    monkeypatch.setitem(http_client.breakers, "intel", breaker)
+    monkeypatch.setattr(http_client, "get_http_client", lambda: CancelledClient())
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(http_client.provider_get("intel", "https://intel.invalid"))
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+
+
+def test_stale_half_open_probe_expires():
+    breaker = _half_open()
+    assert breaker.allow()
+    assert not breaker.allow()
+    time.sleep(0.01)
+    assert breaker.allow()
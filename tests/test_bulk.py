@@ -0,0 +1,66 @@
+import asyncio
+import gzip
+import json
+
+import pytest
+
+from backend.utils import bulk
+from backend.utils.bulk import BodyTooLarge, iter_json_records
+
+
+async def _stream(data: bytes, size: int = 7):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+def _records(data: bytes, **kwargs):
+    async def run():
+        return [r async for r in iter_json_records(_stream(data), **kwargs)]
+    return asyncio.run(run())
+
+
+def test_ndjson_lines_split_across_chunks():
+    lines = b"\n".join(json.dumps({"n": i}).encode() for i in range(20)) + b"\n\n{bad\n{\"n\": 20}"
+    records = _records(lines, content_type="application/x-ndjson")
+    assert [r for _, r in records[:20]] == [{"n": i} for i in range(20)]
+    assert isinstance(records[20][1], ValueError)
+    assert records[21] == (21, {"n": 20})
+
+
+def test_json_array_body():
+    assert _records(b'  [{"a": 1}, {"a": 2}]') == [(0, {"a": 1}), (1, {"a": 2})]
+
+
+def test_ndjson_record_without_newline_is_bounded():
+    with pytest.raises(BodyTooLarge):
+        _records(b'{"a": "' + b"x" * 1000, content_type="application/x-ndjson", max_record_bytes=100)
+
+
+def test_ndjson_long_line_in_one_chunk_is_bounded():
+    body = b'{"a": "' + b"x" * 1000 + b'"}\n'
+
+    async def run():
+        async def one():
+            yield body
+        return [r async for r in iter_json_records(one(), max_record_bytes=100)]
+
+    with pytest.raises(BodyTooLarge):
+        asyncio.run(run())
+
+
+def test_gzip_is_inflated_in_bounded_steps(monkeypatch):
+    monkeypatch.setattr(bulk, "DECODE_CHUNK", 1024)
+    body = b"\n".join(json.dumps({"n": i}).encode() for i in range(2000))
+    compressed = gzip.compress(body)
+
+    async def run():
+        sizes = []
+        async for chunk in bulk._decoded_chunks(_stream(compressed, len(compressed)), True):
+            sizes.append(len(chunk))
+        return sizes
+
+    sizes = asyncio.run(run())
+    assert sum(sizes) == len(body)
+    assert max(sizes) <= 1024
+    records = _records(compressed, content_encoding="gzip", max_record_bytes=100)
+    assert [r for _, r in records] == [{"n": i} for i in range(2000)]
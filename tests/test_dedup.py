@@ -0,0 +1,105 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from backend.services import dedup
+from backend.services.dedup import AlertDeduplicator
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def __aiter__(self):
+        return self._iter()
+
+    async def _iter(self):
+        for doc in self.docs:
+            yield doc
+
+
+class FakeResult:
+    def __init__(self, matched_count):
+        self.matched_count = matched_count
+
+
+class FakeAlerts:
+    def __init__(self):
+        self.docs = {}
+
+    def find(self, query, projection=None):
+        return FakeCursor([{"_id": i} for i in query["_id"]["$in"] if i in self.docs])
+
+    async def bulk_write(self, ops, ordered=True):
+        matched = 0
+        for op in ops:
+            doc = self.docs.get(op._filter["_id"])
+            if doc is not None:
+                doc["count"] += op._doc["$inc"]["count"]
+                matched += 1
+        return FakeResult(matched)
+
+
+class FakeDB:
+    def __init__(self):
+        self.alerts = FakeAlerts()
+
+
+class FakeSpool:
+    backlog = False
+
+    def has_backlog(self):
+        return self.backlog
+
+
+@pytest.fixture
+def env(monkeypatch):
+    db, spool = FakeDB(), FakeSpool()
+    monkeypatch.setattr(dedup, "get_db", lambda: db)
+    monkeypatch.setattr(dedup, "ingest_spool", spool)
+    return db, spool
+
+
+def _alert():
+    return {"source": "wazuh", "severity": "high", "type": "auth", "description": "x",
+            "createdAt": datetime.now(timezone.utc)}
+
+
+def _dedup():
+    return AlertDeduplicator(True, "source,type,description", 60, "", 1000, 1)
+
+
+def test_increments_for_spooled_alert_wait_for_the_drain(env):
+    db, spool = env
+    d = _dedup()
+    first = _alert()
+    assert d.check(first) is None
+    d.confirm([first["_id"]])
+    # The first alert went to the spool, not MongoDB
+    spool.backlog = True
+    for _ in range(3):
+        assert d.check(_alert()) == first["_id"]
+
+    assert asyncio.run(d.flush()) == 0
+    assert d.snapshot()["pending_increments"] == 1
+
+    # Spool drained: the alert exists now and the held-back repeats land
+    db.alerts.docs[first["_id"]] = {"count": 1}
+    spool.backlog = False
+    assert asyncio.run(d.flush()) == 1
+    assert db.alerts.docs[first["_id"]]["count"] == 4
+    assert d.snapshot()["pending_increments"] == 0
+
+
+def test_increments_for_alert_never_stored_are_dropped(env):
+    db, _ = env
+    d = _dedup()
+    first = _alert()
+    d.check(first)
+    d.confirm([first["_id"]])
+    d.check(_alert())
+
+    assert asyncio.run(d.flush()) == 0
+    assert d.snapshot()["pending_increments"] == 0
+    assert d.stats["orphaned"] == 1
@@ -0,0 +1,77 @@
+import re
+
+import pytest
+
+from backend.utils.search import parse_query, tokenize
+
+MESSAGES = [
+    "Accepted password for user@example.com from 10.0.0.15",
+    "Failed password for root from 192.168.1.20 port 22",
+    "GET /var/log/secure returned 404",
+    "example com unrelated words",
+]
+
+
+class FakeLogs:
+    """Evaluates the subset of the query language parse_query emits ($and, $all, $regex, equality)"""
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, query):
+        return [doc for doc in self.docs if self._matches(doc, query)]
+
+    def _matches(self, doc, query):
+        for field, cond in query.items():
+            if field == "$and":
+                if not all(self._matches(doc, sub) for sub in cond):
+                    return False
+                continue
+            value = doc.get(field)
+            values = value if isinstance(value, list) else [value]
+            if not isinstance(cond, dict):
+                ok = cond in values
+            elif "$all" in cond:
+                ok = all(v in values for v in cond["$all"])
+            elif "$regex" in cond:
+                flags = re.IGNORECASE if "i" in cond.get("$options", "") else 0
+                ok = any(isinstance(v, str) and re.search(cond["$regex"], v, flags) for v in values)
+            else:
+                raise AssertionError(f"unsupported condition {cond}")
+            if not ok:
+                return False
+        return True
+
+
+@pytest.fixture
+def logs():
+    return FakeLogs([{"message": m, "tokens": tokenize(m)} for m in MESSAGES])
+
+
+def _search(logs, q):
+    query, _, _ = parse_query(q)
+    return [d["message"] for d in logs.find(query)]
+
+
+def test_compound_term_matches_inside_a_longer_compound(logs):
+    assert _search(logs, "example.com") == [MESSAGES[0]]
+
+
+def test_exact_compound_still_matches(logs):
+    assert _search(logs, "user@example.com") == [MESSAGES[0]]
+
+
+def test_partial_ip_and_path(logs):
+    assert _search(logs, "10.0.0") == [MESSAGES[0]]
+    assert _search(logs, "192.168.1.2*") == [MESSAGES[1]]
+    assert _search(logs, "var/log") == [MESSAGES[2]]
+
+
+def test_phrase_spanning_a_compound(logs):
+    assert _search(logs, '"password for user@example"') == [MESSAGES[0]]
+
+
+def test_single_words_and_partial_words(logs):
+    assert _search(logs, "password root") == [MESSAGES[1]]
+    # Matching is on whole words: a fragment of a word is not a token
+    assert _search(logs, "xample.com") == []
@@ -0,0 +1,207 @@
+import asyncio
+import os
+
+import pytest
+from bson import ObjectId
+from pymongo.errors import BulkWriteError, ServerSelectionTimeoutError
+
+from backend.services import spool as spool_module
+from backend.services import write_buffer
+from backend.services.spool import IngestSpool
+from backend.services.write_buffer import WriteBehindBuffer
+
+
+class FlakyCollection:
+    """insert_many raises ServerSelectionTimeoutError while `down`, like an unreachable mongod"""
+
+    def __init__(self):
+        self.down = False
+        # Go down after this many more successful inserts (None = never)
+        self.down_after = None
+        self.docs = []
+        self.failures = 0
+        self.duplicates = 0
+
+    async def insert_many(self, docs, ordered=True):
+        if self.down_after == 0:
+            self.down, self.down_after = True, None
+        if self.down:
+            self.failures += 1
+            raise ServerSelectionTimeoutError("mongod unreachable")
+        if self.down_after is not None:
+            self.down_after -= 1
+        seen = {doc["_id"] for doc in self.docs}
+        errors = []
+        for i, doc in enumerate(docs):
+            if doc["_id"] in seen:
+                self.duplicates += 1
+                errors.append({"index": i, "code": 11000, "errmsg": "duplicate key"})
+            else:
+                self.docs.append(doc)
+                seen.add(doc["_id"])
+        if errors:
+            raise BulkWriteError({"writeErrors": errors})
+
+
+class FakeDB:
+    def __init__(self):
+        self.collections = {}
+
+    def __getitem__(self, name):
+        return self.collections.setdefault(name, FlakyCollection())
+
+
+@pytest.fixture
+def db(monkeypatch):
+    fake = FakeDB()
+    monkeypatch.setattr(spool_module, "get_db", lambda: fake)
+    monkeypatch.setattr(write_buffer, "get_db", lambda: fake)
+    return fake
+
+
+def _spool(directory, **overrides):
+    options = dict(segment_bytes=1 << 20, fsync_interval=0.01, drain_batch=4,
+                   drain_interval=0.01, max_backoff=0.02)
+    options.update(overrides)
+    return IngestSpool(str(directory), **options)
+
+
+def test_concurrent_appends_share_one_fsync(tmp_path):
+    spool = _spool(tmp_path, fsync_interval=0.05)
+
+    async def run():
+        await asyncio.gather(*(spool.append("alerts", [{"_id": ObjectId()}]) for _ in range(20)))
+        await spool.stop()
+
+    asyncio.run(run())
+    assert spool.stats["appended"] == 20
+    assert spool.stats["fsyncs"] == 1
+
+
+def test_replay_after_truncated_last_record(tmp_path, db):
+    docs = [{"_id": ObjectId(), "n": i} for i in range(6)]
+
+    async def crash():
+        spool = _spool(tmp_path)
+        await spool.append("alerts", docs)
+        await spool.stop()
+
+    asyncio.run(crash())
+    # A crash mid-write leaves half a record at the end of the segment
+    (segment,) = [name for name in os.listdir(tmp_path) if name.endswith(".ndjson")]
+    with open(tmp_path / segment, "ab") as f:
+        f.write(b'{"c": "alerts", "d": {"_id": {"$oid": "65')
+
+    async def restart():
+        spool = _spool(tmp_path)
+        assert spool.has_backlog()
+        replayed = await spool.drain_once()
+        # Writes after the restart go to a fresh segment and drain behind the old one
+        late = {"_id": ObjectId(), "n": 6}
+        await spool.append("alerts", [late])
+        await spool.stop()
+        replayed += await spool.drain_once()
+        return replayed, late
+
+    replayed, late = asyncio.run(restart())
+    assert replayed == 7
+    assert [d["_id"] for d in db["alerts"].docs] == [d["_id"] for d in docs] + [late["_id"]]
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".ndjson")]
+
+
+def test_replaying_twice_does_not_duplicate(tmp_path, db):
+    docs = [{"_id": ObjectId()} for _ in range(3)]
+
+    async def run():
+        spool = _spool(tmp_path)
+        await spool.append("alerts", docs)
+        await spool.stop()
+        # Simulate a crash after the insert but before the checkpoint was saved
+        await spool._replay([("alerts", d) for d in docs])
+        await spool.drain_once()
+        return spool
+
+    spool = asyncio.run(run())
+    assert len(db["alerts"].docs) == 3
+    assert spool.stats["dropped"] == 0
+
+
+def test_outage_spools_then_drains_in_order_after_recovery(tmp_path, db, monkeypatch):
+    spool = _spool(tmp_path)
+    monkeypatch.setattr(write_buffer, "ingest_spool", spool)
+    alerts = db["alerts"]
+    alerts.down = True
+
+    async def run():
+        buffer = WriteBehindBuffer("alerts", max_batch=5, max_delay=0.01, max_pending=100)
+        docs = [{"n": i} for i in range(12)]
+        ids = [await buffer.submit(doc) for doc in docs]
+        assert spool.degraded
+        assert alerts.docs == []
+        with pytest.raises(ServerSelectionTimeoutError):
+            await spool.drain_once()
+
+        spool.start()
+        await asyncio.sleep(0.05)
+        assert spool.degraded and alerts.docs == []
+
+        alerts.down = False
+        for _ in range(200):
+            if not spool.degraded:
+                break
+            await asyncio.sleep(0.01)
+        await spool.stop()
+        await buffer.stop()
+        return ids
+
+    ids = asyncio.run(run())
+    assert not spool.degraded
+    assert spool.backlog_bytes() == 0
+    assert [d["_id"] for d in alerts.docs] == ids
+
+
+async def _until(condition, timeout=2.0):
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not reached")
+
+
+def test_mongo_outage_and_recovery_replays_every_record_once(tmp_path, db, monkeypatch):
+    spool = _spool(tmp_path, segment_bytes=256)
+    monkeypatch.setattr(write_buffer, "ingest_spool", spool)
+    alerts = db["alerts"]
+    alerts.down = True
+
+    async def run():
+        buffer = WriteBehindBuffer("alerts", max_batch=3, max_delay=0.01, max_pending=100)
+        spool.start()
+        ids = [await buffer.submit({"n": i}) for i in range(6)]
+        # Keep writing while the drainer is failing and backing off
+        await _until(lambda: alerts.failures >= 3)
+        ids += [await buffer.submit({"n": i}) for i in range(6, 12)]
+        await _until(lambda: alerts.failures >= 5)
+        assert spool.degraded and alerts.docs == []
+        assert spool.stats["appended"] == 12
+        assert spool.stats["dropped"] == 0
+
+        # MongoDB comes back, then drops again after one replayed batch
+        alerts.down, alerts.down_after = False, 1
+        await _until(lambda: alerts.down)
+        failures = alerts.failures
+        await _until(lambda: alerts.failures > failures)
+        assert 0 < len(alerts.docs) < 12
+
+        alerts.down = False
+        await _until(lambda: not spool.degraded)
+        await spool.stop()
+        await buffer.stop()
+        return ids
+
+    ids = asyncio.run(run())
+    assert [d["_id"] for d in alerts.docs] == ids
+    assert alerts.duplicates == 0
+    assert spool.stats["drained"] == 12
+    assert spool.stats["dropped"] == 0
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".ndjson")]
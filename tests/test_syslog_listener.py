@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from backend.services import syslog_listener
+from backend.services.syslog_listener import SyslogListener
+from backend.utils.syslog import parse_syslog
+
+
+def _frames(data: bytes, max_message: int = 100):
+    listener = SyslogListener("127.0.0.1", 0, 0, max_message)
+
+    async def run():
+        reader = asyncio.StreamReader(limit=max_message)
+        reader.feed_data(data)
+        reader.feed_eof()
+        frames = []
+        while (frame := await listener._read_frame(reader)) is not None:
+            frames.append(frame)
+        return frames
+
+    return asyncio.run(run()), listener.stats
+
+
+def test_octet_counted_frames():
+    frames, _ = _frames(b"5 hello3 abc")
+    assert frames == [b"hello", b"abc"]
+
+
+def test_oversized_octet_counted_frame_is_skipped():
+    frames, stats = _frames(b"200 " + b"a" * 200 + b"3 xyz")
+    assert frames == [b"", b"xyz"]
+    assert stats["oversized"] == 1
+
+
+def test_absurd_frame_length_is_rejected_without_reading_it():
+    with pytest.raises(ValueError):
+        _frames(b"99999999999 " + b"a" * 10)
+
+
+def test_oversized_newline_frame_is_skipped():
+    frames, stats = _frames(b"<13>" + b"a" * 300 + b"\n<13>ok\n")
+    assert frames == [b"", b"<13>ok\n"]
+    assert stats["oversized"] == 1
+
+
+@pytest.mark.parametrize("frame", [
+    b"<13>Feb 30 12:00:00 host app: x",
+    b"<13>Feb 30 12:00:00 host app: CEF:0|V|P|1|100|n|5|rt=99999999999999999999",
+    b"<13>Jan 01 12:00:00 host app: LEEF:2.0|V|P|1|100|xZZ|src=10.0.0.1",
+])
+def test_parse_syslog_never_raises(frame):
+    doc = parse_syslog(frame, "10.0.0.9")
+    assert doc["ts"]
+    assert doc["ip"]
+
+
+def test_leef_bad_hex_delimiter_falls_back_to_tab():
+    doc = parse_syslog(b"<13>LEEF:2.0|V|P|1|100|xZZ|src=10.0.0.1\tusrName=bob")
+    assert doc["fields"]["src"] == "10.0.0.1"
+    assert doc["fields"]["usrName"] == "bob"
+
+
+def test_unparseable_frame_is_counted_and_skipped(monkeypatch):
+    listener = SyslogListener("127.0.0.1", 0, 0, 100)
+    queued = []
+
+    def boom(data, peer_ip=None):
+        raise OverflowError("bad frame")
+
+    monkeypatch.setattr(syslog_listener, "parse_syslog", boom)
+    monkeypatch.setattr(syslog_listener.log_buffer, "enqueue", lambda doc: queued.append(doc) or True)
+    listener.handle_datagram(b"<13>x", "10.0.0.9")
+    asyncio.run(listener._handle_frame(b"<13>y", "10.0.0.9"))
+    assert listener.stats["malformed"] == 2
+    assert listener.stats["dropped"] == 0
+    assert queued == []
@@ -0,0 +1,23 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from backend.utils.timeutil import to_datetime
+
+
+@pytest.mark.parametrize('value, expected', [
+    # Wazuh alerts.json / API format
+    ('2023-02-03T04:05:06.789+0000', datetime(2023, 2, 3, 4, 5, 6, 789000, tzinfo=timezone.utc)),
+    ('2023-02-03T06:05:06.7+0200', datetime(2023, 2, 3, 4, 5, 6, 700000, tzinfo=timezone.utc)),
+    ('2023-02-03T04:05:06.123456789Z', datetime(2023, 2, 3, 4, 5, 6, 123456, tzinfo=timezone.utc)),
+    ('2023-02-03T04:05:06Z', datetime(2023, 2, 3, 4, 5, 6, tzinfo=timezone.utc)),
+    ('2023-02-03T04:05:06.5-05:30', datetime(2023, 2, 3, 9, 35, 6, 500000, tzinfo=timezone.utc)),
+    ('2023-02-03T04:05:06', datetime(2023, 2, 3, 4, 5, 6, tzinfo=timezone.utc)),
+])
+def test_to_datetime_parses_wazuh_and_other_iso_forms(value, expected):
+    assert to_datetime(value) == expected
+
+
+def test_to_datetime_rejects_garbage():
+    assert to_datetime('not a date') is None
+    assert to_datetime('2023-02-30T04:05:06Z') is None
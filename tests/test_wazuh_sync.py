@@ -0,0 +1,88 @@
+import asyncio
+from datetime import datetime, timezone
+
+from backend.services import wazuh_sync
+from backend.services.wazuh_sync import WazuhSyncDaemon, wazuh_alert_to_doc
+
+
+class FakeStateCollection:
+    def __init__(self):
+        self.docs = {}
+
+    async def find_one(self, query):
+        return self.docs.get(query['_id'])
+
+    async def update_one(self, query, update, upsert=False):
+        self.docs.setdefault(query['_id'], {'_id': query['_id']}).update(update['$set'])
+
+
+class FakeDB:
+    def __init__(self):
+        self.sync_state = FakeStateCollection()
+
+
+class FakeWazuh:
+    """Serves alerts the way the Wazuh API does for timestamp>=X sorted by (timestamp, id)"""
+
+    def __init__(self, alerts):
+        self.alerts = sorted(alerts, key=lambda a: (a['timestamp'], a['id']))
+
+    async def get_alerts_since(self, timestamp=None, limit=500, offset=0):
+        matching = [a for a in self.alerts if timestamp is None or a['timestamp'] >= timestamp]
+        return matching[offset:offset + limit]
+
+
+def _sync_all(monkeypatch, alerts, batch_size):
+    stored = []
+
+    async def fake_store(batch):
+        stored.extend(a['id'] for a in batch)
+        return len(batch)
+
+    monkeypatch.setattr(wazuh_sync, 'get_db', lambda db=FakeDB(): db)
+    monkeypatch.setattr(wazuh_sync, 'wazuh_service', FakeWazuh(alerts))
+    monkeypatch.setattr(wazuh_sync, 'store_wazuh_alerts', fake_store)
+
+    async def run():
+        daemon = WazuhSyncDaemon(batch_size=batch_size)
+        for _ in range(100):
+            fetched, _ = await daemon.sync_once()
+            if not fetched:
+                return
+        raise AssertionError('sync never caught up')
+
+    asyncio.run(run())
+    return stored
+
+
+def test_sync_advances_past_timestamp_shared_by_more_than_a_batch(monkeypatch):
+    ts = '2024-05-01T10:00:00.000+0000'
+    alerts = [{'id': f'{i:04d}', 'timestamp': ts} for i in range(7)]
+    alerts.append({'id': '9000', 'timestamp': '2024-05-01T10:00:01.000+0000'})
+
+    stored = _sync_all(monkeypatch, alerts, batch_size=3)
+
+    assert stored == [a['id'] for a in alerts]
+
+
+def test_sync_resumes_mid_timestamp_after_new_alerts_arrive(monkeypatch):
+    ts = '2024-05-01T10:00:00.000+0000'
+    alerts = [{'id': f'{i:04d}', 'timestamp': ts} for i in range(5)]
+    alerts += [{'id': f'{i:04d}', 'timestamp': '2024-05-01T10:00:02.000+0000'} for i in range(5, 9)]
+
+    stored = _sync_all(monkeypatch, alerts, batch_size=4)
+
+    assert sorted(stored) == sorted(a['id'] for a in alerts)
+    assert len(stored) == len(alerts)
+
+
+def test_alert_doc_uses_event_timestamp():
+    doc = wazuh_alert_to_doc({'id': '1', 'timestamp': '2023-02-03T04:05:06.789+0000', 'rule': {'level': 9}})
+    assert doc['createdAt'] == datetime(2023, 2, 3, 4, 5, 6, 789000, tzinfo=timezone.utc)
+    assert doc['severity'] == 'high'
+
+
+def test_alert_doc_falls_back_to_ingest_time():
+    before = datetime.now(timezone.utc)
+    doc = wazuh_alert_to_doc({'id': '1', 'timestamp': 'not a date'})
+    assert doc['createdAt'] >= before
@@ -0,0 +1,37 @@
+import json
+
+from backend.services import wazuh_tail
+from backend.services.wazuh_tail import WazuhAlertTailer
+
+
+def _tailer(tmp_path, content: bytes, batch_size=10):
+    path = tmp_path / 'alerts.json'
+    path.write_bytes(content)
+    tailer = WazuhAlertTailer(path=str(path), batch_size=batch_size)
+    assert tailer._open(0)
+    return tailer
+
+
+def test_oversized_line_is_skipped_and_offset_advances(tmp_path, monkeypatch):
+    monkeypatch.setattr(wazuh_tail, 'READ_CHUNK', 64)
+    good = json.dumps({'id': '2'}).encode() + b'\n'
+    content = b'{"id": "1", "x": "' + b'a' * 300 + b'"}\n' + good
+    tailer = _tailer(tmp_path, content)
+
+    lines, consumed = tailer._read_lines()
+
+    assert lines == [good]
+    assert consumed == len(content)
+    assert tailer.stats['oversized'] == 1
+
+
+def test_oversized_line_still_being_written_is_not_consumed(tmp_path, monkeypatch):
+    monkeypatch.setattr(wazuh_tail, 'READ_CHUNK', 64)
+    first = b'{"id": "1"}\n'
+    tailer = _tailer(tmp_path, first + b'{"id": "2", "x": "' + b'a' * 300)
+
+    lines, consumed = tailer._read_lines()
+
+    assert lines == [first]
+    assert consumed == len(first)
+    assert tailer.stats['oversized'] == 0